@@ -0,0 +1,221 @@
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+
+from SoftDesk import response_cache
+from SoftDesk.conditional import ConditionalGetMixin
+from SoftDesk.db_routers import ReplicaReadsMixin, ause_replica
+from SoftDesk.renderers import FastJSONRenderer
+from authentication.tokens import ClaimsJWTAuthentication
+
+
+async def afetch(queryset) -> list:
+    """return the rows of the queryset with the async ORM. aiterator() does not
+    support prefetch_related() before Django 5.0 : the prefetched querysets are
+    evaluated by "async for", which runs the prefetches in the same thread"""
+
+    if queryset._prefetch_related_lookups:
+        return [instance async for instance in queryset]
+
+    return [instance async for instance in queryset.aiterator()]
+
+
+async def apaginate_queryset(paginator, queryset, request):
+    """async variant of paginator.paginate_queryset(), for the paginators
+    defining apaginate_queryset() and the limit/offset pagination"""
+
+    if hasattr(paginator, "apaginate_queryset"):
+        return await paginator.apaginate_queryset(queryset, request)
+    if not isinstance(paginator, LimitOffsetPagination):
+        raise TypeError(f"{type(paginator).__name__} has no async variant.")
+
+    # same as LimitOffsetPagination.paginate_queryset()
+    paginator.limit = paginator.get_limit(request)
+    if paginator.limit is None:
+        return None
+
+    paginator.count = await queryset.acount()
+    paginator.offset = paginator.get_offset(request)
+    paginator.request = request
+    if paginator.count == 0 or paginator.offset > paginator.count:
+        return []
+
+    start = paginator.offset
+    end = start + paginator.limit
+
+    return await afetch(queryset[start:end])
+
+
+class AsyncReadOnlyView(View):
+    """async list and detail views of a viewset, served by the event loop of an
+    ASGI worker : the authentication, the permissions, the throttles, the
+    replica routing, the conditional GET (ETag, Last-Modified), the response
+    cache, the filters and the serializers of the viewset are reused, the
+    queries are sent with the async ORM so one worker overlaps the database
+    waits of many requests.
+    JWT authentication and JSON only : no session authentication, no content
+    negotiation and no versioning.
+    http://127.0.0.1:8000/api/async/project/"""
+
+    viewset_class = None
+    authentication_class = ClaimsJWTAuthentication
+    renderer_class = FastJSONRenderer
+
+    async def get(self, request, pk=None):
+        action = "list" if pk is None else "retrieve"
+        authenticator = self.authentication_class()
+        renderer = self.renderer_class()
+        drf_request = Request(request, authenticators=[authenticator])
+        drf_request.accepted_renderer = renderer
+        drf_request.accepted_media_type = renderer.media_type
+        viewset = self.viewset_class(
+            request=drf_request,
+            args=(),
+            kwargs={} if pk is None else {"pk": pk},
+            action=action,
+            detail=pk is not None,
+            format_kwarg=None,
+        )
+        # checked by SoftDesk.instrumentation
+        request.query_budget = getattr(viewset, "query_budget", {}).get(action)
+
+        try:
+            await self.authenticate(drf_request, authenticator)
+            # the safe reads of the viewset go to a replica (SoftDesk.db_routers)
+            if isinstance(viewset, ReplicaReadsMixin):
+                await ause_replica(drf_request.user)
+            await self.initial(drf_request)
+            viewset.check_permissions(drf_request)
+            viewset.check_throttles(drf_request)
+            response = await self.get_response(request, viewset, drf_request, pk)
+        except Exception as exc:
+            error = viewset.handle_exception(exc)
+            response = self.render(request, error.data, error.status_code)
+            # WWW-Authenticate, Retry-After...
+            for header, value in error.items():
+                if header.lower() != "content-type":
+                    response[header] = value
+
+        return response
+
+    async def authenticate(self, request, authenticator):
+        result = await authenticator.aauthenticate(request)
+        if result is None:
+            # AnonymousUser, the permissions answer 401 Not Authenticated
+            request._not_authenticated()
+        else:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+
+    async def initial(self, request):
+        """load with the async ORM what the viewset reads in every request"""
+
+    async def get_response(self, request, viewset, drf_request, pk):
+        # validators of the conditional GET (SoftDesk.conditional)
+        validators = None
+        conditional = isinstance(viewset, ConditionalGetMixin)
+        if pk is None:
+            if conditional:
+                queryset = viewset.filter_queryset(viewset.get_queryset())
+                stamps = await queryset.order_by().aaggregate(
+                    **viewset.get_list_aggregates()
+                )
+                validators = viewset.get_list_validators(stamps)
+        else:
+            instance = await self.get_instance(viewset, drf_request, pk)
+            if conditional:
+                validators = viewset.get_detail_validators(instance)
+
+        if validators is not None:
+            etag, timestamp, not_modified = viewset.check_not_modified(
+                drf_request, *validators
+            )
+            if not_modified is not None:
+                viewset.set_validators(not_modified, etag, timestamp)
+                return not_modified
+
+        if pk is None:
+            data = await self.list(viewset, drf_request)
+        else:
+            data = await self.retrieve(viewset, drf_request, instance)
+
+        response = self.render(request, data)
+        if validators is not None:
+            viewset.set_validators(response, etag, timestamp)
+
+        return response
+
+    async def list(self, viewset, request):
+        # response cache of the viewset (SoftDesk.response_cache)
+        key = None
+        if hasattr(viewset, "aget_response_cache_key"):
+            key = await viewset.aget_response_cache_key(request)
+            data = await response_cache.get_cache().aget(key)
+            response_cache.record(hit=data is not None)
+            if data is not None:
+                return data
+
+        data = await self.get_list_data(viewset, request)
+        if key is not None:
+            await response_cache.get_cache().aset(
+                key, data, viewset.response_cache_timeout
+            )
+
+        return data
+
+    async def get_list_data(self, viewset, request):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        paginator = viewset.paginator
+        page = None
+        if paginator is not None:
+            page = await apaginate_queryset(paginator, queryset, request)
+        if page is None:
+            return viewset.get_serializer(await afetch(queryset), many=True).data
+
+        serializer = viewset.get_serializer(page, many=True)
+
+        return paginator.get_paginated_response(serializer.data).data
+
+    async def get_instance(self, viewset, request, pk):
+        """return the object of the detail view, with its change stamps for the
+        conditional GET"""
+
+        if isinstance(viewset, ConditionalGetMixin):
+            queryset = viewset.get_stamped_queryset()
+        else:
+            queryset = viewset.filter_queryset(viewset.get_queryset()).filter(
+                **{viewset.lookup_field: pk}
+            )
+        instance = await queryset.afirst()
+        if instance is None:
+            raise Http404
+        viewset.check_object_permissions(request, instance)
+
+        return instance
+
+    async def retrieve(self, viewset, request, instance):
+        if isinstance(viewset, ConditionalGetMixin):
+            await sync_to_async(viewset.prefetch_detail)(instance)
+
+        return viewset.get_serializer(instance).data
+
+    def render(self, request, data, status=200):
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.view_end = perf_counter()
+
+        renderer = self.renderer_class()
+        response = HttpResponse(
+            renderer.render(data, renderer.media_type),
+            status=status,
+            content_type=renderer.media_type,
+        )
+
+        if metrics is not None:
+            metrics.render_end = perf_counter()
+
+        return response
@@ -0,0 +1,167 @@
+import hashlib
+
+from django.db.models import Count, Max, prefetch_related_objects
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def get_stamp(instance, field):
+    """return the value of the field path, None if a relation is empty (an issue
+    without assigned user)"""
+
+    for name in field.split("__"):
+        if instance is None:
+            return None
+        instance = getattr(instance, name)
+
+    return instance
+
+
+class ConditionalGetMixin:
+    """add the ETag and Last-Modified headers to the list and detail views and
+    answer 304 Not Modified when the client validators match. The validators are
+    computed from the "updated_time" change stamps, without serializing the body."""
+
+    # "updated_time" fields whose changes modify the representation
+    change_stamp_fields = ("updated_time",)
+
+    def get_list_aggregates(self) -> dict:
+        """return the aggregates of the list validators"""
+
+        stamps = {
+            f"stamp_{index}": Max(field)
+            for index, field in enumerate(self.change_stamp_fields)
+        }
+        # the count and the last id detect the deletions and the creations
+        return {"count": Count("pk"), "last_pk": Max("pk"), **stamps}
+
+    def get_list_validators(self, stamps) -> tuple:
+        """return the validators and the last modification of the aggregated
+        stamps"""
+
+        last_modified = max(
+            (
+                value
+                for key, value in stamps.items()
+                if key.startswith("stamp_") and value is not None
+            ),
+            default=None,
+        )
+
+        return (stamps["count"], stamps["last_pk"], last_modified), last_modified
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        stamps = queryset.order_by().aggregate(**self.get_list_aggregates())
+        validators, last_modified = self.get_list_validators(stamps)
+
+        return self.conditional_response(
+            request, validators, last_modified, super().list, *args, **kwargs
+        )
+
+    def get_stamped_queryset(self):
+        """return the queryset of the object of the detail view with its change
+        stamps, without the prefetches of the detail view (see get_object())"""
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # load the change stamps even if the "fields" url argument defers them
+        related_fields = [
+            field.rsplit("__", 1)[0]
+            for field in self.change_stamp_fields
+            if "__" in field
+        ]
+        queryset = self.filter_queryset(self.get_queryset())
+        # the prefetches of the detail view only run for a 200
+        self._retrieve_prefetches = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None).defer(None)
+        if related_fields:
+            queryset = queryset.select_related(*related_fields)
+
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_detail_validators(self, instance) -> tuple:
+        """return the validators and the last modification of the instance"""
+
+        stamps = [get_stamp(instance, field) for field in self.change_stamp_fields]
+        last_modified = max((stamp for stamp in stamps if stamp), default=None)
+
+        return (instance.pk, last_modified), last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_stamped_queryset().first()
+        if instance is None:
+            # let the detail view answer 404
+            return super().retrieve(request, *args, **kwargs)
+
+        self.check_object_permissions(request, instance)
+        self._retrieved_instance = instance
+        validators, last_modified = self.get_detail_validators(instance)
+
+        return self.conditional_response(
+            request, validators, last_modified, super().retrieve, *args, **kwargs
+        )
+
+    def prefetch_detail(self, instance):
+        """run the prefetches of the detail view on the stamped instance"""
+
+        prefetch_related_objects([instance], *self._retrieve_prefetches)
+
+    def get_object(self):
+        """return the instance loaded with the validators by retrieve(), with
+        the prefetches of the detail view : it is not read again"""
+
+        instance = getattr(self, "_retrieved_instance", None)
+        if instance is None:
+            return super().get_object()
+
+        self.prefetch_detail(instance)
+
+        return instance
+
+    def get_etag(self, request, validators):
+        """the representation also depends on the connected user, the url
+        arguments and the renderer"""
+
+        key = "|".join(
+            str(value)
+            for value in (
+                request.user.pk,
+                request.get_full_path(),
+                request.accepted_media_type,
+                *validators,
+            )
+        )
+
+        return f'"{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+
+    def check_not_modified(self, request, validators, last_modified) -> tuple:
+        """return the ETag and the Last-Modified timestamp of the validators, and
+        the 304 response if they match the client copy (None otherwise)"""
+
+        etag = self.get_etag(request, validators)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+
+        return etag, timestamp, response
+
+    def set_validators(self, response, etag, timestamp):
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+            # the clients must revalidate their copy
+            patch_cache_control(response, private=True, no_cache=True)
+
+    def conditional_response(
+        self, request, validators, last_modified, view, *args, **kwargs
+    ):
+        etag, timestamp, response = self.check_not_modified(
+            request, validators, last_modified
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+        self.set_validators(response, etag, timestamp)
+
+        return response
@@ -0,0 +1,175 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = "db_pin:{}"
+
+# routing of the current request, set by ReplicaRoutingMiddleware
+_state = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self):
+        # alias of the replica read by the request, None for the primary
+        self.replica = None
+        self.used_replica = False
+        self.wrote = False
+        # users written by the request (signup, login), pinned with its user
+        self.users = []
+
+
+def get_replicas() -> list:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def is_pinned(user_id) -> bool:
+    return cache.get(PIN_KEY.format(user_id)) is not None
+
+
+def pin(*user_ids):
+    """send the reads of the users to the primary during REPLICA_PIN_SECONDS,
+    longer than the replication lag : they read their own writes"""
+
+    timeout = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+    cache.set_many({PIN_KEY.format(user_id): 1 for user_id in user_ids}, timeout)
+
+
+def use_replica(user):
+    """read from a replica until the end of the request, unless the user is
+    pinned to the primary"""
+
+    state = _state.get()
+    replicas = get_replicas()
+    if state is None or not replicas or state.wrote:
+        return
+
+    if user.pk is not None and is_pinned(user.pk):
+        return
+
+    state.replica = random.choice(replicas)
+
+
+async def ause_replica(user):
+    """async variant of use_replica(), for SoftDesk.async_views"""
+
+    state = _state.get()
+    replicas = get_replicas()
+    if state is None or not replicas or state.wrote:
+        return
+
+    if user.pk is not None and await cache.aget(PIN_KEY.format(user.pk)) is not None:
+        return
+
+    state.replica = random.choice(replicas)
+
+
+def read_from_replica() -> bool:
+    """return True if the current request has read from a replica : its
+    response may be older than the primary"""
+
+    state = _state.get()
+
+    return state is not None and state.used_replica
+
+
+class ReplicaRouter:
+    """send the reads of the views using ReplicaReadsMixin to the replicas of
+    the DATABASE_REPLICAS setting, everything else to the primary ("default"),
+    the reads in a transaction and after a write of the request included"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        state.used_replica = True
+
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            instance = hints.get("instance")
+            if isinstance(instance, get_user_model()):
+                state.users.append(instance)
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replicas are copies of the primary
+        if db in get_replicas():
+            return False
+
+        return None
+
+
+class ReplicaReadsMixin:
+    """the safe requests of the viewset read from a replica, once the user is
+    authenticated (the JWT authentication reads the primary)"""
+
+    def perform_authentication(self, request):
+        super().perform_authentication(request)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user)
+
+
+class ReplicaRoutingMiddleware:
+    """track the writes of each request for ReplicaRouter, and pin the users who
+    wrote to the primary"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _state.set(RoutingState())
+        try:
+            return self.get_response(request)
+        finally:
+            self.pin_writers(request, _state.get())
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(RoutingState())
+        try:
+            return await self.get_response(request)
+        finally:
+            state = _state.get()
+            if state.wrote:
+                await sync_to_async(self.pin_writers)(request, state)
+            _state.reset(token)
+
+    def pin_writers(self, request, state):
+        if not state.wrote or not get_replicas():
+            return
+
+        user_ids = {user.pk for user in state.users if user.pk is not None}
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            user_ids.add(user.pk)
+        if user_ids:
+            pin(*user_ids)
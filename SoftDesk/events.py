@@ -0,0 +1,158 @@
+import asyncio
+from collections import defaultdict
+from functools import partial
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from SoftDesk.renderers import dumps
+
+_broker = None
+_broker_lock = Lock()
+
+# last message of a subscription dropped by the broker, see Subscription
+OVERFLOW = object()
+
+
+class Subscription:
+    """bounded queue of the events of some topics, read by one event loop. A
+    consumer slower than the publishers is not waited for : when its queue is
+    full, the queued events are dropped and OVERFLOW is its last message"""
+
+    def __init__(self, broker, topics, maxsize):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """called by the broker, from any thread"""
+
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:
+            # the event loop is closed
+            self.broker.unsubscribe(self)
+
+    def put(self, event):
+        if self.overflowed:
+            return
+
+        if self.queue.full():
+            self.overflowed = True
+            self.broker.unsubscribe(self)
+            self.broker.record("overflows")
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = OVERFLOW
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """publish/subscribe between the threads of this process : the events
+    published by the views (any thread) are delivered to the subscriptions of
+    the event loop of the ASGI server. With several worker processes, the
+    EVENTS_BROKER setting names a broker class relaying the events between the
+    processes (Redis pub/sub, PostgreSQL LISTEN/NOTIFY...) with the same
+    methods"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.subscriptions = defaultdict(set)
+        self.metrics = {"published": 0, "delivered": 0, "overflows": 0}
+
+    def subscribe(self, topics, maxsize) -> Subscription:
+        """return a subscription to the topics, in an event loop"""
+
+        subscription = Subscription(self, topics, maxsize)
+        with self.lock:
+            for topic in subscription.topics:
+                self.subscriptions[topic].add(subscription)
+
+        return subscription
+
+    def set_topics(self, subscription, topics):
+        topics = frozenset(topics)
+        with self.lock:
+            self.remove(subscription)
+            if not subscription.overflowed:
+                subscription.topics = topics
+                for topic in topics:
+                    self.subscriptions[topic].add(subscription)
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.remove(subscription)
+
+    def remove(self, subscription):
+        for topic in subscription.topics:
+            subscriptions = self.subscriptions.get(topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[topic]
+
+    def publish(self, topics, event):
+        """deliver the event once to each subscription of the topics, without
+        waiting for the consumers"""
+
+        with self.lock:
+            subscriptions = set()
+            for topic in topics:
+                subscriptions.update(self.subscriptions.get(topic, ()))
+            self.metrics["published"] += 1
+            self.metrics["delivered"] += len(subscriptions)
+
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def record(self, name):
+        with self.lock:
+            self.metrics[name] += 1
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            return {
+                **self.metrics,
+                "subscriptions": len(set().union(*self.subscriptions.values())),
+            }
+
+
+def get_broker():
+    """return the broker of this process, an instance of the EVENTS_BROKER
+    setting (InProcessBroker by default)"""
+
+    global _broker
+
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, "EVENTS_BROKER", "SoftDesk.events.InProcessBroker")
+            _broker = import_string(path)()
+
+        return _broker
+
+
+def publish(topics, event):
+    """publish the event once the current transaction is committed, a rolled
+    back change is not pushed"""
+
+    transaction.on_commit(partial(get_broker().publish, list(topics), event))
+
+
+def format_event(event, name=None, event_id=None) -> str:
+    """return the Server-Sent Events message of the event"""
+
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if name is not None:
+        lines.append(f"event: {name}")
+    lines.append(f"data: {dumps(event).decode()}")
+
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,85 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsetSerializerMixin:
+    """keep only the serializer fields listed in the "fields" argument, the other
+    fields (and their SerializerMethodField) are not computed"""
+
+    # model fields read by the serializer fields which are not model fields
+    source_fields = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_only_fields(cls, fields) -> set:
+        """return the model fields to load to display the serializer fields"""
+
+        opts = cls.Meta.model._meta
+        concrete_fields = {field.name for field in opts.concrete_fields}
+        only_fields = {opts.pk.name}
+        for field_name in fields:
+            sources = cls.source_fields.get(field_name, (field_name,))
+            only_fields.update(
+                source for source in sources if source in concrete_fields
+            )
+
+        return only_fields
+
+    @classmethod
+    def restrict_queryset(cls, queryset, fields=None):
+        """load only the columns of the displayed fields"""
+
+        if fields is None:
+            return queryset
+
+        return queryset.only(*cls.get_only_fields(fields))
+
+
+class SparseFieldsetMixin:
+    """display only the fields listed in the "fields" url argument in the read
+    views : the serializer and the queryset columns are restricted to them
+    http://127.0.0.1:8000/api/issue/?fields=id,name,status"""
+
+    fields_query_param = "fields"
+
+    def get_sparse_fields(self):
+        """return the requested fields, None to display all of them"""
+
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = None
+            value = self.request.query_params.get(self.fields_query_param)
+
+            if value and self.request.method in SAFE_METHODS:
+                fields = [field.strip() for field in value.split(",") if field.strip()]
+                serializer = self.get_serializer_class()(
+                    context=self.get_serializer_context()
+                )
+                unknown_fields = [
+                    field
+                    for field in fields
+                    if field not in serializer.fields
+                    or serializer.fields[field].write_only
+                ]
+                if unknown_fields:
+                    raise ValidationError(
+                        {
+                            self.fields_query_param: "Champs inconnus : "
+                            f"{', '.join(unknown_fields)}."
+                        }
+                    )
+                self._sparse_fields = fields
+
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+
+        return super().get_serializer(*args, **kwargs)
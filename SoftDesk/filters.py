@@ -0,0 +1,57 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import BooleanField
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# url arguments filtering the creation and modification dates (YYYY-MM-DD)
+DATE_FILTER_FIELDS = {
+    "created_after": "created_time__date__gte",
+    "created_before": "created_time__date__lte",
+    "updated_after": "updated_time__date__gte",
+    "updated_before": "updated_time__date__lte",
+}
+
+
+def get_lookup_field(model, lookup):
+    """return the model field filtered by the queryset lookup (the relations are
+    followed), None if the lookup does not start with a field"""
+
+    field = None
+    for name in lookup.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+        # the next names are the transforms and the lookup of the field
+        if not field.is_relation:
+            break
+        model = field.related_model
+
+    return field
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """filter the queryset with the url arguments declared in the filter_fields of
+    the view, {"url argument": "queryset lookup"}. The "__in" lookups accept a
+    comma separated list of values
+    http://127.0.0.1:8000/api/issue/?status=To Do,In Progress&priority=High"""
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, "filter_fields", {}).items():
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            if value in ("true", "false") and isinstance(
+                get_lookup_field(queryset.model, lookup), BooleanField
+            ):
+                value = value.capitalize()
+            if lookup.endswith("__in"):
+                value = [item.strip() for item in value.split(",") if item.strip()]
+
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, DjangoValidationError):
+                raise ValidationError({param: f"Valeur invalide : {value}."})
+
+        return queryset
@@ -0,0 +1,423 @@
+import logging
+from collections import defaultdict
+from contextvars import ContextVar
+from hmac import compare_digest
+from threading import Lock
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from SoftDesk import events, response_cache
+from authentication import hashing
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (seconds) of the request duration histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_endpoints = defaultdict(
+    lambda: {
+        "requests": defaultdict(int),
+        "buckets": [0] * len(LATENCY_BUCKETS),
+        "duration": 0.0,
+        "db": 0.0,
+        "view": 0.0,
+        "render": 0.0,
+        "queries": 0,
+        "bytes": 0,
+        "over_budget": 0,
+    }
+)
+_endpoints_lock = Lock()
+
+# measures of the current request, copied in the threads running its queries
+# with sync_to_async()
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def is_strict() -> bool:
+    """the budgets fail the requests when the QUERY_BUDGET_STRICT setting is
+    set (the tests override it), they are logged otherwise"""
+
+    return getattr(settings, "QUERY_BUDGET_STRICT", False)
+
+
+class RequestMetrics:
+    """SQL queries and timings of one request"""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - start
+            self.queries += 1
+
+    def end_view(self, response):
+        self.view_end = perf_counter()
+        response.add_post_render_callback(self.end_render)
+
+    def end_render(self, response):
+        self.render_end = perf_counter()
+
+    def get_timings(self, end) -> dict:
+        """return the durations (seconds) : db, view (the python time of the
+        view without the SQL queries, mostly the serializers), render and
+        total"""
+
+        view_start = self.view_start or self.start
+        view_end = self.view_end or end
+        render = (self.render_end - view_end) if self.render_end else 0.0
+
+        return {
+            "db": self.db,
+            "view": max(view_end - view_start - self.db, 0.0),
+            "render": render,
+            "total": end - self.start,
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_wrapper(connection, **kwargs):
+    """count the queries of the connection, in every thread. Inserted first :
+    connection.execute_wrapper() removes the last wrapper of the list"""
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# the connections of the threads of the async views are opened after the
+# middleware is created
+connection_created.connect(install_wrapper)
+
+
+def get_query_budget(view_func, method):
+    """return the query_budget of the viewset action, None if not declared"""
+
+    view_class = getattr(view_func, "cls", None)
+    budgets = getattr(view_class, "query_budget", None)
+    if not budgets:
+        return None
+
+    # the viewset actions are mapped on the methods by the router
+    actions = getattr(view_func, "actions", None) or {}
+
+    return budgets.get(actions.get(method.lower(), method.lower()))
+
+
+class InstrumentationMiddleware:
+    """count the SQL queries and time each request, the measures are sent in
+    the Server-Timing header, aggregated by endpoint for the metrics view, and
+    checked against the query_budget of the viewsets
+    ({"list": 6, "retrieve": 5}). Must be the first middleware, sync and async
+    (ASGI) requests."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        for connection in connections.all():
+            install_wrapper(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = request.metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        return self.process_metrics(request, response)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        return self.process_metrics(request, response)
+
+    def process_metrics(self, request, response):
+        metrics = request.metrics
+        # the streamed responses (exports, event streams) are consumed after the
+        # middleware : their queries are not counted and their size is 0 in
+        # response_bytes_total
+        timings = metrics.get_timings(perf_counter())
+        size = 0 if response.streaming else len(response.content)
+        view_name = getattr(request.resolver_match, "view_name", None) or "unknown"
+
+        over_budget = None
+        budget = getattr(request, "query_budget", None)
+        if budget is not None and metrics.queries > budget:
+            over_budget = (
+                f"{request.method} {request.path} : {metrics.queries} queries, "
+                f"budget of {view_name} : {budget}"
+            )
+
+        record(
+            view_name,
+            request.method,
+            response.status_code,
+            metrics.queries,
+            timings,
+            size,
+            over_budget is not None,
+        )
+
+        if getattr(settings, "SERVER_TIMING", True):
+            response["Server-Timing"] = ", ".join(
+                [f'db;dur={timings["db"] * 1000:.2f};desc="{metrics.queries} queries"']
+                + [
+                    f"{name};dur={timings[name] * 1000:.2f}"
+                    for name in ("view", "render", "total")
+                ]
+            )
+
+        if over_budget:
+            if is_strict():
+                raise QueryBudgetExceeded(over_budget)
+            logger.warning("Query budget exceeded, %s", over_budget)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view_start = perf_counter()
+        request.query_budget = get_query_budget(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # the DRF responses are rendered after the template response hooks
+        request.metrics.end_view(response)
+
+        return response
+
+
+def record(view_name, method, status, queries, timings, size, over_budget):
+    with _endpoints_lock:
+        endpoint = _endpoints[(view_name, method)]
+        endpoint["requests"][status] += 1
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if timings["total"] <= bound:
+                endpoint["buckets"][index] += 1
+        endpoint["duration"] += timings["total"]
+        endpoint["db"] += timings["db"]
+        endpoint["view"] += timings["view"]
+        endpoint["render"] += timings["render"]
+        endpoint["queries"] += queries
+        endpoint["bytes"] += size
+        endpoint["over_budget"] += over_budget
+
+
+def get_metrics() -> dict:
+    """return the measures aggregated by (view name, method) by this process"""
+
+    with _endpoints_lock:
+        return {
+            key: dict(
+                endpoint,
+                requests=dict(endpoint["requests"]),
+                buckets=list(endpoint["buckets"]),
+            )
+            for key, endpoint in _endpoints.items()
+        }
+
+
+def reset_metrics():
+    with _endpoints_lock:
+        _endpoints.clear()
+
+
+def format_labels(labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def format_prometheus() -> str:
+    """return the metrics in the Prometheus text format"""
+
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP softdesk_{name} {help_text}")
+        lines.append(f"# TYPE softdesk_{name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"softdesk_{name}{suffix}{{{format_labels(labels)}}} {value}")
+
+    endpoints = sorted(get_metrics().items())
+    labels = {key: {"view": key[0], "method": key[1]} for key, _ in endpoints}
+
+    metric(
+        "requests_total",
+        "counter",
+        "Requests by endpoint and status code.",
+        [
+            ("", dict(labels[key], status=status), count)
+            for key, endpoint in endpoints
+            for status, count in sorted(endpoint["requests"].items())
+        ],
+    )
+
+    samples = []
+    for key, endpoint in endpoints:
+        count = sum(endpoint["requests"].values())
+        for bound, bucket in zip(LATENCY_BUCKETS, endpoint["buckets"]):
+            samples.append(("_bucket", dict(labels[key], le=bound), bucket))
+        samples.append(("_bucket", dict(labels[key], le="+Inf"), count))
+        samples.append(("_sum", labels[key], f"{endpoint['duration']:.6f}"))
+        samples.append(("_count", labels[key], count))
+    metric(
+        "request_duration_seconds",
+        "histogram",
+        "Request duration by endpoint.",
+        samples,
+    )
+
+    for name, field, help_text in (
+        ("db_duration_seconds_total", "db", "Time spent in the SQL queries."),
+        (
+            "view_duration_seconds_total",
+            "view",
+            "Python time of the views without the SQL queries (serializers).",
+        ),
+        ("render_duration_seconds_total", "render", "Time spent in the renderers."),
+    ):
+        metric(
+            name,
+            "counter",
+            help_text,
+            [
+                ("", labels[key], f"{endpoint[field]:.6f}")
+                for key, endpoint in endpoints
+            ],
+        )
+
+    for name, field, help_text in (
+        ("db_queries_total", "queries", "SQL queries."),
+        (
+            "response_bytes_total",
+            "bytes",
+            "Size of the responses, 0 for the streamed ones (exports, events).",
+        ),
+        ("query_budget_exceeded_total", "over_budget", "Requests over budget."),
+    ):
+        metric(
+            name,
+            "counter",
+            help_text,
+            [("", labels[key], endpoint[field]) for key, endpoint in endpoints],
+        )
+
+    cache_metrics = response_cache.get_metrics()
+    metric(
+        "response_cache_requests_total",
+        "counter",
+        "Lookups in the list responses cache.",
+        [
+            ("", {"result": "hit"}, cache_metrics["hits"]),
+            ("", {"result": "miss"}, cache_metrics["misses"]),
+        ],
+    )
+
+    hashing_metrics = sorted(hashing.get_metrics().items())
+    for name, field, help_text in (
+        ("password_hashes_total", "count", "Password hashes and verifications."),
+        ("password_hashes_rejected_total", "rejected", "Hashes rejected (busy)."),
+        ("password_hashing_seconds_total", "seconds", "Time spent hashing."),
+        (
+            "password_hashing_wait_seconds_total",
+            "wait_seconds",
+            "Time spent waiting for the hashing pool.",
+        ),
+    ):
+        metric(
+            name,
+            "counter",
+            help_text,
+            [
+                ("", {"operation": operation}, metrics[field])
+                for operation, metrics in hashing_metrics
+            ],
+        )
+
+    event_metrics = events.get_broker().get_metrics()
+    metric(
+        "event_subscriptions",
+        "gauge",
+        "Open event streams.",
+        [("", {}, event_metrics["subscriptions"])],
+    )
+    for name, field, help_text in (
+        ("events_published_total", "published", "Events published."),
+        ("events_delivered_total", "delivered", "Events sent to the streams."),
+        ("event_overflows_total", "overflows", "Streams closed, client too slow."),
+    ):
+        metric(name, "counter", help_text, [("", {}, event_metrics[field])])
+
+    return "\n".join(lines) + "\n"
+
+
+def is_staff_request(request) -> bool:
+    """return True if the DRF authentication classes (JWT, session) authenticate
+    a staff user"""
+
+    drf_request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        return drf_request.user.is_staff
+    except APIException:
+        # invalid or expired token
+        return False
+
+
+def metrics_view(request):
+    """metrics of this process in the Prometheus text format, for the staff
+    users (JWT or session) and the requests sending the METRICS_TOKEN setting
+    ("Authorization: Bearer <token>")"""
+
+    token = getattr(settings, "METRICS_TOKEN", None)
+    header = request.headers.get("Authorization", "")
+    has_token = bool(token) and compare_digest(header, f"Bearer {token}")
+    if not has_token and not is_staff_request(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        format_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
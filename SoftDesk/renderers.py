@@ -0,0 +1,83 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    # optional C-backed encoder, the json module is used if not installed
+    import orjson
+except ImportError:
+    orjson = None
+
+# the DRF encoder handles the types not supported by orjson (Decimal, lazy
+# strings, querysets...) and formats the datetimes like the DRF renderer
+encoder = encoders.JSONEncoder()
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else None
+)
+
+
+def dumps(data) -> bytes:
+    """return the compact UTF-8 JSON of the data, as JSONRenderer would render
+    it with the default settings"""
+
+    if orjson is not None:
+        return orjson.dumps(data, default=encoder.default, option=ORJSON_OPTIONS)
+
+    return json.dumps(
+        data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """render the compact JSON with orjson if installed (3 to 4 times faster
+    than the json module on the API lists), with the same output as
+    JSONRenderer. The indented JSON (browsable API, "; indent=4" media type)
+    and the non default UNICODE_JSON/COMPACT_JSON settings use JSONRenderer.
+    Except for NaN and Infinity : orjson renders them as null where
+    JSONRenderer raises a ValueError (STRICT_JSON), no field of the API stores
+    them"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        check_list = [
+            orjson is not None,
+            data is not None,
+            indent is None,
+            not self.ensure_ascii,
+            self.compact,
+        ]
+        if not all(check_list):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # same escaping as JSONRenderer : the JSON is a strict javascript subset
+        return (
+            dumps(data)
+            .replace(b"\xe2\x80\xa8", b"\\u2028")
+            .replace(b"\xe2\x80\xa9", b"\\u2029")
+        )
+
+
+class FastJSONParser(JSONParser):
+    """parse the JSON with orjson if installed, NaN and Infinity are always
+    rejected"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,139 @@
+from hashlib import md5
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from SoftDesk.db_routers import read_from_replica
+
+# settings.CACHES alias, any Django cache backend can be used (local memory,
+# file, redis, memcached, or the dummy backend to disable the cache)
+CACHE_ALIAS = "responses"
+VERSION_KEY = "version:{}"
+
+_metrics = {"hits": 0, "misses": 0}
+_metrics_lock = Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_versions(*scopes) -> list:
+    """return the current version of each scope (e.g. "project:1", "users")"""
+
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+
+    # a missing version gets a new value, so an evicted version never matches
+    # the responses cached before its eviction
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(*scopes) -> list:
+    """async variant of get_versions()"""
+
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """invalidate the responses cached with these scopes after the commit : a
+    request reading the rows before would cache them again with the new
+    versions"""
+
+    if scopes:
+        versions = {VERSION_KEY.format(scope): uuid4().hex for scope in scopes}
+        transaction.on_commit(lambda: get_cache().set_many(versions, timeout=None))
+
+
+def record(hit: bool):
+    with _metrics_lock:
+        _metrics["hits" if hit else "misses"] += 1
+
+
+def get_metrics() -> dict:
+    """return the hits and misses counted by this process"""
+
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+class ResponseCacheMixin:
+    """cache the list view responses, keyed on the url and the versions of the
+    scopes returned by get_response_cache_scopes(). The model signals bump the
+    versions, so the cached responses are never invalidated one by one."""
+
+    response_cache_timeout = 60 * 5
+
+    def get_response_cache_scopes(self, request) -> list:
+        """return the scopes whose changes modify the list"""
+
+        raise NotImplementedError
+
+    def get_response_cache_key(self, request):
+        # the browsable API displays forms depending on the connected user
+        if request.accepted_renderer.format != "json":
+            return None
+
+        scopes = self.get_response_cache_scopes(request)
+
+        return self.build_response_cache_key(request, scopes, get_versions(*scopes))
+
+    async def aget_response_cache_key(self, request):
+        """async variant of get_response_cache_key(), for SoftDesk.async_views"""
+
+        if request.accepted_renderer.format != "json":
+            return None
+
+        scopes = self.get_response_cache_scopes(request)
+        versions = await aget_versions(*scopes)
+
+        return self.build_response_cache_key(request, scopes, versions)
+
+    def build_response_cache_key(self, request, scopes, versions):
+        key = repr(
+            (
+                self.basename,
+                request.build_absolute_uri(request.path),
+                sorted(request.query_params.lists()),
+                scopes,
+                versions,
+            )
+        )
+
+        return f"response:{md5(key.encode(), usedforsecurity=False).hexdigest()}"
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        data = get_cache().get(key)
+        record(hit=data is not None)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = super().list(request, *args, **kwargs)
+        # a replica may lag behind the versions : its responses are not shared
+        if response.status_code == 200 and not read_from_replica():
+            get_cache().set(key, response.data, self.response_cache_timeout)
+        response["X-Cache"] = "MISS"
+
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first middleware : counts the queries and times the whole request
+    "SoftDesk.instrumentation.InstrumentationMiddleware",
+    # tracks the writes of the requests for the database router
+    "SoftDesk.db_routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -78,11 +83,71 @@ WSGI_APPLICATION = "SoftDesk.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# the SQLite backend of SoftDesk.sqlite_backend applies SQLITE_PRAGMAS to each
+# connection : WAL journal (the readers do not block the writer), fsync at the
+# checkpoints only (synchronous=normal, a power loss may lose the last
+# transactions but does not corrupt the database), busy_timeout (milliseconds
+# waited for the write lock), page cache (negative : KiB) and memory-mapped
+# reads (bytes) per connection. The transactions start with BEGIN IMMEDIATE.
+# CONN_MAX_AGE : seconds a connection is reused, its pragmas are set once.
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "memory",
+}
+SQLITE_OPTIONS = {"pragmas": SQLITE_PRAGMAS, "transaction_mode": "IMMEDIATE"}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "SoftDesk.sqlite_backend",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
+        "CONN_MAX_AGE": int(os.environ.get("CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Read replicas (SoftDesk.db_routers) : the safe requests of the viewsets read
+# from one of the DATABASE_REPLICAS, except for the users who wrote during the
+# last REPLICA_PIN_SECONDS (longer than the replication lag) and in the
+# transactions. Locally, DATABASE_REPLICA names a copy of db.sqlite3 kept up
+# to date by "python manage.py replicate_sqlite".
+
+if os.environ.get("DATABASE_REPLICA"):
+    DATABASES["replica"] = {
+        "ENGINE": "SoftDesk.sqlite_backend",
+        "NAME": os.environ["DATABASE_REPLICA"],
+        "OPTIONS": SQLITE_OPTIONS,
+        "CONN_MAX_AGE": DATABASES["default"]["CONN_MAX_AGE"],
+        # the tests read the test database
+        "TEST": {"MIRROR": "default"},
     }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["SoftDesk.db_routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# "default" is used by the project membership cache (project.membership) and
+# the JWT stamps and revoked tokens (authentication.tokens), "responses" by the
+# list responses cache (SoftDesk.response_cache). The
+# local-memory backend is per process : use a shared backend (redis, memcached,
+# file) when running several server processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
 
 
@@ -104,6 +169,40 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+# the PBKDF2 hashes are computed by a pool of worker processes
+# (authentication.hashing) so the signup, login and password change bursts use
+# at most PASSWORD_HASHING_WORKERS cores, 0 to hash in the request thread. The
+# requests wait for one of the PASSWORD_HASHING_MAX_PENDING slots of the pool
+# during PASSWORD_HASHING_TIMEOUT seconds, then get a 503 response.
+# PASSWORD_HASH_ITERATIONS (Django default if not set) can be lowered in the
+# development environments, the hashes are updated at the next login.
+
+PASSWORD_HASHERS = [
+    "authentication.hashers.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_ITERATIONS = os.environ.get("PASSWORD_HASH_ITERATIONS")
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_PENDING = 16
+PASSWORD_HASHING_TIMEOUT = 10
+
+# Server-Sent Events of the changes (/api/events/, see SoftDesk.events). The
+# default broker only relays the events within one process : with several
+# worker processes, EVENTS_BROKER names a broker shared by the processes. A
+# stream is closed when EVENTS_QUEUE_SIZE events wait for its client, and after
+# EVENTS_STREAM_DURATION seconds (the clients reconnect). EVENTS_HEARTBEAT :
+# seconds between two keep-alive comments.
+
+EVENTS_BROKER = "SoftDesk.events.InProcessBroker"
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT = 15
+EVENTS_STREAM_DURATION = 300
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -147,13 +246,43 @@ MEDIA_URL = "/media/"
 # images path
 MEDIA_ROOT = BASE_DIR / "media/"
 
+# the profile image thumbnails are generated by a pool of background workers
+# (authentication.images), set to False to generate them in the request thread.
+# The replaced uploaded images are deleted by the prune_profile_images command
+IMAGE_PROCESSING_ASYNC = True
+IMAGE_PROCESSING_WORKERS = 2
+
+# request measures (SoftDesk.instrumentation) : Server-Timing header sent with
+# the responses, token of the Prometheus scraper reading /api/metrics/ (the
+# staff users can read it without token). The requests over the query_budget of
+# the viewsets are logged, they fail if QUERY_BUDGET_STRICT is set (the tests)
+SERVER_TIMING = True
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+QUERY_BUDGET_STRICT = False
+
 # Django Rest Framework pagination
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
+    # url filters declared in the "filter_fields" and "ordering_fields" of the views
+    "DEFAULT_FILTER_BACKENDS": (
+        "SoftDesk.filters.FieldFilterBackend",
+        "rest_framework.filters.OrderingFilter",
+    ),
+    # orjson is used if installed, see SoftDesk.renderers
+    "DEFAULT_RENDERER_CLASSES": (
+        "SoftDesk.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "SoftDesk.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        # to use the JWT authentication class
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # to use the JWT authentication class, the user is built from the token
+        # claims without loading its row (authentication.tokens)
+        "authentication.tokens.ClaimsJWTAuthentication",
         # to use authentication class in viewset
         "rest_framework.authentication.SessionAuthentication",
     ),
@@ -165,4 +294,7 @@ SIMPLE_JWT = {
     # "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    # copy the user claims read by the API in the tokens
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "authentication.tokens.ClaimsTokenRefreshSerializer",
 }
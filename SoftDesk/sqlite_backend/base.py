@@ -0,0 +1,48 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# options of this backend, not passed to sqlite3.connect()
+BACKEND_OPTIONS = ("pragmas", "transaction_mode")
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend applying the PRAGMA statements of OPTIONS["pragmas"] to
+    each new connection (WAL journal, cache size...) and starting the
+    transactions with "BEGIN <OPTIONS["transaction_mode"]>". With IMMEDIATE, a
+    transaction takes the write lock at its start and waits for it during
+    busy_timeout : a transaction reading then writing does not fail with
+    "database is locked" when another one has written in the meantime"""
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in BACKEND_OPTIONS:
+            params.pop(option, None)
+
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.get_pragmas().items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        return conn
+
+    def get_pragmas(self) -> dict:
+        pragmas = self.settings_dict["OPTIONS"].get("pragmas", {})
+        for name, value in pragmas.items():
+            if not re.fullmatch(r"\w+", name) or not re.fullmatch(r"-?\w+", str(value)):
+                raise ImproperlyConfigured(f"Invalid SQLite pragma: {name}={value}")
+
+        return pragmas
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f"Invalid SQLite transaction mode: {mode}")
+        self.cursor().execute(f"BEGIN {mode.upper()}")
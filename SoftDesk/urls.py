@@ -24,6 +24,9 @@ from django.conf.urls.static import static
 # vue permettant generic JWT permettant d'obtenir et de rafraîchir un token
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from SoftDesk.instrumentation import metrics_view
+from authentication.views import TokenRevokeView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     # inutile ?
@@ -32,6 +35,10 @@ urlpatterns = [
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     # url to refresh a token
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # url to revoke the tokens (log out)
+    path("api/token/revoke/", TokenRevokeView.as_view(), name="token_revoke"),
+    # requests measures in the Prometheus text format
+    path("api/metrics/", metrics_view, name="metrics"),
     path("", include("authentication.urls")),
     path("", include("project.urls")),
 ]
@@ -0,0 +1,8 @@
+from SoftDesk.async_views import AsyncReadOnlyView
+from authentication.views import UserViewset
+
+
+class AsyncUserView(AsyncReadOnlyView):
+    """http://127.0.0.1:8000/api/async/user/"""
+
+    viewset_class = UserViewset
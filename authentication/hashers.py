@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+
+from authentication.hashing import hash_password
+
+
+class PooledPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 SHA256 hashes computed by the worker processes of
+    authentication.hashing, with PASSWORD_HASH_ITERATIONS iterations (Django
+    default if not set). The hashes using another number of iterations are
+    updated by the next login (check_password)"""
+
+    @property
+    def iterations(self):
+        iterations = getattr(settings, "PASSWORD_HASH_ITERATIONS", None)
+
+        return int(iterations or hashers.PBKDF2PasswordHasher.iterations)
+
+    def encode(self, password, salt, iterations=None, operation="hash"):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = hash_password(operation, password, salt, iterations, self.digest().name)
+
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded["salt"], decoded["iterations"], operation="verify"
+        )
+
+        return constant_time_compare(encoded, encoded_2)
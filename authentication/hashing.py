@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_pool = None
+_pool_pid = None
+_slots = None
+_pool_lock = Lock()
+
+_metrics = {}
+_metrics_lock = Lock()
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Trop de demandes d'authentification, réessayez plus tard."
+    default_code = "hashing_busy"
+
+
+def pbkdf2(password: str, salt: str, iterations: int, digest: str) -> str:
+    """return the base64 PBKDF2 hash, computed in the worker processes"""
+
+    hash = hashlib.pbkdf2_hmac(digest, password.encode(), salt.encode(), iterations)
+
+    return base64.b64encode(hash).decode("ascii").strip()
+
+
+def get_pool():
+    """return the process pool of this process, None to hash in the request
+    thread (PASSWORD_HASHING_WORKERS = 0)"""
+
+    global _pool, _pool_pid, _slots
+
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+    if not workers:
+        return None
+
+    with _pool_lock:
+        # a pool created before the fork of the server workers is not usable
+        if _pool is None or _pool_pid != os.getpid():
+            # spawned workers : forking a server process copies its threads
+            # and database connections
+            _pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+            _pool_pid = os.getpid()
+            _slots = BoundedSemaphore(
+                getattr(settings, "PASSWORD_HASHING_MAX_PENDING", workers * 8)
+            )
+
+        return _pool
+
+
+def reset_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def hash_password(operation, password, salt, iterations, digest) -> str:
+    """return the PBKDF2 hash computed by the pool. The requests wait for a slot
+    (PASSWORD_HASHING_MAX_PENDING hashes at most) during
+    PASSWORD_HASHING_TIMEOUT seconds, then HashingBusy is raised"""
+
+    start = perf_counter()
+    pool = get_pool()
+    if pool is None:
+        result = pbkdf2(password, salt, iterations, digest)
+        record(operation, 0.0, perf_counter() - start)
+        return result
+
+    slots = _slots
+    if not slots.acquire(timeout=getattr(settings, "PASSWORD_HASHING_TIMEOUT", 10)):
+        record(operation, perf_counter() - start, None)
+        raise HashingBusy()
+
+    wait = perf_counter() - start
+    try:
+        result = pool.submit(pbkdf2, password, salt, iterations, digest).result()
+    except BrokenProcessPool:
+        # a killed worker breaks the pool, it is created again by the next hash
+        reset_pool()
+        result = pbkdf2(password, salt, iterations, digest)
+    finally:
+        slots.release()
+
+    record(operation, wait, perf_counter() - start)
+
+    return result
+
+
+def record(operation, wait, duration):
+    """count a hash, duration is None if it has been rejected"""
+
+    with _metrics_lock:
+        metrics = _metrics.setdefault(
+            operation,
+            {"count": 0, "rejected": 0, "seconds": 0.0, "wait_seconds": 0.0},
+        )
+        metrics["wait_seconds"] += wait
+        if duration is None:
+            metrics["rejected"] += 1
+        else:
+            metrics["count"] += 1
+            metrics["seconds"] += duration
+
+
+def get_metrics() -> dict:
+    """return the hashes ("hash", "verify") counted by this process, with their
+    total duration and time waiting for a slot of the pool"""
+
+    with _metrics_lock:
+        return {operation: dict(metrics) for operation, metrics in _metrics.items()}
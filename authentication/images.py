@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+
+from PIL import Image
+
+from SoftDesk.response_cache import bump_versions
+
+THUMBNAIL_DIR = "thumbnails"
+# "quality" used to save the JPEG thumbnails
+JPEG_QUALITY = 85
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """return the worker pool, its queue stands in for a message broker"""
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_PROCESSING_WORKERS", 2),
+            thread_name_prefix="image-processing",
+        )
+
+    return _executor
+
+
+def schedule_thumbnails(user_id, name):
+    """generate the thumbnails of the profile image in the background and return
+    the future of the job, or in the current thread (None returned) if
+    settings.IMAGE_PROCESSING_ASYNC is False"""
+
+    if getattr(settings, "IMAGE_PROCESSING_ASYNC", True):
+        future = get_executor().submit(process_profile_image, user_id, name)
+        future.add_done_callback(lambda future: log_failure(future, user_id, name))
+        return future
+
+    process_profile_image(user_id, name)
+
+
+def log_failure(future, user_id, name):
+    """the exceptions of the workers are only kept by their future"""
+
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(
+            "Profile image processing failed, user %s, image %s",
+            user_id,
+            name,
+            exc_info=future.exception(),
+        )
+
+
+def thumbnail_name(digest: str, width: int, extension: str) -> str:
+    """the name depends on the image content, so the file can be cached forever"""
+
+    return f"{THUMBNAIL_DIR}/{digest}_{width}.{extension}"
+
+
+def generate_thumbnails(name: str, widths) -> dict:
+    """decode the image once and save one thumbnail per width (the height/width
+    aspect ratio is maintained), return the thumbnail names by width"""
+
+    with default_storage.open(name) as file:
+        content = file.read()
+
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    image = Image.open(BytesIO(content))
+    image_format = image.format or "PNG"
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+
+    width, height = image.size
+    largest = max(widths)
+    if image_format == "JPEG":
+        # let the JPEG decoder downscale by a power of 2 (DCT scaling)
+        image.draft("RGB", (largest, int(height * largest / width)))
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    names = {}
+    # resize from the largest to the smallest thumbnail
+    for new_width in sorted(widths, reverse=True):
+        new_height = max(1, int(height * (new_width / width)))
+        names[new_width] = thumbnail_name(digest, new_width, extension)
+        if default_storage.exists(names[new_width]):
+            continue
+
+        # reduce() by an integer factor before the LANCZOS resampling
+        image = image.resize((new_width, new_height), Image.LANCZOS, reducing_gap=3.0)
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, quality=JPEG_QUALITY)
+        default_storage.save(names[new_width], ContentFile(buffer.getvalue()))
+
+    return names
+
+
+def process_profile_image(user_id, name):
+    """replace the uploaded profile image by its thumbnail. The uploaded image is
+    kept : the responses sent before the swap link it, prune_replaced_images()
+    deletes it once they are stale"""
+
+    User = get_user_model()
+
+    try:
+        names = generate_thumbnails(name, User.THUMBNAIL_WIDTHS)
+        # skipped if the image has been changed in the meantime, "updated_time"
+        # is the change stamp of the conditional requests
+        updated = User.objects.filter(pk=user_id, image=name).update(
+            image=names[User.THUMBNAIL_WIDTHS[0]], updated_time=timezone.now()
+        )
+        if updated:
+            # the cached user lists link the uploaded image
+            bump_versions("users")
+    finally:
+        # the worker thread has its own database connection
+        connections.close_all()
+
+
+def prune_replaced_images(before) -> list:
+    """delete the uploaded images modified before the datetime which are no
+    longer the image of a user (replaced by their thumbnail or by another
+    image), return their names"""
+
+    used = set(
+        get_user_model()
+        .objects.exclude(image__isnull=True)
+        .exclude(image="")
+        .values_list("image", flat=True)
+    )
+    # the thumbnails are in their own directory
+    try:
+        _, names = default_storage.listdir("")
+    except FileNotFoundError:
+        return []
+
+    deleted = []
+    for name in names:
+        if name not in used and default_storage.get_modified_time(name) < before:
+            default_storage.delete(name)
+            deleted.append(name)
+
+    return deleted
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.images import prune_replaced_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the uploaded profile images replaced (by their thumbnail or by "
+        "another image) more than --minutes minutes ago. They are kept meanwhile "
+        "for the responses sent before the replacement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, default=60)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(minutes=options["minutes"])
+        deleted = prune_replaced_images(before)
+
+        self.stdout.write(f"{len(deleted)} images deleted")
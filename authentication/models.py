@@ -1,8 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 
-
-from PIL import Image
+from authentication.images import schedule_thumbnails
 
 HELP_TEXT = (
     "Votre profil sera masqué aux autres utilisateurs et vos informations "
@@ -11,7 +10,8 @@ HELP_TEXT = (
 
 
 class User(AbstractUser):
-    WIDTH = 200
+    # width of the displayed profile image thumbnail
+    THUMBNAIL_WIDTHS = (200,)
 
     # to automatically set 'email', 'first_name', 'last_name' as required
     email = models.EmailField()
@@ -38,32 +38,53 @@ class User(AbstractUser):
         null=True,
         blank=True,
     )
+    # change stamp used by the conditional requests (ETag, Last-Modified)
+    updated_time = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # used to detect the "image" and "username" changes
+        self._loaded_image = self.get_image_name()
+        self._loaded_username = self.__dict__.get("username")
 
     def __str__(self):
         return f"{str(self.username).capitalize()}"
 
-    def resize_image(self):
-        """Resize the image while maintaining the original height/width aspect ratio
-        width == 200px"""
+    def refresh_from_db(self, using=None, fields=None):
+        # the users built from the token claims (authentication.tokens) load all
+        # their deferred fields at the first access to one of them
+        if fields is not None and getattr(self, "_from_claims", False):
+            fields = {*fields, *self.get_deferred_fields()}
+            self._from_claims = False
 
-        if self.image:
-            image = Image.open(self.image)
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or "image" in fields:
+            self._loaded_image = self.get_image_name()
+        if fields is None or "username" in fields:
+            self._loaded_username = self.__dict__.get("username")
 
-            # get the original height/width aspect ratio
-            width, height = image.size
+    def get_image_name(self):
+        """return the image name without loading a deferred "image" field"""
 
-            # get the new height/width aspect ratio
-            new_width = self.WIDTH
-            new_height = int(height * (new_width / width))
+        image = self.__dict__.get("image")
 
-            # resize the image
-            image = image.resize((new_width, new_height), Image.LANCZOS)
-
-            # Save
-            image.save(self.image.path)
+        return getattr(image, "name", image)
 
     def save(self, *args, **kwargs):
-        """Override the save method with the resize_image"""
+        """Override the save method to generate the image thumbnails in the
+        background when the image has changed"""
 
+        # "updated_time" is the stamp of the token claims (authentication.tokens)
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "updated_time"}
         super().save(*args, **kwargs)
-        self.resize_image()
+
+        image_name = self.get_image_name()
+        if image_name and image_name != self._loaded_image:
+            transaction.on_commit(lambda: schedule_thumbnails(self.pk, image_name))
+
+        self._loaded_image = image_name
+        self._loaded_username = self.username
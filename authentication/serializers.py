@@ -3,8 +3,10 @@ from datetime import date
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from SoftDesk.fieldsets import SparseFieldsetSerializerMixin
 
-class UserListSerializer(serializers.ModelSerializer):
+
+class UserListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True, style={"input_type": "password"}, label="Mot de passe"
     )
@@ -30,13 +32,17 @@ class UserListSerializer(serializers.ModelSerializer):
             "password_confirm",
         ]
 
+    source_fields = {"email": ("email", "username", "can_be_contacted")}
+
     def to_representation(self, instance):
         """hide the user's email if the "can_be_contacted" field is False"""
 
         data = super().to_representation(instance)
         request = self.context.get("request")
-        if (not request.user.is_superuser) and (
-            request.user.username != instance.username
+        if (
+            "email" in data
+            and (not request.user.is_superuser)
+            and (request.user.username != instance.username)
         ):
             if not instance.can_be_contacted:
                 data.pop("email")
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from authentication.tokens import set_stamp, revoke_user_tokens
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, **kwargs):
+    """the claims of the user tokens are outdated, the tokens of a deactivated
+    user are revoked"""
+
+    if "updated_time" not in instance.get_deferred_fields():
+        set_stamp(instance)
+    if not instance.is_active:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
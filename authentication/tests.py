@@ -1,3 +1,124 @@
-# from django.test import TestCase
+from datetime import date, timedelta
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from threading import Event
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from authentication.images import prune_replaced_images, schedule_thumbnails
+
+from authentication.models import User
+from authentication.tokens import (
+    ClaimsJWTAuthentication,
+    ClaimsTokenObtainPairSerializer,
+)
+
+
+def create_user(username="utilisateur"):
+    return User.objects.create(
+        username=username,
+        email=f"{username}@softdesk.fr",
+        first_name="Prénom",
+        last_name="Nom",
+        birthdate=date(1990, 1, 1),
+        can_be_contacted=True,
+        can_data_be_shared=True,
+    )
+
+
+def create_image(name="profil.png", width=400):
+    buffer = BytesIO()
+    Image.new("RGB", (width, width // 2), "blue").save(buffer, format="PNG")
+
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class TokenClaimsTest(TestCase):
+    """the tokens claims are outdated by every save of the user"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def get_user(self):
+        return ClaimsJWTAuthentication().get_user(self.token)
+
+    def test_claims_user(self):
+        self.assertFalse(self.get_user().is_staff)
+
+    def test_save_update_fields(self):
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+
+        self.assertTrue(self.get_user().is_staff)
+
+
+class MediaRootMixin:
+    """the images are saved in a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False)
+class ProfileImageTest(MediaRootMixin, TestCase):
+    """the uploaded image is replaced by its thumbnail after the commit, and
+    deleted by prune_replaced_images() once the responses linking it are stale"""
+
+    def test_thumbnail(self):
+        user = create_user()
+        user.image = create_image()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        uploaded = user.image.name
+
+        user.refresh_from_db()
+        self.assertTrue(user.image.name.startswith("thumbnails/"))
+        self.assertEqual(user.image.width, User.THUMBNAIL_WIDTHS[0])
+        # the responses sent before the swap still link the uploaded image
+        self.assertTrue(default_storage.exists(uploaded))
+
+        self.assertEqual(prune_replaced_images(timezone.now() - timedelta(hours=1)), [])
+        self.assertEqual(
+            prune_replaced_images(timezone.now() + timedelta(seconds=1)), [uploaded]
+        )
+        self.assertFalse(default_storage.exists(uploaded))
+        self.assertTrue(default_storage.exists(user.image.name))
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=True)
+class ProfileImageWorkerTest(MediaRootMixin, TransactionTestCase):
+    """the thumbnails are generated by the worker pool, with its own database
+    connection"""
+
+    def test_worker(self):
+        user = create_user()
+        name = default_storage.save("profil.png", create_image())
+        User.objects.filter(pk=user.pk).update(image=name)
+
+        schedule_thumbnails(user.pk, name).result(timeout=10)
+
+        user.refresh_from_db()
+        self.assertTrue(user.image.name.startswith("thumbnails/"))
+        self.assertTrue(default_storage.exists(user.image.name))
+
+    def test_failure_logged(self):
+        user = create_user()
+        logged = Event()
+        with self.assertLogs("authentication.images", "ERROR"):
+            future = schedule_thumbnails(user.pk, "absente.png")
+            # the callbacks run in their order, after the logging one
+            future.add_done_callback(lambda future: logged.set())
+            self.assertTrue(logged.wait(timeout=10))
+        self.assertIsInstance(future.exception(), FileNotFoundError)
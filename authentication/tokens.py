@@ -0,0 +1,221 @@
+from time import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+# user fields read by the API views, permissions and serializers, copied in the
+# tokens so the authenticated user is built without loading its row
+CLAIM_FIELDS = (
+    "username",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "can_be_contacted",
+    "can_data_be_shared",
+)
+# "updated_time" of the user when the claims were copied
+STAMP_CLAIM = "user_stamp"
+
+STAMP_KEY = "jwt-stamp:{}"
+REVOKED_TOKEN_KEY = "jwt-revoked:{}"
+REVOKED_USER_KEY = "jwt-revoked-user:{}"
+
+
+def get_stamp(user) -> float:
+    return user.updated_time.timestamp()
+
+
+def add_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[STAMP_CLAIM] = get_stamp(user)
+
+
+def set_stamp(user):
+    """the claims of the tokens copied before this stamp are outdated"""
+
+    cache.set(
+        STAMP_KEY.format(user.pk),
+        get_stamp(user),
+        api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+    )
+
+
+def revoke_token(token):
+    """deny the token until its expiration"""
+
+    timeout = token["exp"] - time()
+    if timeout > 0:
+        cache.set(REVOKED_TOKEN_KEY.format(token[api_settings.JTI_CLAIM]), 1, timeout)
+
+
+def revoke_user_tokens(user_id):
+    """deny the tokens of the user issued before now, they expire before the
+    entry of the cache. "iat" is in seconds : the tokens issued during the
+    current second are denied too"""
+
+    cache.set(
+        REVOKED_USER_KEY.format(user_id),
+        time(),
+        api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+    )
+
+
+def get_token_keys(token) -> dict:
+    """return the cache keys read to check the token"""
+
+    user_id = token[api_settings.USER_ID_CLAIM]
+
+    return {
+        "revoked": REVOKED_TOKEN_KEY.format(token[api_settings.JTI_CLAIM]),
+        "revoked_before": REVOKED_USER_KEY.format(user_id),
+        "stamp": STAMP_KEY.format(user_id),
+    }
+
+
+def check_entries(token, entries) -> dict:
+    revoked_before = entries["revoked_before"]
+    if entries["revoked"] or (
+        revoked_before is not None and token.get("iat", 0) < revoked_before
+    ):
+        raise AuthenticationFailed("Token révoqué.", code="token_revoked")
+
+    return entries
+
+
+def check_token(token) -> dict:
+    """raise AuthenticationFailed if the token has been revoked, return the
+    entries of the cache read to check it"""
+
+    keys = get_token_keys(token)
+    values = cache.get_many(keys.values())
+
+    return check_entries(token, {name: values.get(key) for name, key in keys.items()})
+
+
+async def acheck_token(token) -> dict:
+    """async variant of check_token()"""
+
+    keys = get_token_keys(token)
+    values = await cache.aget_many(keys.values())
+
+    return check_entries(token, {name: values.get(key) for name, key in keys.items()})
+
+
+def get_claims_user(token):
+    """return a user built from the token claims, the other fields are deferred
+    and all loaded by the first access to one of them"""
+
+    User = get_user_model()
+    claims = {"id": token[api_settings.USER_ID_CLAIM]}
+    claims.update((field, token[field]) for field in CLAIM_FIELDS)
+    # from_db() expects the values in the order of the model fields
+    field_names = [
+        field.attname for field in User._meta.concrete_fields if field.attname in claims
+    ]
+    user = User.from_db(None, field_names, [claims[name] for name in field_names])
+    user._from_claims = True
+
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication without loading the user row : the user is built from
+    the token claims while they are up to date (the user has not been saved
+    since the token was issued), else loaded from the database. The revoked
+    tokens are denied through the cache."""
+
+    def check_claims(self, validated_token):
+        try:
+            validated_token[api_settings.USER_ID_CLAIM]
+            validated_token[api_settings.JTI_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def get_user(self, validated_token):
+        self.check_claims(validated_token)
+        entries = check_token(validated_token)
+
+        stamp = validated_token.get(STAMP_CLAIM)
+        if stamp is not None and stamp == entries["stamp"]:
+            return get_claims_user(validated_token)
+
+        return self.get_database_user(validated_token, entries)
+
+    def get_database_user(self, validated_token, entries):
+        # tokens issued without claims, saved user or stamp missing from the
+        # cache (expired or new process)
+        user = super().get_user(validated_token)
+        if entries["stamp"] is None:
+            set_stamp(user)
+
+        return user
+
+    async def aauthenticate(self, request):
+        """async variant of authenticate() for the async views, the user row is
+        loaded in a thread only when the claims are outdated"""
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        self.check_claims(validated_token)
+        entries = await acheck_token(validated_token)
+
+        stamp = validated_token.get(STAMP_CLAIM)
+        if stamp is not None and stamp == entries["stamp"]:
+            return get_claims_user(validated_token), validated_token
+
+        user = await sync_to_async(self.get_database_user)(validated_token, entries)
+
+        return user, validated_token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """copy the claims of the user in the tokens"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_claims(token, user)
+        set_stamp(user)
+
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """deny the revoked refresh tokens and copy the current claims of the user in
+    the new access token"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        refresh = self.token_class(attrs["refresh"])
+        check_token(refresh)
+        user = (
+            get_user_model()
+            .objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True)
+            .first()
+        )
+        if user is None:
+            raise AuthenticationFailed("Utilisateur inconnu ou inactif.")
+
+        access = refresh.access_token
+        add_claims(access, user)
+        set_stamp(user)
+        data["access"] = str(access)
+
+        return data
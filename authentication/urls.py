@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from authentication.async_views import AsyncUserView
 from authentication.views import (
     UserViewset,
     AdminUserViewset,
@@ -16,4 +17,7 @@ router.register("admin/user", AdminUserViewset, basename="admin-user")
 urlpatterns = [
     path("api/", include(router.urls)),
     path("api/change-password/", ChangePasswordView.as_view(), name="change-password"),
+    # read-only async views, served without blocking by an ASGI server
+    path("api/async/user/", AsyncUserView.as_view(), name="async-user-list"),
+    path("api/async/user/<int:pk>/", AsyncUserView.as_view(), name="async-user-detail"),
 ]
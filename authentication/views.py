@@ -5,10 +5,17 @@ from rest_framework.response import Response
 
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth import get_user_model
 
 
+from SoftDesk.conditional import ConditionalGetMixin
+from SoftDesk.db_routers import ReplicaReadsMixin
+from SoftDesk.fieldsets import SparseFieldsetMixin
 from authentication.serializers import (
     UserListSerializer,
     UserDetailSerializer,
@@ -17,6 +24,7 @@ from authentication.serializers import (
     ChangePasswordSerializer,
 )
 from authentication.permissions import IsOwnerOrReadOnly
+from authentication.tokens import revoke_token, revoke_user_tokens
 
 
 class MultipleSerializerMixin:
@@ -35,13 +43,26 @@ class MultipleSerializerMixin:
         return super().get_serializer_class()
 
 
-class UserViewset(MultipleSerializerMixin, ModelViewSet):
+class UserViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    MultipleSerializerMixin,
+    ModelViewSet,
+):
     # UserListSerializer with password configuration
     serializer_class = UserListSerializer
     # UserDetailSerializer without password configuration
     detail_serializer_class = UserDetailSerializer
     # permission for the detail view
     permission_classes = [IsOwnerOrReadOnly]
+    # filter the queryset with the "username" argument in the url
+    # http://127.0.0.1:8000/api/user/?username=alpha
+    filter_fields = {"username": "username"}
+    ordering_fields = ("id", "username", "first_name", "last_name")
+    # SQL queries of the requests (authentication included), more queries
+    # fail the tests, see SoftDesk.instrumentation
+    query_budget = {"list": 5, "retrieve": 5}
 
     def get_queryset(self):
         queryset = get_user_model().objects.filter(
@@ -58,30 +79,37 @@ class UserViewset(MultipleSerializerMixin, ModelViewSet):
             connected_user = get_user_model().objects.filter(id=user.id)
             queryset |= connected_user
 
-        # filter the queryset with the "username" argument in the url
-        # http://127.0.0.1:8000/api/user/?username=alpha
-        username = self.request.GET.get("username")
-        if username:
-            queryset = queryset.filter(username=username)
-
-        return queryset
+        return self.get_serializer_class().restrict_queryset(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class AdminUserViewset(MultipleSerializerMixin, ModelViewSet):
+class AdminUserViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    MultipleSerializerMixin,
+    ModelViewSet,
+):
     serializer_class = AdminUserListSerializer
     detail_serializer_class = AdminUserDetailSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    # filter the queryset with the url arguments
+    # http://127.0.0.1:8000/api/admin/user/?username=alpha
+    filter_fields = {
+        "username": "username",
+        "is_active": "is_active",
+        "is_staff": "is_staff",
+    }
+    ordering_fields = ("id", "username", "first_name", "last_name", "date_joined")
+    query_budget = {"list": 5, "retrieve": 4}
 
     def get_queryset(self):
         queryset = get_user_model().objects.all()
 
-        # filter the queryset with the "username" argument in the url
-        # http://127.0.0.1:8000/api/user/?username=alpha
-        username = self.request.GET.get("username")
-        if username:
-            queryset = queryset.filter(username=username)
-
-        return queryset
+        return self.get_serializer_class().restrict_queryset(
+            queryset, self.get_sparse_fields()
+        )
 
 
 class ChangePasswordView(APIView):
@@ -101,6 +129,8 @@ class ChangePasswordView(APIView):
             user.save()
 
             update_session_auth_hash(request, user)
+            # the tokens issued with the old password are denied
+            revoke_user_tokens(user.pk)
 
             return Response(
                 {"detail": "Mot de passe modifié avec succès."},
@@ -108,3 +138,27 @@ class ChangePasswordView(APIView):
             )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TokenRevokeView(APIView):
+    """revoke the access token of the request and the refresh token sent
+    ({"refresh": "xxx"}), used to log out"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError:
+                raise ValidationError({"refresh": "Token invalide ou expiré."})
+            if refresh[api_settings.USER_ID_CLAIM] != request.user.pk:
+                raise ValidationError({"refresh": "Token invalide ou expiré."})
+            revoke_token(refresh)
+
+        # None with the session authentication
+        if request.auth is not None:
+            revoke_token(request.auth)
+
+        return Response({"detail": "Token révoqué."}, status=status.HTTP_200_OK)
@@ -0,0 +1,30 @@
+from SoftDesk.async_views import AsyncReadOnlyView
+from project.membership import aget_contributed_project_ids
+from project.views import ProjectViewset, IssueViewset, CommentViewset
+
+
+class ContributedProjectsAsyncMixin:
+    """load the contributed projects of the user before the viewset filters the
+    queryset and checks the permissions with them"""
+
+    async def initial(self, request):
+        await super().initial(request)
+        await aget_contributed_project_ids(request.user, request)
+
+
+class AsyncProjectView(ContributedProjectsAsyncMixin, AsyncReadOnlyView):
+    """http://127.0.0.1:8000/api/async/project/"""
+
+    viewset_class = ProjectViewset
+
+
+class AsyncIssueView(ContributedProjectsAsyncMixin, AsyncReadOnlyView):
+    """http://127.0.0.1:8000/api/async/issue/"""
+
+    viewset_class = IssueViewset
+
+
+class AsyncCommentView(ContributedProjectsAsyncMixin, AsyncReadOnlyView):
+    """http://127.0.0.1:8000/api/async/comment/"""
+
+    viewset_class = CommentViewset
@@ -0,0 +1,331 @@
+from collections import Counter, defaultdict
+
+from django.db.models import (
+    Case,
+    Count,
+    DateTimeField,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from project.models import (
+    Project,
+    Issue,
+    Comment,
+    bump_project_versions,
+    get_issue_projects,
+    get_loaded_projects,
+)
+
+# counter of the issues of each status on Project
+STATUS_COUNTERS = {
+    "To Do": "todo_issue_count",
+    "In Progress": "in_progress_issue_count",
+    "Finished": "finished_issue_count",
+}
+OPEN_STATUSES = ("To Do", "In Progress")
+
+# rows updated by one query : a CASE branch (and its parameters) per row
+UPDATE_BATCH_SIZE = 100
+
+
+def update_rows(model, changes, **values):
+    """apply the changes {pk: {field: expression}} and the values common to the
+    rows with one UPDATE query per batch of rows, the expressions are computed by
+    the database from the current row : the concurrent transactions do not lose
+    updates"""
+
+    changes = {
+        pk: fields
+        for pk, fields in changes.items()
+        if pk is not None and (fields or values)
+    }
+    pks = sorted(changes)
+    for start in range(0, len(pks), UPDATE_BATCH_SIZE):
+        end = start + UPDATE_BATCH_SIZE
+        batch = pks[start:end]
+        field_names = {name for pk in batch for name in changes[pk]}
+        model.objects.filter(pk__in=batch).update(
+            **values,
+            **{
+                name: Case(
+                    *[
+                        When(pk=pk, then=changes[pk][name])
+                        for pk in batch
+                        if name in changes[pk]
+                    ],
+                    default=F(name),
+                )
+                for name in field_names
+            },
+        )
+
+
+def add_counts(model, deltas, **values):
+    """add the deltas {pk: Counter({counter: delta})} to the counters"""
+
+    update_rows(
+        model,
+        {
+            pk: {name: F(name) + delta for name, delta in counts.items() if delta}
+            for pk, counts in deltas.items()
+        },
+        **values,
+    )
+
+
+def count_projects(deltas):
+    """add the deltas to the counters of the projects and mark them as modified
+    in the same queries, a project without delta is only touched (see
+    touch_projects)"""
+
+    add_counts(Project, deltas, updated_time=timezone.now())
+    bump_project_versions(*deltas)
+
+
+def issue_counts(status, comment_count=0, sign=1) -> Counter:
+    """counters of its project incremented (sign=1) or decremented (sign=-1)
+    by an issue"""
+
+    counts = Counter(
+        {
+            "issue_count": sign,
+            STATUS_COUNTERS[status]: sign,
+            "comment_count": sign * comment_count,
+        }
+    )
+    if status in OPEN_STATUSES:
+        counts["open_issue_count"] = sign
+
+    return counts
+
+
+def count_issues_created(*issues):
+    deltas = defaultdict(Counter)
+    for issue in issues:
+        deltas[issue.project_id].update(issue_counts(issue.status))
+
+    count_projects(deltas)
+
+
+def count_issues_changed(*issues):
+    """move the issues between the counters of their previous and new project
+    and status, the comments of a moved issue follow it. Both projects are
+    touched : their representation nests the issues"""
+
+    # the projects are touched even if their counters do not change
+    deltas = {
+        project_id: Counter()
+        for issue in issues
+        for project_id in (issue.project_id, issue._loaded_project_id)
+    }
+    changed = [
+        issue
+        for issue in issues
+        if None not in (issue._loaded_project_id, issue._loaded_status)
+        and (issue._loaded_project_id, issue._loaded_status)
+        != (issue.project_id, issue.status)
+    ]
+
+    moved = [
+        issue.pk for issue in changed if issue._loaded_project_id != issue.project_id
+    ]
+    comment_counts = {}
+    if moved:
+        comment_counts = dict(
+            Issue.objects.filter(pk__in=moved).values_list("id", "comment_count")
+        )
+
+    for issue in changed:
+        comment_count = comment_counts.get(issue.pk, 0)
+        deltas[issue._loaded_project_id].update(
+            issue_counts(issue._loaded_status, comment_count, -1)
+        )
+        deltas[issue.project_id].update(issue_counts(issue.status, comment_count))
+
+    count_projects(deltas)
+
+
+def count_issue_deleted(issue, with_comments=False):
+    """call it before the deletion : with_comments if the comments of the issue
+    are deleted with it (they are counted down one by one otherwise)"""
+
+    counts = issue_counts(issue.status, sign=-1)
+    if with_comments:
+        counts["comment_count"] = -Subquery(
+            Issue.objects.filter(pk=issue.pk).values("comment_count")
+        )
+
+    count_projects({issue.project_id: counts})
+
+
+def count_comments(added=(), removed=(), touched=(), projects=None) -> dict:
+    """update the counters of the issues and of their projects and mark them as
+    modified in the same queries, their representations nest the comments :
+    added are the (issue id, created time) of the comments created or moved to
+    the issues, removed the issue ids of the comments deleted or moved out of
+    them, touched the issue ids of the other modified comments, projects the
+    known project ids of the issues. Return the project id of each issue"""
+
+    issue_deltas = Counter()
+    last_times = {}
+    for issue_id, created_time in added:
+        issue_deltas[issue_id] += 1
+        if last_times.get(issue_id) is None or created_time > last_times[issue_id]:
+            last_times[issue_id] = created_time
+    removed = list(removed)
+    for issue_id in removed:
+        issue_deltas[issue_id] -= 1
+
+    changes = {issue_id: {} for issue_id in touched}
+    for issue_id, delta in issue_deltas.items():
+        changes.setdefault(issue_id, {})
+        if delta:
+            changes[issue_id]["comment_count"] = F("comment_count") + delta
+    changes.pop(None, None)
+    if not changes:
+        return {}
+
+    # the last comment of an issue may be the removed one : read again
+    last_comment = Subquery(
+        Comment.objects.filter(issue=OuterRef("pk"))
+        .order_by("-created_time")
+        .values("created_time")[:1]
+    )
+    for issue_id in removed:
+        changes[issue_id]["last_comment_time"] = last_comment
+    for issue_id, created_time in last_times.items():
+        if issue_id not in removed:
+            created_time = Value(created_time, output_field=DateTimeField())
+            changes[issue_id]["last_comment_time"] = Greatest(
+                Coalesce("last_comment_time", created_time), created_time
+            )
+    update_rows(Issue, changes, updated_time=timezone.now())
+
+    projects = get_issue_projects(changes, projects)
+    project_deltas = defaultdict(Counter)
+    for issue_id, project_id in projects.items():
+        project_deltas[project_id]["comment_count"] += issue_deltas[issue_id]
+    count_projects(project_deltas)
+
+    return projects
+
+
+def count_comments_created(*comments) -> dict:
+    return count_comments(
+        added=[(comment.issue_id, comment.created_time) for comment in comments],
+        projects=get_loaded_projects(comments),
+    )
+
+
+def count_comments_changed(*comments) -> dict:
+    """the moved comments leave the counters of their previous issue, the other
+    ones only touch their issue"""
+
+    moved = [
+        comment
+        for comment in comments
+        if comment._loaded_issue_id not in (None, comment.issue_id)
+    ]
+
+    return count_comments(
+        added=[(comment.issue_id, comment.created_time) for comment in moved],
+        removed=[comment._loaded_issue_id for comment in moved],
+        touched=[comment.issue_id for comment in comments],
+        projects=get_loaded_projects(comments),
+    )
+
+
+def count_comments_deleted(*comments) -> dict:
+    return count_comments(
+        removed=[comment.issue_id for comment in comments],
+        projects=get_loaded_projects(comments),
+    )
+
+
+def recount_projects(project_ids, save=True) -> list:
+    """recompute the counters of the projects from their issues and comments,
+    return the projects whose counters drifted (saved if save is True). Call it
+    in a transaction : the projects are locked until the commit"""
+
+    projects = (
+        Project.objects.select_for_update()
+        .filter(pk__in=project_ids)
+        .only(*Project.counter_fields)
+    )
+    status_counts = {
+        counter: Count("pk", filter=Q(status=status))
+        for status, counter in STATUS_COUNTERS.items()
+    }
+    issue_rows = {
+        row.pop("project"): row
+        for row in Issue.objects.filter(project__in=project_ids)
+        .order_by()
+        .values("project")
+        .annotate(
+            issue_count=Count("pk"),
+            open_issue_count=Count("pk", filter=Q(status__in=OPEN_STATUSES)),
+            **status_counts,
+        )
+    }
+    comment_counts = dict(
+        Comment.objects.filter(issue__project__in=project_ids)
+        .order_by()
+        .values_list("issue__project")
+        .annotate(Count("pk"))
+    )
+
+    drifted = []
+    for project in projects:
+        counts = {
+            **dict.fromkeys(Project.counter_fields, 0),
+            **issue_rows.get(project.pk, {}),
+            "comment_count": comment_counts.get(project.pk, 0),
+        }
+        if any(getattr(project, name) != value for name, value in counts.items()):
+            for name, value in counts.items():
+                setattr(project, name, value)
+            drifted.append(project)
+
+    if save and drifted:
+        Project.objects.bulk_update(drifted, Project.counter_fields)
+
+    return drifted
+
+
+def recount_issues(issue_ids, save=True) -> list:
+    """recompute the counters of the issues from their comments, return the
+    issues whose counters drifted (saved if save is True). Call it in a
+    transaction : the issues are locked until the commit"""
+
+    issues = (
+        Issue.objects.select_for_update()
+        .filter(pk__in=issue_ids)
+        .only(*Issue.counter_fields)
+    )
+    comments = {
+        issue_id: (count, last_time)
+        for issue_id, count, last_time in Comment.objects.filter(issue__in=issue_ids)
+        .order_by()
+        .values_list("issue")
+        .annotate(Count("pk"), Max("created_time"))
+    }
+
+    drifted = []
+    for issue in issues:
+        counts = comments.get(issue.pk, (0, None))
+        if (issue.comment_count, issue.last_comment_time) != counts:
+            issue.comment_count, issue.last_comment_time = counts
+            drifted.append(issue)
+
+    if save and drifted:
+        Issue.objects.bulk_update(drifted, Issue.counter_fields)
+
+    return drifted
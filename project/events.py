@@ -0,0 +1,107 @@
+import asyncio
+from time import monotonic
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from SoftDesk.async_views import AsyncReadOnlyView
+from SoftDesk.events import OVERFLOW, format_event, get_broker
+from project.async_views import ContributedProjectsAsyncMixin
+from project.membership import aget_contributed_project_ids
+from project.views import IssueViewset
+
+# the events changing the projects of the users
+MEMBERSHIP_MODELS = ("project", "contributor")
+
+
+class EventStreamView(ContributedProjectsAsyncMixin, AsyncReadOnlyView):
+    """Server-Sent Events of the changes of the contributed projects (or of
+    "?project=1,2") : projects, contributors, issues and comments saved or
+    deleted. An event carries the ids and the sync version of the row, its "id"
+    is the version : the client gets the rows from /api/sync/. The stream ends
+    after EVENTS_STREAM_DURATION seconds, or with an "overflow" event if the
+    client reads slower than the changes are published, and the client
+    reconnects. Served without blocking by an ASGI server.
+    http://127.0.0.1:8000/api/events/"""
+
+    # same authentication and permissions as the issues
+    viewset_class = IssueViewset
+    # reconnection delay of the EventSource clients (milliseconds)
+    retry = 3000
+
+    async def get_response(self, request, viewset, drf_request, pk):
+        user = drf_request.user
+        contributed = await aget_contributed_project_ids(user, drf_request)
+        requested = self.get_requested_projects(drf_request)
+        if requested is not None and not requested <= contributed:
+            raise PermissionDenied("Vous ne contribuez pas à ces projets.")
+
+        response = StreamingHttpResponse(
+            self.stream(user, contributed, requested),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # streamed without buffering by nginx
+        response["X-Accel-Buffering"] = "no"
+
+        return response
+
+    def get_requested_projects(self, request):
+        value = request.query_params.get("project")
+        if value is None:
+            return None
+
+        try:
+            return frozenset(int(pk) for pk in value.split(","))
+        except ValueError:
+            raise ValidationError(
+                {"project": "Une liste d'ids séparés par des virgules est attendue."}
+            )
+
+    def get_topics(self, user, contributed, requested):
+        project_ids = contributed if requested is None else contributed & requested
+
+        return {f"user:{user.pk}", *(f"project:{pk}" for pk in project_ids)}
+
+    async def stream(self, user, contributed, requested):
+        broker = get_broker()
+        subscription = broker.subscribe(
+            self.get_topics(user, contributed, requested),
+            getattr(settings, "EVENTS_QUEUE_SIZE", 100),
+        )
+        heartbeat = getattr(settings, "EVENTS_HEARTBEAT", 15)
+        deadline = monotonic() + getattr(settings, "EVENTS_STREAM_DURATION", 300)
+
+        try:
+            yield f"retry: {self.retry}\n\n"
+            while (remaining := deadline - monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), min(heartbeat, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    # detects the closed connections through the proxies
+                    yield ": ping\n\n"
+                    continue
+
+                if event is OVERFLOW:
+                    yield format_event(
+                        {"detail": "Trop d'évènements en attente, synchronisez."},
+                        "overflow",
+                    )
+                    break
+
+                visible = contributed
+                if event["model"] in MEMBERSHIP_MODELS:
+                    # a project joined, left, (de)activated : the members
+                    # are informed of the change
+                    contributed = await aget_contributed_project_ids(user)
+                    visible = visible | contributed
+                    broker.set_topics(
+                        subscription, self.get_topics(user, contributed, requested)
+                    )
+                if event["project_id"] in visible or event.get("user_id") == user.pk:
+                    yield format_event(event, event["model"], event["sync_version"])
+        finally:
+            broker.unsubscribe(subscription)
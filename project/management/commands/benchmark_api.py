@@ -0,0 +1,245 @@
+import json
+import math
+import platform
+from collections import Counter
+from datetime import datetime
+from time import perf_counter
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from SoftDesk.renderers import orjson
+from authentication.urls import router as authentication_router
+from project.models import Project, Contributor, Issue, Comment
+from project.urls import router as project_router
+
+# url arguments of the list actions requiring them
+ACTION_PARAMS = {"search": {"q": "bug"}}
+
+
+def percentile(values, rank):
+    """nearest-rank percentile of the sorted values"""
+
+    return values[max(0, math.ceil(rank / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every GET endpoint of the routers (lists, details, exports and "
+        "searches) through the Django test client or the ASGI test client with "
+        "JWT authentication, and report the latency percentiles, the SQL queries "
+        "per request and the throughput. Run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="per endpoint")
+        parser.add_argument("--warmup", type=int, default=3, help="per endpoint")
+        parser.add_argument(
+            "--client", choices=("wsgi", "asgi"), default="wsgi", help="test client"
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="clear the caches (memberships, list responses) before each request",
+        )
+        parser.add_argument(
+            "--endpoint",
+            nargs="+",
+            default=[],
+            help="benchmark only the endpoints containing one of these names",
+        )
+        parser.add_argument("--prefix", default="synthetic", help="of generate_data")
+        parser.add_argument(
+            "--user", help="user of the endpoints, by default the first generated one"
+        )
+        parser.add_argument(
+            "--admin", help="user of the admin endpoints, by default the generated one"
+        )
+        parser.add_argument("--output", help="write the results to this JSON file")
+        parser.add_argument("--compare", help="JSON file of a previous run")
+
+    def handle(self, *args, **options):
+        self.options = options
+        clients = {
+            False: self.get_client(options["user"] or f"{options['prefix']}-0"),
+            True: self.get_client(options["admin"] or f"{options['prefix']}-admin"),
+        }
+
+        results = []
+        # host of the test clients
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for name, url, params, admin in self.get_endpoints(clients):
+                if options["endpoint"] and not any(
+                    value in name for value in options["endpoint"]
+                ):
+                    continue
+                result = self.benchmark(clients[admin], name, url, params)
+                results.append(result)
+                self.write_result(result)
+
+        report = {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "client": options["client"],
+            "cold": options["cold"],
+            "database": connection.vendor,
+            "orjson": orjson is not None,
+            "python": platform.python_version(),
+            "dataset": {
+                model.__name__.lower(): model.objects.count()
+                for model in (get_user_model(), Project, Contributor, Issue, Comment)
+            },
+            "results": results,
+        }
+
+        if options["compare"]:
+            self.compare(report)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def get_client(self, username):
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'User "{username}" not found, run generate_data or use --user.'
+            )
+
+        token = RefreshToken.for_user(user).access_token
+        client = AsyncClient() if self.options["client"] == "asgi" else Client()
+
+        return client, {"authorization": f"Bearer {token}"}
+
+    async def async_request(self, client, url, params, headers):
+        return await client.get(url, params, headers=headers)
+
+    def request(self, client, url, params):
+        client, headers = client
+        if isinstance(client, AsyncClient):
+            response = async_to_sync(self.async_request)(client, url, params, headers)
+        else:
+            response = client.get(url, params, headers=headers)
+        # the exports are generated while the response is read
+        if response.streaming:
+            response.content_size = sum(map(len, response.streaming_content))
+        else:
+            response.content_size = len(response.content)
+
+        return response
+
+    def get_endpoints(self, clients):
+        """yield (name, url, url arguments, admin) of each GET endpoint"""
+
+        for router in (authentication_router, project_router):
+            for _, viewset, basename in router.registry:
+                admin = basename.startswith("admin-")
+                url = reverse(f"{basename}-list")
+                yield f"{basename}-list", url, {}, admin
+
+                # the detail of the first element of the list
+                response = self.request(clients[admin], url, {"limit": 1})
+                results = (
+                    response.json().get("results")
+                    if response.status_code == 200
+                    else None
+                )
+                if results:
+                    detail_url = reverse(f"{basename}-detail", args=[results[0]["id"]])
+                    yield f"{basename}-detail", detail_url, {}, admin
+                else:
+                    self.stdout.write(f"{basename}-detail skipped : empty list")
+
+                for action in viewset.get_extra_actions():
+                    if not action.detail and "get" in action.mapping:
+                        name = f"{basename}-{action.url_name}"
+                        params = ACTION_PARAMS.get(action.url_name, {})
+                        yield name, reverse(name), params, admin
+
+    def benchmark(self, client, name, url, params):
+        timings = []
+        queries = []
+        sizes = []
+        statuses = Counter()
+        for index in range(self.options["warmup"] + self.options["requests"]):
+            if self.options["cold"]:
+                for cache in caches.all():
+                    cache.clear()
+
+            start = perf_counter()
+            response = self.request(client, url, params)
+            elapsed = perf_counter() - start
+            # the queries are stored when DEBUG is True
+            reset_queries()
+
+            if index < self.options["warmup"]:
+                continue
+            timings.append(elapsed)
+            request = getattr(response, "wsgi_request", None) or response.asgi_request
+            # counted by SoftDesk.instrumentation.InstrumentationMiddleware
+            metrics = getattr(request, "metrics", None)
+            if metrics is not None:
+                queries.append(metrics.queries)
+            sizes.append(response.content_size)
+            statuses[response.status_code] += 1
+
+        timings.sort()
+
+        return {
+            "endpoint": name,
+            "url": url,
+            "params": params,
+            "requests": len(timings),
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "p50_ms": percentile(timings, 50) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "p99_ms": percentile(timings, 99) * 1000,
+            "mean_ms": sum(timings) / len(timings) * 1000,
+            "max_ms": timings[-1] * 1000,
+            "throughput_rps": len(timings) / sum(timings),
+            "queries_mean": sum(queries) / len(queries) if queries else None,
+            "queries_max": max(queries) if queries else None,
+            "bytes_mean": sum(sizes) / len(sizes),
+        }
+
+    def write_result(self, result):
+        queries = result["queries_max"]
+        self.stdout.write(
+            f"{result['endpoint']:<26} "
+            f"p50={result['p50_ms']:7.1f} ms  "
+            f"p95={result['p95_ms']:7.1f} ms  "
+            f"p99={result['p99_ms']:7.1f} ms  "
+            f"rps={result['throughput_rps']:7.1f}  "
+            f"queries={'-' if queries is None else queries:<3} "
+            f"size={result['bytes_mean'] / 1024:.0f} KiB  "
+            f"status={','.join(result['statuses'])}"
+        )
+
+    def compare(self, report):
+        with open(self.options["compare"]) as file:
+            baseline = {
+                result["endpoint"]: result for result in json.load(file)["results"]
+            }
+
+        self.stdout.write(f"\ncompared with {self.options['compare']}")
+        for result in report["results"]:
+            previous = baseline.get(result["endpoint"])
+            if previous is None:
+                continue
+            changes = [
+                f"{key[:3]}={(result[key] / previous[key] - 1) * 100:+6.1f} %"
+                for key in ("p50_ms", "p95_ms", "p99_ms")
+                if previous[key]
+            ]
+            if None not in (result["queries_max"], previous["queries_max"]):
+                changes.append(
+                    f"queries={result['queries_max'] - previous['queries_max']:+d}"
+                )
+            self.stdout.write(f"{result['endpoint']:<26} {'  '.join(changes)}")
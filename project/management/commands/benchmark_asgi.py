@@ -0,0 +1,272 @@
+import asyncio
+import json
+import platform
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Thread
+from time import perf_counter, sleep
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+
+from authentication.tokens import ClaimsTokenObtainPairSerializer
+from project.management.commands.benchmark_api import percentile
+
+ENDPOINTS = ("project", "issue", "comment", "user")
+# url names of the views served by each mode
+MODES = {
+    "wsgi": "{}-list",
+    "asgi": "async-{}-list",
+    # the synchronous views run in a thread by the ASGI handler
+    "asgi-sync": "{}-list",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the synchronous list views served by a "
+        "threaded WSGI worker and of the async views (/api/async/) served by "
+        "one ASGI event loop, under concurrent load. --db-latency delays every "
+        "query to emulate a remote database. Run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 10, 50],
+            help="numbers of concurrent clients",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="per endpoint and concurrency"
+        )
+        parser.add_argument(
+            "--threads", type=int, default=4, help="threads of the WSGI worker"
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=5.0,
+            help="milliseconds added to every SQL query",
+        )
+        parser.add_argument(
+            "--endpoint", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS)
+        )
+        parser.add_argument(
+            "--mode", nargs="+", choices=list(MODES), default=["wsgi", "asgi"]
+        )
+        parser.add_argument("--prefix", default="synthetic", help="of generate_data")
+        parser.add_argument(
+            "--user", help="user of the endpoints, by default the first generated one"
+        )
+        parser.add_argument("--output", help="write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        self.options = options
+        username = options["user"] or f"{options['prefix']}-0"
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'User "{username}" not found, run generate_data or use --user.'
+            )
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        self.authorization = f"Bearer {token}"
+        self.latency = options["db_latency"] / 1000
+
+        results = []
+        connection_created.connect(self.install_latency)
+        for alias in connections:
+            self.install_latency(connections[alias])
+        try:
+            # host of the requests
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                for endpoint in options["endpoint"]:
+                    for concurrency in options["concurrency"]:
+                        for mode in options["mode"]:
+                            result = self.benchmark(mode, endpoint, concurrency)
+                            results.append(result)
+                            self.write_result(result)
+        finally:
+            connection_created.disconnect(self.install_latency)
+            for alias in connections:
+                if self.add_latency in connections[alias].execute_wrappers:
+                    connections[alias].execute_wrappers.remove(self.add_latency)
+
+        if options["output"]:
+            report = {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "database": connection.vendor,
+                "db_latency_ms": options["db_latency"],
+                "wsgi_threads": options["threads"],
+                "python": platform.python_version(),
+                "results": results,
+            }
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def add_latency(self, execute, sql, params, many, context):
+        # blocks the thread like a network round trip
+        sleep(self.latency)
+
+        return execute(sql, params, many, context)
+
+    def install_latency(self, connection, **kwargs):
+        # appended : the delay is counted in the queries time by
+        # SoftDesk.instrumentation
+        if self.latency and self.add_latency not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self.add_latency)
+
+    def benchmark(self, mode, endpoint, concurrency):
+        path = reverse(MODES[mode].format(endpoint))
+        # each client sends its requests one after the other
+        total = self.options["requests"]
+        counts = [
+            total // concurrency + (index < total % concurrency)
+            for index in range(concurrency)
+        ]
+
+        if mode == "wsgi":
+            timings, statuses, elapsed = self.run_wsgi(path, counts)
+        else:
+            timings, statuses, elapsed = asyncio.run(self.run_asgi(path, counts))
+        timings.sort()
+
+        return {
+            "mode": mode,
+            "endpoint": endpoint,
+            "url": path,
+            "concurrency": concurrency,
+            "requests": len(timings),
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "throughput_rps": len(timings) / elapsed,
+            "p50_ms": percentile(timings, 50) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "p99_ms": percentile(timings, 99) * 1000,
+        }
+
+    def wsgi_request(self, handler, path):
+        environ = {
+            "PATH_INFO": path,
+            "HTTP_HOST": "testserver",
+            "HTTP_AUTHORIZATION": self.authorization,
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        response = handler(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            # sends request_finished, which closes the database connection
+            response.close()
+
+        return statuses[0]
+
+    def run_wsgi(self, path, counts):
+        """the clients wait for the threads of the worker, the latencies include
+        the time spent in the queue"""
+
+        handler = WSGIHandler()
+        self.wsgi_request(handler, path)
+        timings = []
+        statuses = Counter()
+
+        with ThreadPoolExecutor(self.options["threads"]) as worker:
+
+            def client(count):
+                for _ in range(count):
+                    start = perf_counter()
+                    status = worker.submit(self.wsgi_request, handler, path).result()
+                    timings.append(perf_counter() - start)
+                    statuses[status] += 1
+
+            clients = [Thread(target=client, args=(count,)) for count in counts]
+            start = perf_counter()
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+            elapsed = perf_counter() - start
+
+        return timings, statuses, elapsed
+
+    async def asgi_request(self, application, path):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", self.authorization.encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        status = None
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await application(scope, receive, send)
+
+        return status
+
+    async def run_asgi(self, path, counts):
+        """one event loop, as a single ASGI worker (uvicorn, daphne)"""
+
+        application = ASGIHandler()
+        await self.asgi_request(application, path)
+        timings = []
+        statuses = Counter()
+
+        async def client(count):
+            for _ in range(count):
+                start = perf_counter()
+                status = await self.asgi_request(application, path)
+                timings.append(perf_counter() - start)
+                statuses[status] += 1
+
+        start = perf_counter()
+        await asyncio.gather(*[client(count) for count in counts])
+
+        return timings, statuses, perf_counter() - start
+
+    def write_result(self, result):
+        self.stdout.write(
+            f"{result['mode']:<9} {result['endpoint']:<8} "
+            f"concurrency={result['concurrency']:<4} "
+            f"rps={result['throughput_rps']:7.1f}  "
+            f"p50={result['p50_ms']:7.1f} ms  "
+            f"p95={result['p95_ms']:7.1f} ms  "
+            f"p99={result['p99_ms']:7.1f} ms  "
+            f"status={','.join(result['statuses'])}"
+        )
@@ -0,0 +1,152 @@
+import json
+import platform
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from project.models import Project, Contributor, Issue, Comment
+
+# indexes of the contributor-scoped filters (migration 0014), dropped in a
+# rolled back transaction to get the plans without them
+SCOPING_INDEXES = (
+    "contributor_project_idx",
+    "issue_project_created_idx",
+    "issue_project_status_idx",
+    "issue_priority_idx",
+    "comment_issue_created_idx",
+    "project_name_idx",
+    "project_category_idx",
+    "project_active_author_idx",
+)
+PAGE_SIZE = 10
+# order of the keyset pagination (project.pagination)
+KEYSET_ORDER = ("-created_time", "-id")
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the query plans (EXPLAIN) and the median durations of the "
+        "contributor-scoped queries of the project viewsets, without the indexes "
+        "of the scoping filters (before) and with them (after). Run generate_data "
+        "first, e.g. generate_data --issues 1000000 --comments 2000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="median of N runs")
+        parser.add_argument(
+            "--plans", action="store_true", help="print the query plans"
+        )
+        parser.add_argument("--output", help="write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        self.options = options
+        queries = self.get_queries()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in SCOPING_INDEXES:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+            before = self.measure(queries)
+            transaction.set_rollback(True)
+        after = self.measure(queries)
+
+        results = []
+        for name in queries:
+            result = {"query": name, "before": before[name], "after": after[name]}
+            results.append(result)
+            self.write_result(result)
+
+        if options["output"]:
+            report = {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "issues": Issue.objects.count(),
+                "comments": Comment.objects.count(),
+                "results": results,
+            }
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def get_queries(self) -> dict:
+        """the filters of project.views for the user contributing to the most
+        projects and its largest project and issue"""
+
+        member = (
+            Contributor.objects.values("contributor")
+            .annotate(projects=Count("pk"))
+            .order_by("-projects")
+            .first()
+        )
+        if member is None:
+            raise CommandError("No contributor, run generate_data first.")
+        user_id = member["contributor"]
+        project = Project.objects.order_by("-issue_count").first()
+        issue = Issue.objects.order_by("-comment_count").first()
+        contributed = Contributor.objects.filter(
+            contributor=user_id, project__is_active=True
+        ).values_list("project_id", flat=True)
+        # the views read the contributed projects from the membership cache
+        project_ids = list(contributed)
+
+        return {
+            "contributed projects": contributed,
+            "project members": Contributor.objects.filter(project=project),
+            "author contributors": Contributor.objects.filter(
+                project__author=user_id, project__is_active=True
+            ),
+            "project by name": Project.objects.filter(name=project.name),
+            "projects by category": Project.objects.filter(
+                id__in=project_ids, category__in=["Back-end", "iOS"]
+            ),
+            "contributed issues": Issue.objects.filter(
+                project__in=project_ids
+            ).order_by(*KEYSET_ORDER)[:PAGE_SIZE],
+            "project issues": Issue.objects.filter(project=project).order_by(
+                *KEYSET_ORDER
+            )[:PAGE_SIZE],
+            "open issues": Issue.objects.filter(
+                project=project, status__in=["To Do", "In Progress"]
+            )[:PAGE_SIZE],
+            "issues by priority": Issue.objects.filter(
+                project__in=project_ids, priority="High"
+            )[:PAGE_SIZE],
+            "issue comments": Comment.objects.filter(issue=issue).order_by(
+                *KEYSET_ORDER
+            )[:PAGE_SIZE],
+            "contributed comments": Comment.objects.filter(
+                issue__project__in=project_ids
+            ).order_by(*KEYSET_ORDER)[:PAGE_SIZE],
+        }
+
+    def measure(self, queries) -> dict:
+        results = {}
+        for name, queryset in queries.items():
+            durations = []
+            for _ in range(self.options["repeat"]):
+                start = perf_counter()
+                list(queryset.all())
+                durations.append(perf_counter() - start)
+            results[name] = {
+                "plan": queryset.explain(),
+                "median_ms": median(durations) * 1000,
+            }
+
+        return results
+
+    def write_result(self, result):
+        before, after = result["before"], result["after"]
+        self.stdout.write(
+            f"{result['query']:<22} before={before['median_ms']:9.2f} ms  "
+            f"after={after['median_ms']:9.2f} ms"
+        )
+        if self.options["plans"]:
+            for label in ("before", "after"):
+                self.stdout.write(f"  {label}:")
+                for line in result[label]["plan"].splitlines():
+                    self.stdout.write(f"    {line}")
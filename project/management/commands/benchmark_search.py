@@ -0,0 +1,117 @@
+import json
+import platform
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from project.models import Contributor, Issue, Comment
+from project.search import search, scan
+from project.views import IssueViewset, CommentViewset
+
+PAGE_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the search action of the issue and comment viewsets (count and "
+        "first page of the ranked results, scoped to the projects of the most "
+        "active contributor) with the full-text index and with a scan of the "
+        "rows (icontains, the path of the databases without index). Run "
+        "generate_data first, e.g. generate_data --issues 1000000 --comments "
+        "1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query",
+            nargs="+",
+            default=["api", "cache index", "mobile android lent", "4242"],
+            help="searched words, one argument per query (numbers are rare words)",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="median of N runs")
+        parser.add_argument(
+            "--skip-scan", action="store_true", help="only time the full-text index"
+        )
+        parser.add_argument("--output", help="write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        member = (
+            Contributor.objects.values("contributor")
+            .annotate(projects=Count("pk"))
+            .order_by("-projects")
+            .first()
+        )
+        if member is None:
+            raise CommandError("No contributor, run generate_data first.")
+        # the views read the contributed projects from the membership cache
+        project_ids = list(
+            Contributor.objects.filter(
+                contributor=member["contributor"], project__is_active=True
+            ).values_list("project_id", flat=True)
+        )
+        scopes = {
+            "issue": (
+                Issue.objects.filter(project__in=project_ids),
+                IssueViewset.search_fields,
+            ),
+            "comment": (
+                Comment.objects.filter(issue__project__in=project_ids),
+                CommentViewset.search_fields,
+            ),
+        }
+        methods = {"index": search, "scan": scan}
+        if options["skip_scan"]:
+            del methods["scan"]
+
+        results = []
+        for model_name, (queryset, fields) in scopes.items():
+            for query in options["query"]:
+                terms = query.split()
+                result = {"model": model_name, "query": query}
+                for method, function in methods.items():
+                    result[method] = self.measure(
+                        function, queryset, terms, fields, options["repeat"]
+                    )
+                results.append(result)
+                self.write_result(result)
+
+        if options["output"]:
+            report = {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "issues": Issue.objects.count(),
+                "comments": Comment.objects.count(),
+                "scoped_projects": len(project_ids),
+                "results": results,
+            }
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def measure(self, function, queryset, terms, fields, repeat) -> dict:
+        """the queries of a paginated search request"""
+
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            results = function(queryset, terms, fields)
+            count = results.count()
+            list(results[:PAGE_SIZE])
+            durations.append(perf_counter() - start)
+
+        return {"count": count, "median_ms": median(durations) * 1000}
+
+    def write_result(self, result):
+        line = f"{result['model']:<8} {result['query']!r:<24}"
+        for method in ("index", "scan"):
+            if method in result:
+                line += (
+                    f" {method}={result[method]['median_ms']:9.1f} ms "
+                    f"({result[method]['count']} rows)"
+                )
+        self.stdout.write(line)
@@ -0,0 +1,150 @@
+from datetime import date
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from SoftDesk.renderers import FastJSONRenderer, orjson
+from project.models import Project, Contributor, Issue, Comment
+from project.serializers import (
+    FastRepresentationMixin,
+    ProjectSerializer,
+    IssueSerializer,
+    CommentSerializer,
+)
+
+ISSUES_PER_PROJECT = 10
+COMMENTS_PER_ISSUE = 2
+# select the rows created by the command
+BENCHMARK_FILTERS = {
+    Project: {"name__startswith": "benchmark-"},
+    Issue: {"name__startswith": "benchmark-"},
+    Comment: {"issue__name__startswith": "benchmark-"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the fast representation of the project, issue and comment list "
+        "serializers with the DRF fields, and FastJSONRenderer with JSONRenderer, "
+        "on rows created in a rolled back transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000, 10000],
+            help="number of issues (and comments) serialized by each benchmark",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="best time of N runs")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed, the renderers are the same")
+
+        for rows in options["rows"]:
+            with transaction.atomic():
+                self.create_rows(rows)
+                scenarios = [
+                    ("project", ProjectSerializer, rows // ISSUES_PER_PROJECT),
+                    ("issue", IssueSerializer, rows),
+                    ("comment", CommentSerializer, rows),
+                ]
+                for name, serializer_class, count in scenarios:
+                    self.benchmark(name, serializer_class, count, options["repeat"])
+                transaction.set_rollback(True)
+
+    def create_rows(self, rows):
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(
+                username=f"benchmark-{index}",
+                birthdate=date(1990, 1, 1),
+                can_be_contacted=False,
+                can_data_be_shared=False,
+            )
+            for index in range(3)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"benchmark-{index}", author=users[0], category="Back-end")
+            for index in range(max(rows // ISSUES_PER_PROJECT, 1))
+        )
+        Contributor.objects.bulk_create(
+            Contributor(project=project, contributor=user)
+            for project in projects
+            for user in users
+        )
+        issues = Issue.objects.bulk_create(
+            Issue(
+                project=projects[index // ISSUES_PER_PROJECT],
+                author=users[index % 3],
+                assigned_to=users[(index + 1) % 3],
+                name=f"benchmark-{index}",
+                description="description " * 10,
+                priority="Low",
+                category="Bug",
+            )
+            for index in range(rows)
+        )
+        Comment.objects.bulk_create(
+            Comment(issue=issue, author=users[index % 3], description="comment " * 10)
+            for issue in issues
+            for index in range(COMMENTS_PER_ISSUE)
+        )
+
+    def benchmark(self, name, serializer_class, count, repeat):
+        model = serializer_class.Meta.model
+        queryset = model.objects.filter(**BENCHMARK_FILTERS[model])
+        instances = list(
+            serializer_class.setup_eager_loading(queryset).order_by("id")[:count]
+        )
+
+        timings = {}
+        outputs = {}
+        for fast in (False, True):
+            FastRepresentationMixin.fast_representation = fast
+            try:
+                best = None
+                for _ in range(repeat):
+                    start = perf_counter()
+                    data = serializer_class(instances, many=True).data
+                    elapsed = perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+            finally:
+                FastRepresentationMixin.fast_representation = True
+            timings[fast] = best
+            outputs[fast] = JSONRenderer().render(data)
+
+        self.write_result(
+            f"{name} serializer", len(instances), timings, outputs[False], outputs[True]
+        )
+
+        # render the same representation with both renderers
+        renderers = {False: JSONRenderer(), True: FastJSONRenderer()}
+        timings = {}
+        for fast, renderer in renderers.items():
+            best = None
+            for _ in range(repeat):
+                start = perf_counter()
+                outputs[fast] = renderer.render(data)
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[fast] = best
+
+        self.write_result(
+            f"{name} renderer", len(instances), timings, outputs[False], outputs[True]
+        )
+
+    def write_result(self, name, rows, timings, drf_output, fast_output):
+        self.stdout.write(
+            f"{name:<20} rows={rows:<6} "
+            f"drf={timings[False] * 1000:8.1f} ms  "
+            f"fast={timings[True] * 1000:8.1f} ms  "
+            f"speedup=x{timings[False] / timings[True]:.1f}  "
+            f"identical={drf_output == fast_output}  "
+            f"size={len(fast_output) / 1024:.0f} KiB"
+        )
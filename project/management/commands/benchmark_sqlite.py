@@ -0,0 +1,239 @@
+import json
+import os
+import platform
+import sqlite3
+from datetime import datetime
+from random import Random
+from tempfile import TemporaryDirectory
+from threading import Barrier, Event, Thread
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.utils import timezone
+
+from project.management.commands.benchmark_api import percentile
+
+PROFILES = {
+    # SQLite defaults : rollback journal, fsync at each commit, deferred
+    # transactions (the shipped django.db.backends.sqlite3 configuration)
+    "default": {"pragmas": {"journal_mode": "delete"}},
+    # the SQLITE_OPTIONS setting
+    "tuned": settings.SQLITE_OPTIONS,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress a copy of the SQLite database with concurrent writers creating "
+        "issues (a read, then the writes of the API, in one transaction) and "
+        "readers listing them, for each pragma profile : the default SQLite "
+        "configuration and the SQLITE_OPTIONS setting. Reports the write "
+        "throughput, the latencies and the 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--transactions", type=int, default=100, help="per writer")
+        parser.add_argument("--readers", type=int, default=2)
+        parser.add_argument(
+            "--profile", nargs="+", choices=list(PROFILES), default=list(PROFILES)
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        self.options = options
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != "sqlite" or source.is_in_memory_db():
+            raise CommandError("The default database is not a SQLite file.")
+
+        results = []
+        with TemporaryDirectory() as directory:
+            for profile in options["profile"]:
+                path = os.path.join(directory, f"{profile}.sqlite3")
+                self.copy_database(source.settings_dict["NAME"], path)
+                result = self.benchmark(profile, path)
+                results.append(result)
+                self.write_result(result)
+
+        if options["output"]:
+            report = {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "results": results,
+            }
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def copy_database(self, source_path, path):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def benchmark(self, profile, path):
+        alias = f"benchmark_{profile}"
+        connections.settings[alias] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            "ENGINE": "SoftDesk.sqlite_backend",
+            "NAME": path,
+            "OPTIONS": PROFILES[profile],
+            "CONN_MAX_AGE": 0,
+        }
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT id, author_id FROM project_project")
+                projects = cursor.fetchall()
+            connections[alias].close()
+            if not projects:
+                raise CommandError("No project to stress, run generate_data first.")
+
+            return self.run(profile, alias, projects)
+        finally:
+            del connections.settings[alias]
+
+    def run(self, profile, alias, projects):
+        writers = self.options["writers"]
+        timings = []
+        # list.append() is atomic : the threads count without a lock
+        write_errors = []
+        read_errors = []
+        reads = []
+        done = Event()
+        # the threads start together, after opening their connection
+        barrier = Barrier(writers + self.options["readers"] + 1)
+
+        def writer(index):
+            rng = Random(self.options["seed"] + index)
+            connection = connections[alias]
+            connection.ensure_connection()
+            barrier.wait()
+            try:
+                for _ in range(self.options["transactions"]):
+                    start = perf_counter()
+                    try:
+                        self.create_issue(alias, rng.choice(projects))
+                    except OperationalError:
+                        write_errors.append(1)
+                    else:
+                        timings.append(perf_counter() - start)
+            finally:
+                connection.close()
+
+        def reader(index):
+            rng = Random(-1 - index)
+            connection = connections[alias]
+            connection.ensure_connection()
+            barrier.wait()
+            try:
+                while not done.is_set():
+                    try:
+                        self.list_issues(alias, rng.choice(projects)[0])
+                    except OperationalError:
+                        read_errors.append(1)
+                    else:
+                        reads.append(1)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=writer, args=(index,)) for index in range(writers)]
+        readers = [
+            Thread(target=reader, args=(index,))
+            for index in range(self.options["readers"])
+        ]
+        for thread in threads + readers:
+            thread.start()
+        barrier.wait()
+        start = perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        done.set()
+        for thread in readers:
+            thread.join()
+        timings.sort()
+
+        attempts = writers * self.options["transactions"]
+
+        return {
+            "profile": profile,
+            "options": PROFILES[profile],
+            "writers": writers,
+            "readers": self.options["readers"],
+            "transactions": len(timings),
+            "write_errors": len(write_errors),
+            "write_error_rate": len(write_errors) / attempts,
+            "writes_per_second": len(timings) / elapsed,
+            "reads_per_second": len(reads) / elapsed,
+            "read_errors": len(read_errors),
+            "p50_ms": percentile(timings, 50) * 1000 if timings else None,
+            "p95_ms": percentile(timings, 95) * 1000 if timings else None,
+            "p99_ms": percentile(timings, 99) * 1000 if timings else None,
+        }
+
+    def create_issue(self, alias, project):
+        """the queries of an issue creation by the API, in one transaction"""
+
+        project_id, author_id = project
+        now = timezone.now()
+        with transaction.atomic(using=alias):
+            with connections[alias].cursor() as cursor:
+                # validation of the project
+                cursor.execute(
+                    "SELECT id FROM project_project WHERE id = %s", [project_id]
+                )
+                cursor.execute(
+                    "UPDATE project_syncsequence SET value = value + 1 WHERE id = 1"
+                )
+                cursor.execute("SELECT value FROM project_syncsequence WHERE id = 1")
+                row = cursor.fetchone()
+                cursor.execute(
+                    "INSERT INTO project_issue (name, description, status, "
+                    "priority, category, created_time, updated_time, author_id, "
+                    "project_id, sync_version) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    [
+                        "benchmark issue",
+                        "issue created by benchmark_sqlite",
+                        "To Do",
+                        "Low",
+                        "Bug",
+                        now,
+                        now,
+                        author_id,
+                        project_id,
+                        row[0] if row else None,
+                    ],
+                )
+                cursor.execute(
+                    "UPDATE project_project SET updated_time = %s WHERE id = %s",
+                    [now, project_id],
+                )
+
+    def list_issues(self, alias, project_id):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT id, name, status, updated_time FROM project_issue "
+                "WHERE project_id = %s ORDER BY created_time DESC LIMIT 20",
+                [project_id],
+            )
+            cursor.fetchall()
+
+    def write_result(self, result):
+        self.stdout.write(
+            f"{result['profile']:<8} writers={result['writers']:<3} "
+            f"readers={result['readers']:<3} "
+            f"writes/s={result['writes_per_second']:8.1f}  "
+            f"locked={result['write_errors']} "
+            f"({result['write_error_rate']:.1%})  "
+            f"reads/s={result['reads_per_second']:8.1f}  "
+            f"p50={result['p50_ms'] or 0:7.1f} ms  "
+            f"p99={result['p99_ms'] or 0:7.1f} ms"
+        )
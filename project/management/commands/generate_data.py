@@ -0,0 +1,262 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate, islice
+from random import Random
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from project.counters import recount_issues, recount_projects
+from project.models import Project, Contributor, Issue, Comment, set_sync_versions
+
+WORDS = (
+    "api bug crash login logout token page liste projet issue commentaire "
+    "erreur serveur base données lent rapide cache index requête réponse "
+    "mobile android ios front back export recherche filtre tri pagination "
+    "image profil mot passe utilisateur contributeur statut priorité tâche"
+).split()
+STATUSES = {"To Do": 5, "In Progress": 3, "Finished": 2}
+PRIORITIES = {"Low": 5, "Medium": 3, "High": 1}
+ISSUE_CATEGORIES = {"Bug": 5, "Feature": 3, "Task": 2}
+PROJECT_CATEGORIES = ("Back-end", "Front-end", "iOS", "Android")
+
+
+@lru_cache(maxsize=8)
+def zipf_weights(count, skew):
+    """cumulative weights of a Zipf distribution : the rank n is chosen
+    1 / n ** skew times as often as the first one"""
+
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset with bulk inserts : a few users author and "
+        "contribute to most of the projects, a few projects get most of the "
+        "issues and a few issues most of the comments (Zipf distributions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--projects", type=int, default=200)
+        parser.add_argument(
+            "--contributors",
+            type=int,
+            default=8,
+            help="average number of contributors per project",
+        )
+        parser.add_argument("--issues", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=50000)
+        parser.add_argument(
+            "--skew", type=float, default=1.1, help="exponent of the distributions"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="prefix of the usernames and project names",
+        )
+        parser.add_argument(
+            "--password", default="synthetic-password", help="password of the users"
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["projects"] < 1:
+            raise CommandError("At least one user and one project are required.")
+        if (
+            get_user_model()
+            .objects.filter(username__startswith=f"{options['prefix']}-")
+            .exists()
+        ):
+            raise CommandError(
+                f"Users prefixed with \"{options['prefix']}-\" already exist, "
+                "use another --prefix."
+            )
+
+        self.rng = Random(options["seed"])
+        self.skew = options["skew"]
+        self.prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+
+        start = perf_counter()
+        with transaction.atomic():
+            users = self.create_users(options["users"], options["password"])
+            projects = self.create_projects(options["projects"], users)
+            members = self.create_contributors(projects, users, options["contributors"])
+            issues = self.create_issues(options["issues"], projects, members)
+            self.create_comments(options["comments"], issues, members)
+            # bulk_create() does not send the signals maintaining the counters
+            for batch in batched([issue_id for issue_id, _ in issues], self.batch_size):
+                recount_issues(batch)
+            for batch in batched([pk for pk, _ in projects], self.batch_size):
+                recount_projects(batch)
+
+        self.stdout.write(
+            f"{len(users)} users (and {self.prefix}-admin), {len(projects)} "
+            f"projects, {sum(map(len, members))} contributors, {len(issues)} "
+            f"issues, {options['comments']} comments created in "
+            f"{perf_counter() - start:.1f} s"
+        )
+
+    def choose(self, population, count):
+        """return count elements, the first ones are the most frequent"""
+
+        weights = zipf_weights(len(population), self.skew)
+
+        return self.rng.choices(population, cum_weights=weights, k=count)
+
+    def text(self, minimum, maximum):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(minimum, maximum)))
+
+    def weighted(self, choices):
+        return self.rng.choices(list(choices), weights=list(choices.values()))[0]
+
+    def create_users(self, count, password):
+        User = get_user_model()
+        # the password is hashed once for all the users
+        password = make_password(password)
+        users = [
+            User(
+                username=f"{self.prefix}-{index}",
+                email=f"{self.prefix}-{index}@example.com",
+                first_name=f"Prénom {index}",
+                last_name=f"Nom {index}",
+                password=password,
+                birthdate=date(1960, 1, 1)
+                + timedelta(days=self.rng.randrange(365 * 45)),
+                can_be_contacted=self.rng.random() < 0.5,
+                can_data_be_shared=self.rng.random() < 0.9,
+            )
+            for index in range(count)
+        ]
+        users.append(
+            User(
+                username=f"{self.prefix}-admin",
+                email=f"{self.prefix}-admin@example.com",
+                password=password,
+                birthdate=date(1980, 1, 1),
+                can_be_contacted=True,
+                can_data_be_shared=True,
+                is_staff=True,
+                is_superuser=True,
+            )
+        )
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        # the primary keys are not returned by every database
+        return list(
+            User.objects.filter(username__startswith=f"{self.prefix}-")
+            .exclude(username=f"{self.prefix}-admin")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def create_projects(self, count, users):
+        authors = self.choose(users, count)
+        projects = []
+        for index, author_id in enumerate(authors):
+            name = f"{self.prefix}-{index} {self.text(1, 3)}"
+            projects.append(
+                Project(
+                    author_id=author_id,
+                    name=name,
+                    slug_name=slugify(name),
+                    description=self.text(10, 60),
+                    category=self.rng.choice(PROJECT_CATEGORIES),
+                )
+            )
+        Project.objects.bulk_create(
+            set_sync_versions(projects), batch_size=self.batch_size
+        )
+
+        return list(
+            Project.objects.filter(name__startswith=f"{self.prefix}-")
+            .order_by("id")
+            .values_list("id", "author_id")
+        )
+
+    def create_contributors(self, projects, users, average):
+        """return the contributors (user ids) of each project, the author first"""
+
+        members = []
+        for _, author_id in projects:
+            size = min(len(users), max(1, round(self.rng.expovariate(1 / average))))
+            project_members = {author_id: None}
+            project_members.update(dict.fromkeys(self.choose(users, size)))
+            members.append(list(project_members))
+
+        contributors = (
+            Contributor(project_id=project_id, contributor_id=user_id)
+            for (project_id, _), project_members in zip(projects, members)
+            for user_id in project_members
+        )
+        for batch in batched(contributors, self.batch_size):
+            Contributor.objects.bulk_create(set_sync_versions(batch))
+
+        return members
+
+    def create_issues(self, count, projects, members):
+        """return the project index of each issue, ordered by id"""
+
+        project_indexes = self.choose(range(len(projects)), count)
+        # the issues are created project by project, in the order of the ids
+        project_indexes.sort()
+
+        def build():
+            for index, project_index in enumerate(project_indexes):
+                project_members = members[project_index]
+                yield Issue(
+                    project_id=projects[project_index][0],
+                    author_id=self.rng.choice(project_members),
+                    assigned_to_id=(
+                        self.rng.choice(project_members)
+                        if self.rng.random() < 0.8
+                        else None
+                    ),
+                    name=f"{self.prefix}-{index} {self.text(2, 6)}",
+                    description=self.text(5, 80),
+                    status=self.weighted(STATUSES),
+                    priority=self.weighted(PRIORITIES),
+                    category=self.weighted(ISSUE_CATEGORIES),
+                )
+
+        for batch in batched(build(), self.batch_size):
+            Issue.objects.bulk_create(set_sync_versions(batch))
+
+        issue_ids = list(
+            Issue.objects.filter(project__name__startswith=f"{self.prefix}-")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        return list(zip(issue_ids, project_indexes))
+
+    def create_comments(self, count, issues, members):
+        if not issues:
+            return
+
+        # the most commented issues are spread over the projects
+        ranked_issues = issues[:]
+        self.rng.shuffle(ranked_issues)
+
+        def build():
+            for issue_id, project_index in self.choose(ranked_issues, count):
+                yield Comment(
+                    issue_id=issue_id,
+                    author_id=self.rng.choice(members[project_index]),
+                    description=self.text(3, 40),
+                )
+
+        for batch in batched(build(), self.batch_size):
+            Comment.objects.bulk_create(set_sync_versions(batch))
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from project.models import SyncSequence, Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones of the rows deleted more than --days days ago. "
+        "The clients of /api/sync/ with an older watermark get a full sync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90)
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - timedelta(days=options["days"])
+
+        with transaction.atomic():
+            sequence, _ = SyncSequence.objects.select_for_update().get_or_create(pk=1)
+            tombstones = Tombstone.objects.filter(deleted_time__lt=limit)
+            pruned_value = tombstones.aggregate(Max("sync_version"))[
+                "sync_version__max"
+            ]
+            if pruned_value is None:
+                self.stdout.write("no tombstone to delete")
+                return
+
+            # the tombstones of the lower versions, deleted in the same time
+            count, _ = Tombstone.objects.filter(sync_version__lte=pruned_value).delete()
+            sequence.pruned_value = max(sequence.pruned_value, pruned_value)
+            sequence.save(update_fields=["pruned_value"])
+
+        self.stdout.write(
+            f"{count} tombstones deleted, sync watermarks before "
+            f"{sequence.pruned_value} are reset"
+        )
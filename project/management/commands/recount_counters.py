@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from project.counters import recount_issues, recount_projects
+from project.models import Project, Issue
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the activity counters of the projects (issues per status, "
+        "comments) and of the issues (comments, last comment time) in batches "
+        "of --batch-size rows, each one in its own transaction, and repair the "
+        "counters which drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="report the drift without repairing"
+        )
+
+    def handle(self, *args, **options):
+        save = not options["dry_run"]
+        for model, recount in ((Issue, recount_issues), (Project, recount_projects)):
+            checked = drifted = 0
+            last_id = 0
+            while True:
+                # keyset pagination : the batches do not slow down with the offset
+                ids = list(
+                    model.objects.filter(pk__gt=last_id)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[: options["batch_size"]]
+                )
+                if not ids:
+                    break
+
+                with transaction.atomic():
+                    drifted += len(recount(ids, save=save))
+                checked += len(ids)
+                last_id = ids[-1]
+
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural} : {checked} checked, {drifted} "
+                f"{'drifted' if options['dry_run'] else 'repaired'}"
+            )
@@ -0,0 +1,53 @@
+import sqlite3
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Stand-in for the replication of a database server : copy the SQLite "
+        "primary database to the SQLite replicas of DATABASE_REPLICAS every "
+        "--interval seconds (the replication lag), with the SQLite online "
+        "backup API. The readers of a replica wait for the end of a copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="seconds between copies"
+        )
+        parser.add_argument("--once", action="store_true", help="copy and exit")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = [settings.DATABASES[alias] for alias in settings.DATABASE_REPLICAS]
+        if not replicas:
+            raise CommandError(
+                "No replica, set the DATABASE_REPLICA environment variable."
+            )
+        for alias in (DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS):
+            if connections[alias].vendor != "sqlite":
+                raise CommandError("Only the SQLite databases can be copied.")
+
+        while True:
+            start = perf_counter()
+            source = sqlite3.connect(primary["NAME"])
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(replica["NAME"], timeout=30)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(
+                f"{len(replicas)} replicas copied in "
+                f"{(perf_counter() - start) * 1000:.1f} ms"
+            )
+
+            if options["once"]:
+                return
+            sleep(options["interval"])
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from project.models import Contributor
+
+CACHE_KEY = "membership:{}"
+# bounds the staleness of the shared cache if an invalidation is missed
+CACHE_TIMEOUT = 60 * 5
+
+
+def get_memo(request) -> dict:
+    """return the contributed projects memoized on the request by user id"""
+
+    memo = getattr(request, "_contributed_project_ids", None)
+    if memo is None:
+        memo = {}
+        if request is not None:
+            request._contributed_project_ids = memo
+
+    return memo
+
+
+def get_contributions(user):
+    # shared by the requests through the cache : read from the primary, a
+    # replica may lag behind (SoftDesk.db_routers)
+    return (
+        Contributor.objects.using(DEFAULT_DB_ALIAS)
+        .filter(contributor=user.pk, project__is_active=True)
+        .values_list("project_id", flat=True)
+    )
+
+
+def get_contributed_project_ids(user, request=None) -> frozenset:
+    """return the ids of the active projects where the user is a contributor.
+    The result is memoized on the request and kept in the shared cache until a
+    Contributor or a Project.is_active change invalidates it (see project.signals)"""
+
+    if user is None or user.pk is None:
+        return frozenset()
+
+    memo = get_memo(request)
+    if user.pk in memo:
+        return memo[user.pk]
+
+    key = CACHE_KEY.format(user.pk)
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = frozenset(get_contributions(user))
+        cache.set(key, project_ids, CACHE_TIMEOUT)
+
+    memo[user.pk] = project_ids
+
+    return project_ids
+
+
+async def aget_contributed_project_ids(user, request=None) -> frozenset:
+    """async variant of get_contributed_project_ids(), the async views call it
+    first so the permissions and the querysets read the memo"""
+
+    if user is None or user.pk is None:
+        return frozenset()
+
+    memo = get_memo(request)
+    if user.pk in memo:
+        return memo[user.pk]
+
+    key = CACHE_KEY.format(user.pk)
+    project_ids = await cache.aget(key)
+    if project_ids is None:
+        project_ids = frozenset([pk async for pk in get_contributions(user)])
+        await cache.aset(key, project_ids, CACHE_TIMEOUT)
+
+    memo[user.pk] = project_ids
+
+    return project_ids
+
+
+def is_contributor(user, project, request=None) -> bool:
+    """return True if the user is a contributor to the active project"""
+
+    return project.pk in get_contributed_project_ids(user, request)
+
+
+def invalidate_membership(*user_ids):
+    """forget the contributed projects of the users after the commit : a request
+    reading them before would cache the previous membership again"""
+
+    keys = [CACHE_KEY.format(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,40 @@
+from uuid import uuid4
+
+from django.db import migrations, models
+
+
+def generate_uuids(apps, schema_editor):
+    Comment = apps.get_model("project", "Comment")
+    comments = list(Comment.objects.only("id"))
+    for comment in comments:
+        comment.uuid = uuid4()
+    Comment.objects.bulk_update(comments, ["uuid"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0014_scoping_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="comment",
+            name="issue_url",
+        ),
+        migrations.RemoveField(
+            model_name="comment",
+            name="uuid",
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(generate_uuids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="comment",
+            name="uuid",
+            field=models.UUIDField(default=uuid4, editable=False, unique=True),
+        ),
+    ]
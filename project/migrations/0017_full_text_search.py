@@ -0,0 +1,93 @@
+from django.db import migrations
+
+# the full-text indexes are maintained by the database (triggers or generated
+# columns), so the bulk queries and the cascade deletions keep them in sync.
+# On SQLite, a migration remaking one of these tables drops its triggers : the
+# migration has to create them again.
+SEARCH_INDEXES = {
+    "project_issue": ("name", "description"),
+    "project_comment": ("description",),
+}
+
+SQLITE_TRIGGERS = """
+CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new});
+END;
+CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+    VALUES ('delete', old.id, {old});
+END;
+CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {columns} ON {table} BEGIN
+    INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+    VALUES ('delete', old.id, {old});
+    INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new});
+END;
+"""
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+
+    with connection.cursor() as cursor:
+        for table, columns in SEARCH_INDEXES.items():
+            if connection.vendor == "sqlite":
+                # external content FTS5 table : only the index is stored
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                    f"{', '.join(columns)}, content='{table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                )
+                triggers = SQLITE_TRIGGERS.format(
+                    table=table,
+                    columns=", ".join(columns),
+                    new=", ".join(f"new.{column}" for column in columns),
+                    old=", ".join(f"old.{column}" for column in columns),
+                )
+                for statement in triggers.split("END;")[:-1]:
+                    cursor.execute(statement + "END;")
+                cursor.execute(
+                    f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+                )
+
+            elif connection.vendor == "postgresql":
+                # the first column (the name) weighs more in the ranking
+                vector = " || ".join(
+                    f"setweight(to_tsvector('simple', coalesce({column}, '')), "
+                    f"'{weight}')"
+                    for column, weight in zip(columns, "AB")
+                )
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({vector}) STORED"
+                )
+                cursor.execute(
+                    f"CREATE INDEX {table}_search_idx ON {table} "
+                    f"USING GIN (search_vector)"
+                )
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+
+    with connection.cursor() as cursor:
+        for table in SEARCH_INDEXES:
+            if connection.vendor == "sqlite":
+                for trigger in ("insert", "delete", "update"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector"
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0016_updated_time"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:51
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+# the existing rows are numbered in this order, without gap between the tables
+SYNC_MODELS = ("Project", "Contributor", "Issue", "Comment")
+
+
+def number_rows(apps, schema_editor):
+    """give a distinct version to the existing rows and start the counter after
+    them"""
+
+    offset = 0
+    for name in SYNC_MODELS:
+        model = apps.get_model("project", name)
+        model.objects.update(sync_version=F("id") + offset)
+        offset += model.objects.aggregate(last=Max("id"))["last"] or 0
+
+    apps.get_model("project", "SyncSequence").objects.create(pk=1, value=offset)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0017_full_text_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                ("pruned_value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="contributor",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=32)),
+                ("object_id", models.BigIntegerField()),
+                ("project_id", models.BigIntegerField()),
+                ("user_id", models.BigIntegerField(null=True)),
+                ("sync_version", models.BigIntegerField(unique=True)),
+                ("deleted_time", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["deleted_time"], name="tombstone_deleted_time_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(number_rows, migrations.RunPython.noop),
+    ]
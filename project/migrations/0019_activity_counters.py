@@ -0,0 +1,126 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:12
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+# the issue table is remade by SQLite to add the columns, which drops its
+# full-text search triggers
+full_text_search = import_module("project.migrations.0017_full_text_search")
+
+STATUS_COUNTERS = {
+    "To Do": "todo_issue_count",
+    "In Progress": "in_progress_issue_count",
+    "Finished": "finished_issue_count",
+}
+
+
+class SubqueryCount(Subquery):
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = models.IntegerField()
+
+
+def create_search_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+
+    table = "project_issue"
+    columns = full_text_search.SEARCH_INDEXES[table]
+    triggers = full_text_search.SQLITE_TRIGGERS.format(
+        table=table,
+        columns=", ".join(columns),
+        new=", ".join(f"new.{column}" for column in columns),
+        old=", ".join(f"old.{column}" for column in columns),
+    )
+    with connection.cursor() as cursor:
+        for trigger in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+        for statement in triggers.split("END;")[:-1]:
+            cursor.execute(statement + "END;")
+
+
+def count_activity(apps, schema_editor):
+    """fill the counters of the existing rows"""
+
+    Project = apps.get_model("project", "Project")
+    Issue = apps.get_model("project", "Issue")
+    Comment = apps.get_model("project", "Comment")
+
+    issues = Issue.objects.filter(project=OuterRef("pk")).values("id")
+    comments = Comment.objects.filter(issue=OuterRef("pk"))
+    Project.objects.update(
+        issue_count=SubqueryCount(issues),
+        open_issue_count=SubqueryCount(issues.exclude(status="Finished")),
+        comment_count=SubqueryCount(
+            Comment.objects.filter(issue__project=OuterRef("pk")).values("id")
+        ),
+        **{
+            counter: SubqueryCount(issues.filter(status=status))
+            for status, counter in STATUS_COUNTERS.items()
+        },
+    )
+    Issue.objects.update(
+        comment_count=SubqueryCount(comments.values("id")),
+        last_comment_time=Subquery(
+            comments.order_by()
+            .values("issue")
+            .annotate(last=Max("created_time"))
+            .values("last")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0018_sync_version"),
+    ]
+
+    operations = [
+        # the removal of the columns remakes the issue table too
+        migrations.RunPython(migrations.RunPython.noop, create_search_triggers),
+        migrations.AddField(
+            model_name="issue",
+            name="comment_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="last_comment_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="comment_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="finished_issue_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="in_progress_issue_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="issue_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="open_issue_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="todo_issue_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(count_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0019_activity_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommentSearchEntry",
+            fields=[
+                ("rank", models.FloatField()),
+                (
+                    "comment",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="project.comment",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "project_comment_fts",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="IssueSearchEntry",
+            fields=[
+                ("rank", models.FloatField()),
+                (
+                    "issue",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="project.issue",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "project_issue_fts",
+                "managed": False,
+            },
+        ),
+    ]
@@ -1,7 +1,153 @@
+from uuid import uuid4
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.transaction import TransactionManagementError
+from django.utils import timezone
 from django.utils.text import slugify
 
+from SoftDesk.events import publish
+from SoftDesk.response_cache import bump_versions
+
+
+class SubqueryCount(models.Subquery):
+    """count the rows of a correlated subquery, used to annotate counts without
+    joining (and multiplying) the related rows"""
+
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = models.IntegerField()
+
+
+class SyncSequence(models.Model):
+    """single row counter of the changes of the synchronized models (see
+    project.sync). A transaction takes its versions by incrementing the row,
+    which stays locked until the commit : the versions are committed in their
+    order, so a client never skips a version committed after its watermark"""
+
+    value = models.BigIntegerField(default=0)
+    # last version of the tombstones deleted by the prune_tombstones command
+    pruned_value = models.BigIntegerField(default=0)
+
+
+# databases updating the sequence and reading its value in one query
+RETURNING_VENDORS = ("sqlite", "postgresql")
+
+
+def increment_sync_sequence(connection, count):
+    """add count to the sequence and return its new value, None if the row is
+    missing"""
+
+    if (
+        connection.vendor in RETURNING_VENDORS
+        and connection.features.can_return_columns_from_insert
+    ):
+        table, value, pk = map(
+            connection.ops.quote_name, (SyncSequence._meta.db_table, "value", "id")
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {value} = {value} + %s WHERE {pk} = 1 "
+                f"RETURNING {value}",
+                [count],
+            )
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    if not SyncSequence.objects.filter(pk=1).update(value=models.F("value") + count):
+        return None
+
+    return SyncSequence.objects.values_list("value", flat=True).get(pk=1)
+
+
+def next_sync_versions(count=1) -> range:
+    """reserve count versions, in the transaction writing the rows"""
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        raise TransactionManagementError(
+            "The sync versions must be reserved in the transaction writing the rows."
+        )
+
+    last = increment_sync_sequence(connection, count)
+    if last is None:
+        # the row is missing after a flush : the counter starts again
+        SyncSequence.objects.get_or_create(pk=1)
+        last = increment_sync_sequence(connection, count)
+
+    return range(last - count + 1, last + 1)
+
+
+def set_sync_versions(instances) -> list:
+    """give a new version to each instance before a bulk query"""
+
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    for instance, version in zip(instances, next_sync_versions(len(instances))):
+        instance.sync_version = version
+
+    return instances
+
+
+class SyncVersionMixin:
+    """give a new sync_version to the row at each save, bulk queries have to
+    call set_sync_versions()"""
+
+    def save(self, *args, **kwargs):
+        # the versions only need a transaction : no savepoint in an outer one,
+        # a failed save rolls it back
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            (self.sync_version,) = next_sync_versions()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "sync_version"}
+            super().save(*args, **kwargs)
+
+
+class CountersMixin:
+    """the counter columns listed in counter_fields are updated by the database
+    with F() expressions (see project.counters) : the save of a loaded instance
+    does not write back its copy of the counters, which may be outdated"""
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            deferred_fields = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred_fields
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    """row deleted, or moved out of its project, since a sync version. The
+    project and user ids are not foreign keys : they may be deleted too"""
+
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    # the user of a deleted contributor, who loses the project
+    user_id = models.BigIntegerField(null=True)
+    sync_version = models.BigIntegerField(unique=True)
+    deleted_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_time"], name="tombstone_deleted_time_idx"),
+        ]
+
 
 HELP_TEXT = (
     "Précise si le projet doit être considéré comme actif."
@@ -9,7 +155,7 @@ HELP_TEXT = (
 )
 
 
-class Project(models.Model):
+class Project(CountersMixin, SyncVersionMixin, models.Model):
     author = models.ForeignKey(
         to=settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -42,12 +188,58 @@ class Project(models.Model):
         ),
     )
     created_time = models.DateTimeField(auto_now_add=True)
+    # change stamp used by the conditional requests (ETag, Last-Modified)
+    updated_time = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+    )
     is_active = models.BooleanField(
         default=True,
         help_text=HELP_TEXT,
         verbose_name="Actif",
     )
     slug_name = models.SlugField(max_length=256, null=True)
+    # change sequence of the delta synchronization (project.sync), null for the
+    # rows created by bulk queries outside the sync versions
+    sync_version = models.BigIntegerField(null=True, editable=False, db_index=True)
+    # activity counters maintained by project.counters, repaired by the
+    # recount_counters command
+    issue_count = models.IntegerField(default=0, editable=False)
+    open_issue_count = models.IntegerField(default=0, editable=False)
+    todo_issue_count = models.IntegerField(default=0, editable=False)
+    in_progress_issue_count = models.IntegerField(default=0, editable=False)
+    finished_issue_count = models.IntegerField(default=0, editable=False)
+    comment_count = models.IntegerField(default=0, editable=False)
+
+    counter_fields = (
+        "issue_count",
+        "open_issue_count",
+        "todo_issue_count",
+        "in_progress_issue_count",
+        "finished_issue_count",
+        "comment_count",
+    )
+
+    class Meta:
+        indexes = [
+            # used by the keyset pagination
+            models.Index(
+                fields=["created_time", "id"], name="project_created_time_id_idx"
+            ),
+            # used by the "category" and "project_name" url filters
+            models.Index(fields=["name"], name="project_name_idx"),
+            models.Index(fields=["category"], name="project_category_idx"),
+            # used to select the active projects of an author (ContributorViewset)
+            models.Index(
+                fields=["author"],
+                condition=models.Q(is_active=True),
+                name="project_active_author_idx",
+            ),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # used to detect the "is_active" changes
+        self._loaded_is_active = self.__dict__.get("is_active")
 
     def __str__(self):
         return self.name
@@ -59,17 +251,31 @@ class Project(models.Model):
         super().save(*args, **kwargs)
 
 
-class Contributor(models.Model):
+class Contributor(SyncVersionMixin, models.Model):
     """Project contributors"""
 
     contributor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    # change stamp used by the conditional requests (ETag, Last-Modified)
+    updated_time = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+    )
+    # change sequence of the delta synchronization (project.sync), null for the
+    # rows created by bulk queries outside the sync versions
+    sync_version = models.BigIntegerField(null=True, editable=False, db_index=True)
 
     class Meta:
+        # the unique index (contributor, project) covers the contributed projects
+        # of a user, this one covers the contributors of a project
         unique_together = ("contributor", "project")
+        indexes = [
+            models.Index(
+                fields=["project", "contributor"], name="contributor_project_idx"
+            )
+        ]
 
 
-class Issue(models.Model):
+class Issue(CountersMixin, SyncVersionMixin, models.Model):
     """define a task, a bug or feature in the project"""
 
     # only a project contributor can create an issue
@@ -126,12 +332,47 @@ class Issue(models.Model):
     created_time = models.DateTimeField(
         auto_now_add=True, verbose_name="Date de création"
     )
+    # change stamp used by the conditional requests (ETag, Last-Modified)
+    updated_time = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+    )
+    # change sequence of the delta synchronization (project.sync), null for the
+    # rows created by bulk queries outside the sync versions
+    sync_version = models.BigIntegerField(null=True, editable=False, db_index=True)
+    # activity counters maintained by project.counters, repaired by the
+    # recount_counters command
+    comment_count = models.IntegerField(default=0, editable=False)
+    last_comment_time = models.DateTimeField(null=True, editable=False)
+
+    counter_fields = ("comment_count", "last_comment_time")
+
+    class Meta:
+        indexes = [
+            # used by the keyset pagination
+            models.Index(
+                fields=["created_time", "id"], name="issue_created_time_id_idx"
+            ),
+            # used to list the issues of the contributed projects
+            models.Index(
+                fields=["project", "created_time"], name="issue_project_created_idx"
+            ),
+            # used to count the open issues of a project
+            models.Index(fields=["project", "status"], name="issue_project_status_idx"),
+            models.Index(fields=["priority"], name="issue_priority_idx"),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # used to touch the previous project when the issue is moved
+        self._loaded_project_id = self.__dict__.get("project_id")
+        # used to move the issue between the status counters of its project
+        self._loaded_status = self.__dict__.get("status")
 
     def __str__(self):
         return self.name
 
 
-class Comment(models.Model):
+class Comment(SyncVersionMixin, models.Model):
     """used to comment an issue"""
 
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name="comments")
@@ -144,17 +385,277 @@ class Comment(models.Model):
     )
     description = models.TextField(max_length=5000)
 
-    issue_url = models.URLField(null=True)
-
-    # uuid is the unique comment id
-    uuid = models.IntegerField(null=True)
+    # uuid is the unique comment id, generated before the insert
+    uuid = models.UUIDField(default=uuid4, unique=True, editable=False)
     created_time = models.DateTimeField(
         auto_now_add=True, verbose_name="Date de création"
     )
+    # change stamp used by the conditional requests (ETag, Last-Modified)
+    updated_time = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+    )
+    # change sequence of the delta synchronization (project.sync), null for the
+    # rows created by bulk queries outside the sync versions
+    sync_version = models.BigIntegerField(null=True, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            # used by the keyset pagination
+            models.Index(
+                fields=["created_time", "id"], name="comment_created_time_id_idx"
+            ),
+            # used to list the comments of an issue
+            models.Index(
+                fields=["issue", "created_time"], name="comment_issue_created_idx"
+            ),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # used to touch the previous issue when the comment is moved
+        self._loaded_issue_id = self.__dict__.get("issue_id")
 
     def __str__(self):
         return f"{self.uuid}"
 
-    def save(self, *args, **kwargs):
-        self.issue_url = f"http://127.0.0.1:8000/api/issue/?issue_id={self.issue.id}"
-        super().save(*args, **kwargs)
+    @property
+    def issue_url(self):
+        """built from the "issue_id" column, without loading the issue"""
+
+        return f"http://127.0.0.1:8000/api/issue/?issue_id={self.issue_id}"
+
+
+class SearchEntry(models.Model):
+    """row of a SQLite FTS5 full-text index (migration 0017, maintained by
+    triggers), joined by the searches to rank the rows (project.search)"""
+
+    # bm25 rank of the row for the MATCH of the query : the lower, the more
+    # relevant
+    rank = models.FloatField()
+
+    class Meta:
+        abstract = True
+
+
+class IssueSearchEntry(SearchEntry):
+    issue = models.OneToOneField(
+        Issue,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "project_issue_fts"
+
+
+class CommentSearchEntry(SearchEntry):
+    comment = models.OneToOneField(
+        Comment,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "project_comment_fts"
+
+
+def touch_user_rows(user_id):
+    """mark as modified the rows whose representation nests the username of the
+    user : the issues of its comments and the projects of its contributions,
+    issues and comments (the views read the stamps of the direct authors)"""
+
+    Issue.objects.filter(comments__author=user_id).update(updated_time=timezone.now())
+    project_ids = {
+        *Contributor.objects.filter(contributor=user_id).values_list(
+            "project_id", flat=True
+        ),
+        *Issue.objects.filter(
+            models.Q(author=user_id)
+            | models.Q(assigned_to=user_id)
+            | models.Q(comments__author=user_id)
+        ).values_list("project_id", flat=True),
+    }
+    touch_projects(*project_ids)
+
+
+def bump_project_versions(*project_ids):
+    """invalidate the cached responses of the projects"""
+
+    bump_versions(*[f"project:{pk}" for pk in set(project_ids) if pk is not None])
+
+
+def touch_projects(*project_ids):
+    """mark the projects as modified and invalidate their cached responses, their
+    representation nests the contributors, issues and comments (the issue and
+    comment changes touch them with their counters, see project.counters)"""
+
+    Project.objects.filter(id__in=project_ids).update(updated_time=timezone.now())
+    bump_project_versions(*project_ids)
+
+
+def add_tombstones(model_name, rows):
+    """record the deleted (or moved) rows, (object id, project id, user id)"""
+
+    rows = list(rows)
+    if not rows:
+        return
+
+    tombstones = Tombstone.objects.bulk_create(
+        Tombstone(
+            model=model_name,
+            object_id=object_id,
+            project_id=project_id,
+            user_id=user_id,
+            sync_version=version,
+        )
+        for (object_id, project_id, user_id), version in zip(
+            rows, next_sync_versions(len(rows))
+        )
+    )
+    for tombstone in tombstones:
+        fields = {}
+        if tombstone.user_id is not None:
+            fields["user_id"] = tombstone.user_id
+        publish_event(
+            model_name,
+            "deleted",
+            tombstone.object_id,
+            tombstone.project_id,
+            tombstone.sync_version,
+            **fields,
+        )
+
+
+def record_issue_moves(*issues):
+    """the members of the previous project of a moved issue lose it"""
+
+    add_tombstones(
+        "issue",
+        (
+            (issue.pk, issue._loaded_project_id, None)
+            for issue in issues
+            if issue._loaded_project_id not in (None, issue.project_id)
+        ),
+    )
+
+
+def get_issue_projects(issue_ids, projects=None) -> dict:
+    """return the project id of each issue, the known ones are not read again"""
+
+    issue_ids = set(issue_ids)
+    projects = {
+        issue_id: project_id
+        for issue_id, project_id in (projects or {}).items()
+        if issue_id in issue_ids
+    }
+    missing = issue_ids - set(projects)
+    if missing:
+        projects.update(
+            Issue.objects.filter(id__in=missing).values_list("id", "project_id")
+        )
+
+    return projects
+
+
+def get_loaded_projects(comments) -> dict:
+    """return the project id of the issues loaded on the comments (the serializers
+    and the related managers set them), known without a query"""
+
+    return {
+        comment.issue_id: comment.issue.project_id
+        for comment in comments
+        if comment.issue_id is not None and Comment.issue.is_cached(comment)
+    }
+
+
+def record_comment_moves(*comments, projects=None):
+    """the members of the previous project of a comment moved to the issue of
+    another project lose it, projects maps the known issue ids to their project"""
+
+    moved = [
+        comment
+        for comment in comments
+        if comment._loaded_issue_id not in (None, comment.issue_id)
+    ]
+    if not moved:
+        return
+
+    issue_ids = {comment.issue_id for comment in moved} | {
+        comment._loaded_issue_id for comment in moved
+    }
+    projects = get_issue_projects(issue_ids, projects)
+    add_tombstones(
+        "comment",
+        (
+            (comment.pk, projects[comment._loaded_issue_id], None)
+            for comment in moved
+            if projects.get(comment._loaded_issue_id)
+            not in (None, projects.get(comment.issue_id))
+        ),
+    )
+
+
+def resync_contributors(project_id):
+    """new versions for the contributors of a reactivated project : the members
+    get all its rows again, as if they had just joined it"""
+
+    contributors = set_sync_versions(Contributor.objects.filter(project=project_id))
+    Contributor.objects.bulk_update(contributors, ["sync_version"])
+    publish_saved(*contributors)
+
+
+def publish_event(model_name, action, object_id, project_id, version, **fields):
+    """push the change to the contributors of the project, and to the user of a
+    contributor (SoftDesk.events). The event id is the sync version : a client
+    gets the rows from /api/sync/"""
+
+    topics = [f"project:{project_id}"]
+    if "user_id" in fields:
+        topics.append(f"user:{fields['user_id']}")
+    publish(
+        topics,
+        {
+            "model": model_name,
+            "action": action,
+            "id": object_id,
+            "project_id": project_id,
+            "sync_version": version,
+            **fields,
+        },
+    )
+
+
+def publish_saved(*instances, projects=None):
+    """push the created or modified rows, projects maps the known issue ids of
+    the comments to their project"""
+
+    projects = get_issue_projects(
+        {instance.issue_id for instance in instances if isinstance(instance, Comment)},
+        projects,
+    )
+
+    for instance in instances:
+        fields = {}
+        if isinstance(instance, Project):
+            project_id = instance.pk
+        elif isinstance(instance, Comment):
+            project_id = projects.get(instance.issue_id)
+            fields["issue_id"] = instance.issue_id
+        else:
+            project_id = instance.project_id
+        if isinstance(instance, Contributor):
+            fields["user_id"] = instance.contributor_id
+        publish_event(
+            instance._meta.model_name,
+            "saved",
+            instance.pk,
+            project_id,
+            instance.sync_version,
+            **fields,
+        )
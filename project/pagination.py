@@ -0,0 +1,188 @@
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from SoftDesk.async_views import afetch
+
+
+class KeysetPagination(BasePagination):
+    """paginate the queryset on the ("created_time", "id") key with an opaque cursor :
+    each page is an index range seek, so its cost does not depend on its depth.
+    The rows are in the order of the key, an "ordering" url argument is refused
+    http://127.0.0.1:8000/api/issue/?pagination=keyset
+    http://127.0.0.1:8000/api/issue/?cursor=xxx"""
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Curseur invalide."
+    ordering_message = (
+        "La pagination par curseur trie les éléments par date de création, "
+        "le paramètre de tri n'est pas accepté."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """async variant of paginate_queryset(), for SoftDesk.async_views"""
+
+        queryset = self.get_page_queryset(queryset, request)
+
+        return self.set_page(await afetch(queryset))
+
+    def get_page_queryset(self, queryset, request):
+        """return the queryset of the rows of the page and the following row"""
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError({api_settings.ORDERING_PARAM: self.ordering_message})
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            reverse, created_time, pk = False, None, None
+        else:
+            reverse, created_time, pk = cursor
+
+        # the cursors are built from the created_time of the rows
+        only_fields, deferred = queryset.query.deferred_loading
+        if only_fields and not deferred:
+            queryset = queryset.only(*only_fields, "created_time")
+
+        if reverse:
+            queryset = queryset.order_by("-created_time", "-id")
+        else:
+            queryset = queryset.order_by("created_time", "id")
+
+        # seek the rows after (or before) the cursor position
+        if created_time is not None:
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_time__lt=created_time)
+                    | Q(created_time=created_time, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_time__gt=created_time)
+                    | Q(created_time=created_time, id__gt=pk)
+                )
+
+        # fetch an extra row to know if there is a following page
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        cursor = self.cursor
+        if cursor is not None and cursor[0]:
+            self.page.reverse()
+            # the rows after the cursor position
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+
+        return self.page_size
+
+    def decode_cursor(self, request):
+        """return the (reverse, created_time, id) position of the cursor"""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            reverse, created_time, pk = (
+                b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            )
+            return reverse == "1", datetime.fromisoformat(created_time), int(pk)
+        except (TypeError, ValueError, UnicodeError, BinasciiError):
+            raise ValidationError(
+                {self.cursor_query_param: self.invalid_cursor_message}
+            )
+
+    def encode_cursor(self, reverse, instance):
+        """return the url of the page following (or preceding) the instance"""
+
+        position = f"{int(reverse)}|{instance.created_time.isoformat()}|{instance.pk}"
+        encoded = b64encode(position.encode("ascii")).decode("ascii")
+
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # reverse seek before the first row : restart from the beginning
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(True, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """use the keyset pagination instead of the default one if the url
+    contains "?pagination=keyset" or a "cursor" argument"""
+
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            query_params = self.request.query_params
+            check_list = [
+                query_params.get("pagination") == "keyset",
+                KeysetPagination.cursor_query_param in query_params,
+            ]
+            if any(check_list):
+                self._paginator = self.keyset_pagination_class()
+
+        return super().paginator
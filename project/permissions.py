@@ -11,7 +11,7 @@ class IsOwnerOrReadOnly(BasePermission):
 
         try:
             # for projects, issues and comments
-            return obj.author == request.user
+            return obj.author_id == request.user.id
         except AttributeError:
             # for contributors
-            return obj.project.author == request.user
+            return obj.project.author_id == request.user.id
@@ -0,0 +1,92 @@
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+
+
+def search(queryset, terms, fields):
+    """filter the queryset on the rows containing all the terms and order them
+    by relevance, using the full-text index created by the migration 0017
+    (FTS5 on SQLite, tsvector on PostgreSQL)"""
+
+    table = queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "sqlite":
+        # each term is quoted to be read as a string, not as an FTS5 operator
+        match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        fts = f"{table}_fts"
+        matches = RawSQL(f"{fts} MATCH %s", [match], output_field=BooleanField())
+
+        # the filter on the entry joins the index (SearchEntry)
+        return (
+            queryset.filter(matches, search_entry__isnull=False)
+            .annotate(search_rank=F("search_entry__rank"))
+            .order_by("search_rank", "id")
+        )
+
+    if vendor == "postgresql":
+        tsquery = "plainto_tsquery('simple', %s)"
+        params = [" ".join(terms)]
+        matches = RawSQL(
+            f"{table}.search_vector @@ {tsquery}", params, output_field=BooleanField()
+        )
+        rank = RawSQL(
+            f"-ts_rank({table}.search_vector, {tsquery})",
+            params,
+            output_field=FloatField(),
+        )
+
+        return (
+            queryset.filter(matches)
+            .annotate(search_rank=rank)
+            .order_by("search_rank", "id")
+        )
+
+    # no full-text index on the other databases
+    return scan(queryset, terms, fields)
+
+
+def scan(queryset, terms, fields):
+    """filter the queryset on the rows containing all the terms without index"""
+
+    for term in terms:
+        lookups = Q()
+        for field in fields:
+            lookups |= Q(**{f"{field}__icontains": term})
+        queryset = queryset.filter(lookups)
+
+    return queryset.order_by("id")
+
+
+class SearchMixin:
+    """search the words of the "q" url argument in the search_fields, the results
+    are ranked by relevance and paginated
+    http://127.0.0.1:8000/api/issue/search/?q=xxx"""
+
+    search_fields = ()
+    search_pagination_class = LimitOffsetPagination
+    max_search_terms = 10
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        terms = request.query_params.get("q", "").split()
+        if not terms:
+            raise ValidationError('Le paramètre "q" est requis.')
+        if len(terms) > self.max_search_terms:
+            raise ValidationError(
+                f"La recherche est limitée à {self.max_search_terms} mots."
+            )
+
+        queryset = search(
+            self.filter_queryset(self.get_queryset()), terms, self.search_fields
+        )
+
+        # the keyset pagination would order the results by date
+        self._paginator = self.search_pagination_class()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
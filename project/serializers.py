@@ -1,10 +1,134 @@
+from operator import attrgetter
+
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Prefetch
+
+from SoftDesk.fieldsets import SparseFieldsetSerializerMixin
+from project.models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    SubqueryCount,
+    SyncVersionMixin,
+    touch_projects,
+    set_sync_versions,
+    record_issue_moves,
+    record_comment_moves,
+    publish_saved,
+)
+from project.counters import (
+    count_issues_created,
+    count_issues_changed,
+    count_comments_created,
+    count_comments_changed,
+)
+from project.membership import (
+    get_contributed_project_ids,
+    is_contributor,
+    invalidate_membership,
+)
+
+
+def format_created_time(instance):
+    """same output as get_created_time() for the years 1000 to 9999,
+    isoformat() is twice faster than strftime()"""
+
+    return instance.created_time.isoformat(" ", "seconds")[:19]
+
+
+def represent_user(user):
+    """same output as UserContributorSerializer"""
+
+    return {"username": user.username}
+
+
+def represent_author(instance):
+    return {"username": instance.author.username}
+
+
+# the DRF fields returning their model value unchanged
+IDENTITY_FIELD_CLASSES = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+)
+
+
+class FastRepresentationMixin:
+    """read path of the list and detail views : the representation is built
+    with accessors compiled once per serializer instance (so once per list)
+    instead of the generic loop over the DRF fields, and the nested fields
+    reuse one serializer instead of building one per row. The output is the
+    same as Serializer.to_representation() (see the benchmark_serializers
+    command)"""
+
+    # False to use the DRF fields, e.g. to compare the two paths
+    fast_representation = True
+
+    def get_fast_accessors(self) -> dict:
+        """return {field name: function(instance)} replacing the
+        SerializerMethodFields building nested serializers"""
+
+        return {}
+
+    def compile_field(self, field):
+        """return a function(instance) returning the field representation"""
+
+        if isinstance(field, serializers.SerializerMethodField):
+            return getattr(self, field.method_name)
+
+        if len(field.source_attrs) == 1:
+            source = field.source_attrs[0]
+            if type(field) in IDENTITY_FIELD_CLASSES:
+                return attrgetter(source)
+
+            if isinstance(field, serializers.SlugRelatedField):
+                slug_field = field.slug_field
 
-from project.models import Project, Contributor, Issue, Comment
+                def accessor(instance):
+                    related = getattr(instance, source)
+                    return None if related is None else getattr(related, slug_field)
 
+                return accessor
 
-class DateTimeMixin(serializers.Serializer):
+        def accessor(instance):
+            attribute = field.get_attribute(instance)
+            return None if attribute is None else field.to_representation(attribute)
+
+        return accessor
+
+    def compile_representation(self) -> list:
+        accessors = self.get_fast_accessors()
+        plan = []
+        for field in self._readable_fields:
+            accessor = accessors.get(field.field_name) or self.compile_field(field)
+            plan.append((field.field_name, accessor))
+
+        return plan
+
+    def to_representation(self, instance):
+        if not self.fast_representation:
+            return super().to_representation(instance)
+
+        plan = self.__dict__.get("_representation_plan")
+        if plan is None:
+            plan = self._representation_plan = self.compile_representation()
+
+        try:
+            return {field_name: accessor(instance) for field_name, accessor in plan}
+        except (SkipField, AttributeError, KeyError):
+            # a missing attribute or a dict (validated data) : the DRF fields
+            # decide
+            return super().to_representation(instance)
+
+
+class DateTimeMixin(FastRepresentationMixin, serializers.Serializer):
     """used to display the "created_time" fields"""
 
     created_time = serializers.SerializerMethodField(read_only=True)
@@ -14,6 +138,220 @@ class DateTimeMixin(serializers.Serializer):
 
         return obj.created_time.strftime("%Y-%m-%d %H:%M:%S")
 
+    def get_fast_accessors(self):
+        return {**super().get_fast_accessors(), "created_time": format_created_time}
+
+
+class EagerLoadingMixin(SparseFieldsetSerializerMixin):
+    """build the select_related/prefetch_related plan of the serializer tree,
+    used by the viewsets to avoid the N+1 queries of the nested fields"""
+
+    # ForeignKey fields displayed by the serializer
+    select_related_fields = ()
+    # reverse ForeignKey or ManyToMany fields displayed by the serializer
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_prefetch(cls, field_name):
+        """return the lookup used to prefetch the field, override it to
+        prefetch the nested serializers plan"""
+
+        return field_name
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """return the queryset with the related objects loaded in a constant
+        number of queries, restricted to the displayed fields if given"""
+
+        select_fields = cls.select_related_fields
+        prefetch_fields = cls.prefetch_related_fields
+        if fields is not None:
+            select_fields = [field for field in select_fields if field in fields]
+            prefetch_fields = [field for field in prefetch_fields if field in fields]
+
+        # select_related() without fields would follow all the foreign keys
+        if select_fields:
+            queryset = queryset.select_related(*select_fields)
+        prefetches = [cls.get_prefetch(field) for field in prefetch_fields]
+
+        return cls.restrict_queryset(queryset.prefetch_related(*prefetches), fields)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """memoize the instance found for each slug, so a list of items referencing
+    the same project, issue or user is validated with one query per slug"""
+
+    def to_internal_value(self, data):
+        cache = self.root.__dict__.setdefault("_slug_cache", {})
+        key = (self.field_name, data)
+        if key not in cache:
+            cache[key] = super().to_internal_value(data)
+
+        return cache[key]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """used to create or partially update a list of instances with one bulk query,
+    the child serializer hooks are "build_instance", "update_instance",
+    "bulk_created" and "bulk_updated" (see BulkSerializerMixin)"""
+
+    def to_internal_value(self, data):
+        """validate each item with its instance and return the per-item errors"""
+
+        if not isinstance(data, list):
+            raise serializers.ValidationError("Une liste d'éléments est attendue.")
+
+        instances = self.instance if self.instance is not None else [None] * len(data)
+        validated_data = []
+        errors = []
+        # the unique constraints are checked for the whole batch at the end
+        validators = self.child.validators
+        unique_validators = [
+            validator
+            for validator in validators
+            if isinstance(validator, UniqueTogetherValidator)
+        ]
+        self.child.validators = [
+            validator for validator in validators if validator not in unique_validators
+        ]
+        try:
+            for instance, item in zip(instances, data):
+                # used by the child validate() method in the partial update
+                self.child.instance = instance
+                try:
+                    validated_data.append(self.child.run_validation(item))
+                    errors.append({})
+                except serializers.ValidationError as exc:
+                    validated_data.append(None)
+                    errors.append(exc.detail)
+        finally:
+            self.child.instance = None
+            self.child.validators = validators
+
+        for validator in unique_validators:
+            self.check_unique_together(validator, instances, validated_data, errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return validated_data
+
+    def check_unique_together(self, validator, instances, validated_data, errors):
+        """add a per-item error to the items duplicated in the batch or in the
+        database, read with one query"""
+
+        keys = {}
+        for index, (instance, item) in enumerate(zip(instances, validated_data)):
+            if item is None:
+                continue
+            key = []
+            for field in validator.fields:
+                if field in item:
+                    value = getattr(item[field], "pk", item[field])
+                else:
+                    # the id, without loading the related row
+                    attname = validator.queryset.model._meta.get_field(field).attname
+                    value = getattr(instance, attname, None)
+                key.append(value)
+            if None not in key:
+                keys.setdefault(tuple(key), []).append(index)
+        if not keys:
+            return
+
+        existing = (
+            validator.queryset.filter(
+                **{
+                    f"{field}__in": {key[position] for key in keys}
+                    for position, field in enumerate(validator.fields)
+                }
+            )
+            .exclude(pk__in=[instance.pk for instance in instances if instance])
+            .values_list(*validator.fields)
+        )
+        duplicated = {key for key in existing} | {
+            key for key, indexes in keys.items() if len(indexes) > 1
+        }
+        message = validator.message.format(field_names=", ".join(validator.fields))
+        for key in duplicated & set(keys):
+            for index in keys[key]:
+                errors[index].setdefault(api_settings.NON_FIELD_ERRORS_KEY, []).append(
+                    message
+                )
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = [self.child.build_instance(item) for item in validated_data]
+        if issubclass(model, SyncVersionMixin):
+            set_sync_versions(instances)
+        instances = model.objects.bulk_create(instances)
+        self.child.bulk_created(instances)
+        if issubclass(model, SyncVersionMixin):
+            publish_saved(*instances)
+
+        return self.reload(instances)
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        for instance, item in zip(instances, validated_data):
+            fields |= self.child.update_instance(instance, item)
+        if fields:
+            # bulk_update() does not set the "auto_now" fields
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    for instance in instances:
+                        field.pre_save(instance, add=False)
+                    fields.add(field.name)
+            if issubclass(model, SyncVersionMixin):
+                set_sync_versions(instances)
+                fields.add("sync_version")
+            model.objects.bulk_update(instances, fields)
+        self.child.bulk_updated(instances, fields)
+        if fields and issubclass(model, SyncVersionMixin):
+            publish_saved(*instances)
+
+        return self.reload(instances)
+
+    def reload(self, instances):
+        """return the instances loaded with the child serializer plan, to display
+        them without N+1 queries"""
+
+        model = self.child.Meta.model
+        ids = [instance.pk for instance in instances]
+        queryset = model.objects.filter(pk__in=ids)
+        if isinstance(self.child, EagerLoadingMixin):
+            queryset = self.child.setup_eager_loading(queryset)
+        loaded = {instance.pk: instance for instance in queryset}
+
+        return [loaded[pk] for pk in ids]
+
+
+class BulkSerializerMixin:
+    """default hooks of the BulkListSerializer, to set in Meta.list_serializer_class"""
+
+    # ForeignKey fields read by validate() and the permissions in the bulk
+    # partial updates (BulkCreateUpdateMixin)
+    bulk_select_related = ()
+
+    def build_instance(self, validated_data):
+        """return the unsaved instance to create"""
+
+        return self.Meta.model(**validated_data)
+
+    def update_instance(self, instance, validated_data) -> set:
+        """set the validated data on the instance and return the updated fields"""
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+
+        return set(validated_data)
+
+    def bulk_created(self, instances):
+        """called after the bulk creation, bulk_create() does not send signals"""
+
+    def bulk_updated(self, instances, fields):
+        """called after the bulk update, bulk_update() does not send signals"""
+
 
 class UserContributorSerializer(serializers.ModelSerializer):
     """used to display the "author" and "contributor" fields"""
@@ -23,7 +361,9 @@ class UserContributorSerializer(serializers.ModelSerializer):
         fields = ("username",)
 
 
-class AdminProjectSerializer(DateTimeMixin, serializers.ModelSerializer):
+class AdminProjectSerializer(
+    EagerLoadingMixin, DateTimeMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(
         queryset=get_user_model().objects.all(),
         slug_field="username",
@@ -46,6 +386,37 @@ class AdminProjectSerializer(DateTimeMixin, serializers.ModelSerializer):
             "created_time",
         )
 
+    select_related_fields = ("author",)
+    prefetch_related_fields = ("contributors", "issues")
+
+    @classmethod
+    def get_prefetch(cls, field_name):
+        """prefetch the issues with the IssueSerializer plan"""
+
+        if field_name == "issues":
+            queryset = IssueSerializer.setup_eager_loading(Issue.objects.all())
+            return Prefetch("issues", queryset=queryset)
+
+        return super().get_prefetch(field_name)
+
+    def get_fast_accessors(self):
+        issue_serializer = IssueSerializer()
+
+        def represent_contributors(instance):
+            return [represent_user(user) for user in instance.contributors.all()]
+
+        def represent_issues(instance):
+            return [
+                issue_serializer.to_representation(issue)
+                for issue in instance.issues.all()
+            ]
+
+        return {
+            **super().get_fast_accessors(),
+            "contributors": represent_contributors,
+            "issues": represent_issues,
+        }
+
     def get_contributors(self, instance):
         """use UserContributorSerializer to display the "contributors" field"""
 
@@ -99,6 +470,9 @@ class ProjectSerializer(AdminProjectSerializer):
             "created_time",
         )
 
+    def get_fast_accessors(self):
+        return {**super().get_fast_accessors(), "author": represent_author}
+
     def get_author(self, instance):
         """use UserContributorSerializer to display the "author" field"""
 
@@ -108,13 +482,55 @@ class ProjectSerializer(AdminProjectSerializer):
         return serializer.data
 
 
-class AdminContributorSerializer(serializers.ModelSerializer):
-    project = serializers.SlugRelatedField(
+class ProjectSummarySerializer(ProjectSerializer):
+    """used to display the project list with counts instead of the nested
+    "contributors" and "issues" fields"""
+
+    contributor_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Project
+        fields = (
+            "id",
+            "name",
+            "author",
+            "description",
+            "category",
+            "issue_count",
+            "open_issue_count",
+            "todo_issue_count",
+            "in_progress_issue_count",
+            "finished_issue_count",
+            "comment_count",
+            "contributor_count",
+            "created_time",
+        )
+
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """annotate the contributor count computed by the database if displayed,
+        the other counts are columns (see project.counters)"""
+
+        queryset = super().setup_eager_loading(queryset, fields)
+        if fields is not None and "contributor_count" not in fields:
+            return queryset
+
+        contributors = Contributor.objects.filter(project=OuterRef("pk")).values("id")
+
+        return queryset.annotate(contributor_count=SubqueryCount(contributors))
+
+
+class AdminContributorSerializer(
+    BulkSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    project = CachedSlugRelatedField(
         queryset=Project.objects.all(),
         slug_field="name",
         label="Projet",
     )
-    contributor = serializers.SlugRelatedField(
+    contributor = CachedSlugRelatedField(
         queryset=get_user_model().objects.all(),
         slug_field="username",
         label="Contributeur",
@@ -127,6 +543,25 @@ class AdminContributorSerializer(serializers.ModelSerializer):
             "project",
             "contributor",
         )
+        list_serializer_class = BulkListSerializer
+
+    select_related_fields = ("project", "contributor")
+    bulk_select_related = ("project",)
+
+    def update_instance(self, instance, validated_data):
+        """the previous contributor loses the project"""
+
+        invalidate_membership(instance.contributor_id)
+
+        return super().update_instance(instance, validated_data)
+
+    def bulk_created(self, instances):
+        invalidate_membership(*[instance.contributor_id for instance in instances])
+        touch_projects(*{instance.project_id for instance in instances})
+
+    def bulk_updated(self, instances, fields):
+        invalidate_membership(*[instance.contributor_id for instance in instances])
+        touch_projects(*{instance.project_id for instance in instances})
 
 
 class ContributorSerializer(AdminContributorSerializer):
@@ -139,6 +574,7 @@ class ContributorSerializer(AdminContributorSerializer):
             "project",
             "contributor",
         )
+        list_serializer_class = BulkListSerializer
 
     def __init__(self, *args, **kwargs):
         """allow selecting a limited list of instances for the 'project' and 'contributor'
@@ -148,36 +584,42 @@ class ContributorSerializer(AdminContributorSerializer):
         request = self.context.get("request")
         if request:
             current_user_username = request.user.username
-            self.fields["contributor"].queryset = get_user_model().objects.exclude(
-                username=current_user_username
-            )
-            self.fields["project"].queryset = Project.objects.filter(
-                author=request.user
-            )
+            # the fields can be removed by the "fields" url argument
+            if "contributor" in self.fields:
+                self.fields["contributor"].queryset = get_user_model().objects.exclude(
+                    username=current_user_username
+                )
+            if "project" in self.fields:
+                self.fields["project"].queryset = Project.objects.filter(
+                    author=request.user
+                )
 
     def validate(self, data):
         request = self.context.get("request")
-        project = data["project"]
+        # the instance is used by the partial update
+        project = data.get("project") or self.instance.project
         if request.user != project.author:
             raise serializers.ValidationError("Vous n'êtes pas l'auteur du projet.")
 
         return data
 
 
-class AdminIssueSerializer(DateTimeMixin, serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
+class AdminIssueSerializer(
+    BulkSerializerMixin, EagerLoadingMixin, DateTimeMixin, serializers.ModelSerializer
+):
+    author = CachedSlugRelatedField(
         queryset=get_user_model().objects.all(),
         slug_field="username",
         label="Auteur",
         help_text="Seul un contributeur au projet peut être auteur de cette issue",
     )
-    project = serializers.SlugRelatedField(
+    project = CachedSlugRelatedField(
         queryset=Project.objects.all(),
         slug_field="name",
         label="Projet",
         help_text="Seul les projets auxquels vous avez contribué sont sélectionnables ",
     )
-    assigned_to = serializers.SlugRelatedField(
+    assigned_to = CachedSlugRelatedField(
         queryset=get_user_model().objects.all(),
         slug_field="username",
         label="Assigné à",
@@ -200,6 +642,39 @@ class AdminIssueSerializer(DateTimeMixin, serializers.ModelSerializer):
             "created_time",
             "comments",
         )
+        list_serializer_class = BulkListSerializer
+
+    select_related_fields = ("author", "project", "assigned_to")
+    prefetch_related_fields = ("comments",)
+    bulk_select_related = ("author", "project", "assigned_to")
+
+    @classmethod
+    def get_prefetch(cls, field_name):
+        """prefetch the comments with the CommentSerializer plan"""
+
+        if field_name == "comments":
+            queryset = CommentSerializer.setup_eager_loading(Comment.objects.all())
+            return Prefetch("comments", queryset=queryset)
+
+        return super().get_prefetch(field_name)
+
+    def bulk_created(self, instances):
+        count_issues_created(*instances)
+
+    def bulk_updated(self, instances, fields):
+        count_issues_changed(*instances)
+        record_issue_moves(*instances)
+
+    def get_fast_accessors(self):
+        comment_serializer = CommentSerializer()
+
+        def represent_comments(instance):
+            return [
+                comment_serializer.to_representation(comment)
+                for comment in instance.comments.all()
+            ]
+
+        return {**super().get_fast_accessors(), "comments": represent_comments}
 
     def get_comments(self, instance):
         """use CommentSerializer to display the "comments" field"""
@@ -214,14 +689,19 @@ class AdminIssueSerializer(DateTimeMixin, serializers.ModelSerializer):
         -only a project contributor can create an issue
         -only a project contributor can be assigned to an issue"""
 
-        project = data["project"]
+        request = self.context.get("request")
+        # the instance is used by the partial update
+        project = data.get("project") or self.instance.project
 
         try:
             author = data["author"]
         except KeyError:
-            author = self.context.get("request").user
+            author = self.instance.author if self.instance else request.user
 
-        assigned_user = data["assigned_to"]
+        try:
+            assigned_user = data["assigned_to"]
+        except KeyError:
+            assigned_user = self.instance.assigned_to
         # get the project contributors list
         project_contributors = (
             get_user_model()
@@ -230,13 +710,13 @@ class AdminIssueSerializer(DateTimeMixin, serializers.ModelSerializer):
         )
 
         # check if the Issue.author is a project contributor
-        if not Contributor.objects.filter(contributor=author, project=project):
+        if not is_contributor(author, project, request):
             raise serializers.ValidationError(
                 f"Vous n'êtes pas contributeur au projet '{project.name}'."
             )
 
         # check if the Issue.assigned_to is a project contributor
-        if not Contributor.objects.filter(contributor=assigned_user, project=project):
+        if assigned_user and not is_contributor(assigned_user, project, request):
             raise serializers.ValidationError(
                 f"'{assigned_user.username}' n'est pas contributeur au projet '{project.name}'."
                 f" Voici la liste des contributeurs que vous pouvez assigner :"
@@ -264,6 +744,10 @@ class IssueSerializer(AdminIssueSerializer):
             "created_time",
             "comments",
         )
+        list_serializer_class = BulkListSerializer
+
+    def get_fast_accessors(self):
+        return {**super().get_fast_accessors(), "author": represent_author}
 
     def get_author(self, instance):
         """use UserContributorSerializer to display the "author" field"""
@@ -279,33 +763,76 @@ class IssueSerializer(AdminIssueSerializer):
 
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
-        if request:
+        # the field can be removed by the "fields" url argument
+        if request and "project" in self.fields:
             contributed_projects = Project.objects.filter(
-                contributor__contributor=request.user, is_active=True
+                id__in=get_contributed_project_ids(request.user, request)
             )
             self.fields["project"].queryset = contributed_projects
 
-    def create(self, validated_data):
-        """create an Issue instance then set the connected user as author"""
+    def build_instance(self, validated_data):
+        """set the connected user as author"""
 
         request = self.context.get("request")
         validated_data["author"] = request.user
-        issue = Issue(**validated_data)
+
+        return Issue(**validated_data)
+
+    def create(self, validated_data):
+        """create an Issue instance then set the connected user as author"""
+
+        issue = self.build_instance(validated_data)
         issue.save()
 
         return issue
 
 
-class AdminCommentSerializer(DateTimeMixin, serializers.ModelSerializer):
+class IssueSummarySerializer(IssueSerializer):
+    """used to display the issue list with the comment count (see
+    project.counters) instead of the nested "comments" field"""
+
+    last_comment_time = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Issue
+        fields = (
+            "id",
+            "author",
+            "project",
+            "name",
+            "description",
+            "status",
+            "priority",
+            "category",
+            "assigned_to",
+            "created_time",
+            "comment_count",
+            "last_comment_time",
+        )
+
+    prefetch_related_fields = ()
+
+    def get_last_comment_time(self, obj):
+        "return the DateTimeField formatted as created_time"
+
+        if obj.last_comment_time is None:
+            return None
+
+        return obj.last_comment_time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class AdminCommentSerializer(
+    BulkSerializerMixin, EagerLoadingMixin, DateTimeMixin, serializers.ModelSerializer
+):
     issue_url = serializers.URLField(read_only=True)
-    uuid = serializers.IntegerField(read_only=True)
-    issue = serializers.SlugRelatedField(
+    uuid = serializers.UUIDField(read_only=True)
+    issue = CachedSlugRelatedField(
         queryset=Issue.objects.all(),
         slug_field="name",
         label="Issue",
         help_text="Seules les issues des projets auxquels vous avez contribué sont sélectionnables ",
     )
-    author = serializers.SlugRelatedField(
+    author = CachedSlugRelatedField(
         queryset=get_user_model().objects.all(),
         slug_field="username",
         label="Auteur",
@@ -323,37 +850,55 @@ class AdminCommentSerializer(DateTimeMixin, serializers.ModelSerializer):
             "uuid",
             "created_time",
         )
+        list_serializer_class = BulkListSerializer
+
+    select_related_fields = ("issue", "author")
+    source_fields = {"issue_url": ("issue",)}
+    bulk_select_related = ("issue", "author")
 
     def validate(self, data):
         """test if the author is a project contributor"""
 
+        request = self.context.get("request")
+
         try:
             author = data["author"]
         except KeyError:
-            author = self.context.get("request").user
+            author = self.instance.author if self.instance else request.user
 
-        issue = data["issue"]
-        project = issue.project
+        # the instance is used by the partial update
+        issue = data.get("issue") or self.instance.issue
 
-        if not Contributor.objects.filter(contributor=author, project=project):
+        # the project is only loaded by the error message
+        if issue.project_id not in get_contributed_project_ids(author, request):
             raise serializers.ValidationError(
-                f"Vous n'êtes pas contributeur au projet '{project.name}' pour commenter son issue."
+                f"Vous n'êtes pas contributeur au projet '{issue.project.name}' pour commenter son issue."
             )
 
         return data
 
-    def create(self, validated_data):
-        """create the comment instance and set the uuid attribute and
-        the connected user as author"""
+    def bulk_created(self, instances):
+        count_comments_created(*instances)
+
+    def bulk_updated(self, instances, fields):
+        projects = count_comments_changed(*instances)
+        record_comment_moves(*instances, projects=projects)
+
+    def build_instance(self, validated_data):
+        """set the connected user as author"""
 
         try:
             validated_data["author"]
         except KeyError:
             validated_data["author"] = self.context.get("request").user
 
-        comment = Comment(**validated_data)
-        comment.save()
-        comment.uuid = comment.id
+        return Comment(**validated_data)
+
+    def create(self, validated_data):
+        """create the comment instance with the connected user as author,
+        its uuid is generated before the insert"""
+
+        comment = self.build_instance(validated_data)
         comment.save()
 
         return comment
@@ -373,6 +918,10 @@ class CommentSerializer(AdminCommentSerializer):
             "uuid",
             "created_time",
         )
+        list_serializer_class = BulkListSerializer
+
+    def get_fast_accessors(self):
+        return {**super().get_fast_accessors(), "author": represent_author}
 
     def get_author(self, instance):
         """use UserContributorSerializer to display the "author" field"""
@@ -388,10 +937,9 @@ class CommentSerializer(AdminCommentSerializer):
 
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
-        if request:
-            contributed_projects = Project.objects.filter(
-                contributor__contributor=request.user, is_active=True
-            )
+        # the field can be removed by the "fields" url argument
+        if request and "issue" in self.fields:
+            contributed_projects = get_contributed_project_ids(request.user, request)
             contributed_projects_issues = Issue.objects.filter(
                 project__in=contributed_projects
             )
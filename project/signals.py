@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from project.models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    touch_projects,
+    touch_user_rows,
+    add_tombstones,
+    record_issue_moves,
+    record_comment_moves,
+    resync_contributors,
+    publish_saved,
+)
+from project.membership import invalidate_membership
+from project.counters import (
+    count_issues_created,
+    count_issues_changed,
+    count_issue_deleted,
+    count_comments_created,
+    count_comments_changed,
+    count_comments_deleted,
+)
+from SoftDesk.response_cache import bump_versions
+
+# user fields saved without modifying the nested representations
+UNNESTED_USER_FIELDS = {"last_login", "password", "updated_time"}
+
+
+def deleted_with(origin, *models) -> bool:
+    """return True if the deletion cascades from an instance (or a queryset) of
+    one of the models : the tombstone of the parent covers the row"""
+
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+
+    return issubclass(model, models)
+
+
+@receiver([post_save, post_delete], sender=Contributor)
+def contributor_changed(sender, instance, signal, origin=None, **kwargs):
+    """the contributor gained or lost a project"""
+
+    invalidate_membership(instance.contributor_id)
+    if signal is post_delete and deleted_with(origin, Project):
+        return
+    touch_projects(instance.project_id)
+
+
+@receiver(post_delete, sender=Contributor)
+def contributor_deleted(sender, instance, **kwargs):
+    # also recorded when the project is deleted : the members lose it
+    add_tombstones(
+        "contributor", [(instance.pk, instance.project_id, instance.contributor_id)]
+    )
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    """the project contributors gained or lost the project if it has been
+    (de)activated"""
+
+    if not created and instance.is_active != instance._loaded_is_active:
+        contributors = Contributor.objects.filter(project=instance).values_list(
+            "contributor_id", flat=True
+        )
+        invalidate_membership(*contributors)
+        if instance.is_active:
+            resync_contributors(instance.pk)
+
+    instance._loaded_is_active = instance.is_active
+    bump_versions(f"project:{instance.pk}")
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    bump_versions(f"project:{instance.pk}")
+
+
+@receiver(post_save, sender=Issue)
+def issue_saved(sender, instance, created, **kwargs):
+    """count the issue in its project, the counters update touches the previous
+    and new project : their representation nests the issues"""
+
+    if created:
+        count_issues_created(instance)
+    else:
+        count_issues_changed(instance)
+        record_issue_moves(instance)
+    instance._loaded_status = instance.status
+    instance._loaded_project_id = instance.project_id
+
+
+@receiver(pre_delete, sender=Issue)
+def issue_deleting(sender, instance, origin, **kwargs):
+    """counted down before the deletion of its comments : the issue counter
+    gives the comments deleted with it"""
+
+    if not deleted_with(origin, Project):
+        count_issue_deleted(instance, with_comments=deleted_with(origin, Issue))
+
+
+@receiver(post_delete, sender=Issue)
+def issue_deleted(sender, instance, origin, **kwargs):
+    if not deleted_with(origin, Project):
+        add_tombstones("issue", [(instance.pk, instance.project_id, None)])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """count the comment in its issue and project, the counters update touches
+    them : their representations nest the comments"""
+
+    if created:
+        projects = count_comments_created(instance)
+    else:
+        projects = count_comments_changed(instance)
+        record_comment_moves(instance, projects=projects)
+    instance._loaded_issue_id = instance.issue_id
+    publish_saved(instance, projects=projects)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin, **kwargs):
+    # the parent deletion counts down and covers the comments
+    if deleted_with(origin, Project, Issue):
+        return
+
+    projects = count_comments_deleted(instance)
+    if instance.issue_id in projects:
+        add_tombstones("comment", [(instance.pk, projects[instance.issue_id], None)])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Contributor)
+@receiver(post_save, sender=Issue)
+def row_saved(sender, instance, **kwargs):
+    """push the change to the event streams (project.events), the deletions are
+    pushed with their tombstones (comment_saved pushes the comments)"""
+
+    publish_saved(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """the usernames are nested in the project, issue and comment representations
+    (the login only saves the "last_login" field)"""
+
+    if not update_fields or set(update_fields) - UNNESTED_USER_FIELDS:
+        bump_versions("users")
+    # their change stamps are the ones of the parent rows
+    if not created and instance.username != instance._loaded_username:
+        touch_user_rows(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    bump_versions("users")
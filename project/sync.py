@@ -0,0 +1,226 @@
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from project.export import (
+    PROJECT_EXPORT_FIELDS,
+    ISSUE_EXPORT_FIELDS,
+    COMMENT_EXPORT_FIELDS,
+    format_value,
+)
+from project.membership import get_contributed_project_ids
+from project.models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    SyncSequence,
+    Tombstone,
+)
+
+# without the names of the parent rows, synchronized with their own versions.
+# The changes of the comments and issues touch the "updated_time" of their
+# issue and project without a new version : it is not synchronized.
+PROJECT_SYNC_FIELDS = {
+    field: lookup
+    for field, lookup in PROJECT_EXPORT_FIELDS.items()
+    if field != "updated_time"
+}
+ISSUE_SYNC_FIELDS = {
+    field: lookup
+    for field, lookup in ISSUE_EXPORT_FIELDS.items()
+    if field not in ("project", "updated_time")
+}
+COMMENT_SYNC_FIELDS = {
+    field: lookup for field, lookup in COMMENT_EXPORT_FIELDS.items() if field != "issue"
+}
+CONTRIBUTOR_SYNC_FIELDS = {
+    "id": "id",
+    "project_id": "project_id",
+    "contributor": "contributor__username",
+    "updated_time": "updated_time",
+}
+
+# synchronized rows : model, project lookup and values() lookups of the columns
+SYNC_MODELS = {
+    "projects": (Project, "id", PROJECT_SYNC_FIELDS),
+    "contributors": (Contributor, "project", CONTRIBUTOR_SYNC_FIELDS),
+    "issues": (Issue, "project", ISSUE_SYNC_FIELDS),
+    "comments": (Comment, "issue__project", COMMENT_SYNC_FIELDS),
+}
+# model names of the tombstones
+TOMBSTONE_MODELS = {
+    "contributor": "contributors",
+    "issue": "issues",
+    "comment": "comments",
+}
+
+
+class SyncView(APIView):
+    """rows of the contributed projects created or modified since the "since"
+    watermark, and ids of the rows deleted or no longer visible since then,
+    ordered by their sync version. The client applies the deletions, then the
+    rows, and sends the returned "until" in the next request ("has_more" :
+    other changes follow). The rows of a deleted project or issue are deleted
+    with it. "reset" : the watermark is too old, the client replaces its data
+    with the following responses.
+    The rows of a project joined (or reactivated) since the watermark are all
+    sent, "limit" counts the other changes.
+    http://127.0.0.1:8000/api/sync/?since=0"""
+
+    permission_classes = [IsAuthenticated]
+    default_limit = 1000
+    max_limit = 5000
+    # SQL queries of the requests (authentication included), more queries
+    # fail the tests, see SoftDesk.instrumentation
+    query_budget = {"get": 15}
+
+    def get_int_param(self, request, name, default):
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+
+        try:
+            value = int(value)
+            if value < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({name: "Un entier positif est attendu."})
+
+        return value
+
+    def get(self, request):
+        since = self.get_int_param(request, "since", 0)
+        limit = self.get_int_param(request, "limit", self.default_limit)
+        limit = min(limit or self.default_limit, self.max_limit)
+
+        # the rows of the versions until the counter value are committed
+        sequence, _ = SyncSequence.objects.get_or_create(pk=1)
+        until = sequence.value
+        # the tombstones after the watermark have been pruned, or the
+        # watermark comes from another database
+        reset = since > until or 0 < since < sequence.pruned_value
+        if reset:
+            since = 0
+
+        user = request.user
+        contributed = get_contributed_project_ids(user, request)
+        window = {"sync_version__gt": since, "sync_version__lte": until}
+
+        streams = []
+        for name, (model, project_lookup, fields) in SYNC_MODELS.items():
+            queryset = model.objects.filter(
+                **{f"{project_lookup}__in": contributed}, **window
+            )
+            streams.append(self.get_stream(name, queryset, fields.values(), limit))
+
+        # the tombstones of the projects of the user (deactivated included) and
+        # of its own contributions
+        known_projects = Contributor.objects.filter(contributor=user.pk).values(
+            "project_id"
+        )
+        tombstones = Tombstone.objects.filter(
+            Q(project_id__in=known_projects) | Q(user_id=user.pk), **window
+        )
+        streams.append(
+            self.get_stream(
+                "tombstones",
+                tombstones,
+                ["model", "object_id", "project_id", "user_id"],
+                limit,
+            )
+        )
+        deactivated = Project.objects.filter(
+            contributor__contributor=user.pk, is_active=False, **window
+        )
+        streams.append(self.get_stream("deactivated", deactivated, ["id"], limit))
+
+        # the versions are distinct : the changes until the last one taken
+        # are all in the first rows of the streams
+        changes = list(islice(merge(*streams, key=itemgetter(0)), limit + 1))
+        has_more = len(changes) > limit
+        if has_more:
+            changes = changes[:limit]
+            until = changes[-1][0]
+
+        rows = {name: {} for name in SYNC_MODELS}
+        deleted = {name: set() for name in SYNC_MODELS}
+        for version, name, row in changes:
+            if name == "tombstones":
+                model, object_id, project_id, user_id = row[:-1]
+                deleted[TOMBSTONE_MODELS[model]].add(object_id)
+                if model == "contributor" and user_id == user.pk:
+                    deleted["projects"].add(project_id)
+            elif name == "deactivated":
+                deleted["projects"].add(row[0])
+            else:
+                self.add_row(rows[name], name, row)
+
+        if since:
+            joined = {
+                row["project_id"]
+                for row in rows["contributors"].values()
+                if row["contributor"] == user.username
+            }
+            if joined:
+                self.add_projects(rows, joined, until)
+
+        self.remove_visible(deleted, contributed)
+
+        return Response(
+            {
+                "since": since,
+                "until": until,
+                "has_more": has_more,
+                "reset": reset,
+                **{
+                    name: list(model_rows.values()) for name, model_rows in rows.items()
+                },
+                "deleted": {name: sorted(ids) for name, ids in deleted.items()},
+            }
+        )
+
+    def get_stream(self, name, queryset, lookups, limit):
+        """return the (version, name, row) of the first changes of the queryset"""
+
+        rows = queryset.order_by("sync_version").values_list(*lookups, "sync_version")[
+            : limit + 1
+        ]
+
+        return [(row[-1], name, row) for row in rows]
+
+    def add_row(self, model_rows, name, row):
+        fields = SYNC_MODELS[name][2]
+        values = dict(zip(fields, map(format_value, row)))
+        values["sync_version"] = row[-1]
+        model_rows[values["id"]] = values
+
+    def add_projects(self, rows, project_ids, until):
+        """add all the rows of the projects joined since the watermark"""
+
+        for name, (model, project_lookup, fields) in SYNC_MODELS.items():
+            queryset = model.objects.filter(
+                **{f"{project_lookup}__in": project_ids}, sync_version__lte=until
+            ).values_list(*fields.values(), "sync_version")
+            for row in queryset:
+                self.add_row(rows[name], name, row)
+
+    def remove_visible(self, deleted, contributed):
+        """a row moved to another contributed project, a project joined again
+        or reactivated are not deleted"""
+
+        deleted["projects"] -= contributed
+        for name, ids in deleted.items():
+            if ids and name != "projects":
+                model, project_lookup, _ = SYNC_MODELS[name]
+                ids -= set(
+                    model.objects.filter(
+                        id__in=ids, **{f"{project_lookup}__in": contributed}
+                    ).values_list("id", flat=True)
+                )
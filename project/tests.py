@@ -1,3 +1,1197 @@
-# from django.test import TestCase
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework.throttling import BaseThrottle
+
+from SoftDesk import renderers
+from SoftDesk.db_routers import PIN_KEY, pin
+from SoftDesk.events import OVERFLOW, InProcessBroker, get_broker
+from SoftDesk.instrumentation import QueryBudgetExceeded
+from SoftDesk.renderers import dumps
+from authentication.tokens import ClaimsTokenObtainPairSerializer
+from project.models import Project, Contributor, Issue, Comment, SyncSequence
+from project.views import ProjectViewset
+
+
+def create_user(username, **fields):
+    return get_user_model().objects.create(
+        username=username,
+        email=f"{username}@softdesk.fr",
+        first_name="Prénom",
+        last_name="Nom",
+        birthdate=date(1990, 1, 1),
+        can_be_contacted=True,
+        can_data_be_shared=True,
+        **fields,
+    )
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class EagerLoadingQueriesTest(APITestCase):
+    """the list and detail views load their nested trees (contributors, issues,
+    comments, authors) in a constant number of queries : a page of one row and
+    a full page take the same number, a N+1 fails these tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [create_user(f"user-{index}") for index in range(3)]
+        cls.user = users[0]
+        cls.admin = create_user("admin", is_staff=True, is_superuser=True)
+        for project_index in range(3):
+            project = Project.objects.create(
+                author=cls.user, name=f"projet-{project_index}", category="Back-end"
+            )
+            for user in users:
+                Contributor.objects.create(project=project, contributor=user)
+            for issue_index in range(3):
+                issue = Issue.objects.create(
+                    author=users[issue_index],
+                    assigned_to=users[(issue_index + 1) % 3],
+                    project=project,
+                    name=f"issue-{project_index}-{issue_index}",
+                    priority="Low",
+                    category="Bug",
+                )
+                for user in users:
+                    Comment.objects.create(
+                        issue=issue, author=user, description="commentaire"
+                    )
+        cls.project = Project.objects.order_by("id").first()
+        cls.issue = Issue.objects.order_by("id").first()
+        cls.comment = Comment.objects.order_by("id").first()
+
+    def setUp(self):
+        self.clear_caches()
+
+    def clear_caches(self):
+        """the membership and the responses are cached between the requests"""
+
+        for cache in caches.all():
+            cache.clear()
+
+    def get(self, url, user=None):
+        self.client.force_authenticate(user or self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        return response
+
+    def assertListQueries(self, url, count, user=None):
+        for page in (f"{url}?limit=1", url):
+            self.clear_caches()
+            with self.assertNumQueries(count):
+                response = self.get(page, user)
+        self.assertGreater(len(response.data["results"]), 1)
+
+    def assertDetailQueries(self, url, count, user=None):
+        with self.assertNumQueries(count):
+            self.get(url, user)
+
+    def test_project_list(self):
+        self.assertListQueries("/api/project/", 7)
+
+    def test_project_summary_list(self):
+        self.clear_caches()
+        with self.assertNumQueries(4):
+            self.get("/api/project/?view=summary")
+
+    def test_project_detail(self):
+        self.assertDetailQueries(f"/api/project/{self.project.pk}/", 5)
+
+    def test_issue_list(self):
+        self.assertListQueries("/api/issue/", 5)
+
+    def test_issue_detail(self):
+        self.assertDetailQueries(f"/api/issue/{self.issue.pk}/", 3)
+
+    def test_comment_list(self):
+        self.assertListQueries("/api/comment/", 4)
+
+    def test_comment_detail(self):
+        self.assertDetailQueries(f"/api/comment/{self.comment.pk}/", 2)
+
+    def test_user_list(self):
+        self.assertListQueries("/api/user/", 3)
+
+    def test_user_detail(self):
+        self.assertDetailQueries(f"/api/user/{self.user.pk}/", 1)
+
+    def test_admin_project_list(self):
+        self.assertListQueries("/api/admin/project/", 6, self.admin)
+
+    def test_admin_project_detail(self):
+        self.assertDetailQueries(
+            f"/api/admin/project/{self.project.pk}/", 4, self.admin
+        )
+
+    def test_admin_issue_list(self):
+        self.assertListQueries("/api/admin/issue/", 4, self.admin)
+
+    def test_admin_comment_list(self):
+        self.assertListQueries("/api/admin/comment/", 3, self.admin)
+
+    def test_admin_user_list(self):
+        self.assertListQueries("/api/admin/user/", 3, self.admin)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class NestedUsernameStampsTest(APITestCase):
+    """renaming a user nested in a representation changes its ETag"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.commenter = create_user("commentateur")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        for user in (cls.user, cls.commenter):
+            Contributor.objects.create(project=cls.project, contributor=user)
+        cls.issue = Issue.objects.create(
+            author=cls.user,
+            assigned_to=cls.user,
+            project=cls.project,
+            name="issue",
+            priority="Low",
+            category="Bug",
+        )
+        Comment.objects.create(
+            issue=cls.issue, author=cls.commenter, description="commentaire"
+        )
+
+    def assertETagChanges(self, url):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(url)["ETag"]
+        self.commenter.username = "renomme"
+        # the cached responses are invalidated after the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.commenter.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("renomme", response.content.decode())
+
+    def test_project_list(self):
+        self.assertETagChanges("/api/project/")
+
+    def test_project_detail(self):
+        self.assertETagChanges(f"/api/project/{self.project.pk}/")
+
+    def test_issue_detail(self):
+        self.assertETagChanges(f"/api/issue/{self.issue.pk}/")
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class OwnerPermissionTest(APITestCase):
+    """only the author reaches the detail view of a project, issue or comment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("auteur")
+        cls.contributor = create_user("contributeur")
+        cls.project = Project.objects.create(
+            author=cls.author, name="projet", category="Back-end"
+        )
+        for user in (cls.author, cls.contributor):
+            Contributor.objects.create(project=cls.project, contributor=user)
+
+    def test_contributor_cannot_read_the_detail(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f"/api/project/{self.project.pk}/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_author_reads_the_detail(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.get(f"/api/project/{self.project.pk}/")
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTest(APITestCase):
+    """the requests over the query_budget of their viewset fail the tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        Contributor.objects.create(project=project, contributor=cls.user)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_within_budget(self):
+        response = self.client.get("/api/project/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_over_budget(self):
+        with mock.patch.object(ProjectViewset, "query_budget", {"list": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get("/api/project/")
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_over_budget_logged(self):
+        with mock.patch.object(ProjectViewset, "query_budget", {"list": 1}):
+            with self.assertLogs("SoftDesk.instrumentation", "WARNING"):
+                response = self.client.get("/api/project/")
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class FieldFilterTest(APITestCase):
+    """the "true" and "false" url arguments are booleans only for the boolean
+    fields"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user("admin", is_staff=True, is_superuser=True)
+        for name, is_active in (("true", True), ("autre", False)):
+            Project.objects.create(
+                author=cls.admin, name=name, category="Back-end", is_active=is_active
+            )
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def get_names(self, query):
+        response = self.client.get(f"/api/admin/project/?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        return [project["name"] for project in response.data["results"]]
+
+    def test_text_field(self):
+        self.assertEqual(self.get_names("project_name=true"), ["true"])
+
+    def test_boolean_field(self):
+        self.assertEqual(self.get_names("is_active=false"), ["autre"])
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class SyncTest(APITestCase):
+    """the /api/sync/ deltas since a watermark : saved rows, tombstones of the
+    deleted or moved rows and reset of an unknown watermark"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("membre")
+        cls.outsider = create_user("externe")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        cls.other_project = Project.objects.create(
+            author=cls.user, name="autre projet", category="iOS"
+        )
+        cls.foreign_project = Project.objects.create(
+            author=cls.outsider, name="projet externe", category="Android"
+        )
+        for project in (cls.project, cls.other_project):
+            Contributor.objects.create(project=project, contributor=cls.user)
+        Contributor.objects.create(
+            project=cls.foreign_project, contributor=cls.outsider
+        )
+        cls.issue = Issue.objects.create(
+            author=cls.user,
+            project=cls.project,
+            name="issue",
+            priority="Low",
+            category="Bug",
+        )
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+        self.since = self.sync()["until"]
+
+    def sync(self, since=0):
+        response = self.client.get(f"/api/sync/?since={since}")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        return response.data
+
+    def get_rows(self, data, name):
+        return {row["id"]: row for row in data[name]}
+
+    def test_full_sync(self):
+        data = self.sync()
+        self.assertFalse(data["reset"])
+        self.assertEqual(
+            set(self.get_rows(data, "projects")),
+            {self.project.pk, self.other_project.pk},
+        )
+        self.assertEqual(set(self.get_rows(data, "issues")), {self.issue.pk})
+
+    def test_create(self):
+        comment = Comment.objects.create(
+            issue=self.issue, author=self.user, description="commentaire"
+        )
+        data = self.sync(self.since)
+        self.assertEqual(data["since"], self.since)
+        self.assertGreater(data["until"], self.since)
+        self.assertEqual(set(self.get_rows(data, "comments")), {comment.pk})
+        # the rows not modified since the watermark are not sent again
+        self.assertEqual(data["projects"], [])
+        self.assertEqual(data["issues"], [])
+
+    def test_update(self):
+        self.issue.name = "renommée"
+        self.issue.save()
+        rows = self.get_rows(self.sync(self.since), "issues")
+        self.assertEqual(rows[self.issue.pk]["name"], "renommée")
+        self.assertGreater(rows[self.issue.pk]["sync_version"], self.since)
+
+    def test_delete(self):
+        comment = Comment.objects.create(
+            issue=self.issue, author=self.user, description="commentaire"
+        )
+        since, comment_id = self.sync()["until"], comment.pk
+        comment.delete()
+        data = self.sync(since)
+        self.assertEqual(data["deleted"]["comments"], [comment_id])
+        self.assertEqual(data["comments"], [])
+
+    def test_delete_cascade(self):
+        """the tombstone of the issue covers its comments"""
+
+        Comment.objects.create(
+            issue=self.issue, author=self.user, description="commentaire"
+        )
+        since, issue_id = self.sync()["until"], self.issue.pk
+        self.issue.delete()
+        data = self.sync(since)
+        self.assertEqual(data["deleted"]["issues"], [issue_id])
+        self.assertEqual(data["deleted"]["comments"], [])
+
+    def test_move_to_a_contributed_project(self):
+        self.issue.project = self.other_project
+        self.issue.save()
+        data = self.sync(self.since)
+        rows = self.get_rows(data, "issues")
+        self.assertEqual(rows[self.issue.pk]["project_id"], self.other_project.pk)
+        self.assertEqual(data["deleted"]["issues"], [])
+
+    def test_move_out_of_the_contributed_projects(self):
+        self.issue.project = self.foreign_project
+        self.issue.save()
+        data = self.sync(self.since)
+        self.assertEqual(data["issues"], [])
+        self.assertEqual(data["deleted"]["issues"], [self.issue.pk])
+
+    def test_since_beyond_the_last_version(self):
+        data = self.sync(self.since + 100)
+        self.assertTrue(data["reset"])
+        self.assertEqual(data["since"], 0)
+        self.assertEqual(set(self.get_rows(data, "issues")), {self.issue.pk})
+
+    def test_missing_sequence(self):
+        """after a flush, the sequence starts again and the watermarks of the
+        clients are reset"""
+
+        SyncSequence.objects.all().delete()
+        issue = Issue.objects.create(
+            author=self.user,
+            project=self.project,
+            name="nouvelle issue",
+            priority="High",
+            category="Task",
+        )
+        self.assertEqual(SyncSequence.objects.get().value, issue.sync_version)
+        data = self.sync(self.since)
+        self.assertTrue(data["reset"])
+        self.assertIn(issue.pk, self.get_rows(data, "issues"))
+
+    def test_limit(self):
+        comments = [
+            Comment.objects.create(
+                issue=self.issue, author=self.user, description="commentaire"
+            )
+            for _ in range(3)
+        ]
+        data = self.client.get(f"/api/sync/?since={self.since}&limit=2").data
+        self.assertTrue(data["has_more"])
+        self.assertEqual(len(data["comments"]), 2)
+        data = self.sync(data["until"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(set(self.get_rows(data, "comments")), {comments[-1].pk})
+
+
+class CountersTest(TestCase):
+    """the denormalized counters of the projects and issues follow the issue and
+    comment changes (project.counters), recount_counters finds no drift"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.commenter = create_user("commentateur")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        cls.other_project = Project.objects.create(
+            author=cls.user, name="autre projet", category="iOS"
+        )
+        cls.issue = cls.create_issue(cls.project)
+        cls.finished_issue = cls.create_issue(cls.project, status="Finished")
+        cls.other_issue = cls.create_issue(cls.other_project)
+        cls.comment = cls.create_comment(cls.issue, cls.user)
+        cls.create_comment(cls.issue, cls.commenter)
+
+    @classmethod
+    def create_issue(cls, project, status="To Do"):
+        return Issue.objects.create(
+            author=cls.user,
+            project=project,
+            name="issue",
+            status=status,
+            priority="Low",
+            category="Bug",
+        )
+
+    @staticmethod
+    def create_comment(issue, author):
+        return Comment.objects.create(
+            issue=issue, author=author, description="commentaire"
+        )
+
+    def assertCounters(self, project, **counts):
+        project.refresh_from_db()
+        expected = {**dict.fromkeys(Project.counter_fields, 0), **counts}
+        self.assertEqual(
+            {name: getattr(project, name) for name in Project.counter_fields},
+            expected,
+        )
+
+    def assertNoDrift(self):
+        output = StringIO()
+        call_command("recount_counters", "--dry-run", stdout=output)
+        self.assertEqual(output.getvalue().count(" 0 drifted"), 2, output.getvalue())
+
+    def test_create(self):
+        self.assertCounters(
+            self.project,
+            issue_count=2,
+            open_issue_count=1,
+            todo_issue_count=1,
+            finished_issue_count=1,
+            comment_count=2,
+        )
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.comment_count, 2)
+        self.assertEqual(
+            self.issue.last_comment_time,
+            self.issue.comments.latest("created_time").created_time,
+        )
+        self.assertNoDrift()
+
+    def test_status_change(self):
+        self.issue.status = "In Progress"
+        self.issue.save()
+        self.finished_issue.status = "To Do"
+        self.finished_issue.save()
+        self.assertCounters(
+            self.project,
+            issue_count=2,
+            open_issue_count=2,
+            todo_issue_count=1,
+            in_progress_issue_count=1,
+            comment_count=2,
+        )
+        self.assertNoDrift()
+
+    def test_issue_move(self):
+        """the comments of the issue follow it"""
+
+        self.issue.project = self.other_project
+        self.issue.save()
+        self.assertCounters(self.project, issue_count=1, finished_issue_count=1)
+        self.assertCounters(
+            self.other_project,
+            issue_count=2,
+            open_issue_count=2,
+            todo_issue_count=2,
+            comment_count=2,
+        )
+        self.assertNoDrift()
+
+    def test_issue_delete(self):
+        self.issue.delete()
+        self.assertCounters(self.project, issue_count=1, finished_issue_count=1)
+        self.assertNoDrift()
+
+    def test_comment_delete(self):
+        self.comment.delete()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.comment_count, 1)
+        self.assertCounters(
+            self.project,
+            issue_count=2,
+            open_issue_count=1,
+            todo_issue_count=1,
+            finished_issue_count=1,
+            comment_count=1,
+        )
+        self.assertNoDrift()
+
+    def test_comment_move(self):
+        self.comment.issue = self.other_issue
+        self.comment.save()
+        self.issue.refresh_from_db()
+        self.other_issue.refresh_from_db()
+        self.assertEqual(self.issue.comment_count, 1)
+        self.assertEqual(self.other_issue.comment_count, 1)
+        self.assertEqual(self.other_issue.last_comment_time, self.comment.created_time)
+        self.assertCounters(
+            self.other_project,
+            issue_count=1,
+            open_issue_count=1,
+            todo_issue_count=1,
+            comment_count=1,
+        )
+        self.assertNoDrift()
+
+    def test_user_cascade(self):
+        """the deletion of a user cascades to its comments"""
+
+        self.commenter.delete()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.comment_count, 1)
+        self.assertCounters(
+            self.project,
+            issue_count=2,
+            open_issue_count=1,
+            todo_issue_count=1,
+            finished_issue_count=1,
+            comment_count=1,
+        )
+        self.assertNoDrift()
+
+    def test_project_cascade(self):
+        self.project.delete()
+        self.assertCounters(
+            self.other_project,
+            issue_count=1,
+            open_issue_count=1,
+            todo_issue_count=1,
+        )
+        self.assertNoDrift()
+
+    def test_recount_repairs(self):
+        Project.objects.filter(pk=self.project.pk).update(issue_count=10)
+        output = StringIO()
+        call_command("recount_counters", stdout=output)
+        self.assertIn("projects : 2 checked, 1 repaired", output.getvalue())
+        self.assertEqual(Project.objects.get(pk=self.project.pk).issue_count, 2)
+        self.assertNoDrift()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class CommentCreateQueriesTest(APITestCase):
+    """a comment is inserted with its sync version, issue and project counters
+    in a constant number of queries (the project of the loaded issue is not
+    read again)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        Contributor.objects.create(project=cls.project, contributor=cls.user)
+        cls.issue = Issue.objects.create(
+            author=cls.user,
+            project=cls.project,
+            name="issue",
+            priority="Low",
+            category="Bug",
+        )
+
+    def test_create(self):
+        # sync version (UPDATE ... RETURNING), INSERT, issue and project counters
+        with self.assertNumQueries(4):
+            Comment.objects.create(
+                issue=self.issue, author=self.user, description="commentaire"
+            )
+
+    def test_api_create(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+        # membership, issue, then the 4 queries of the insert in a savepoint
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                "/api/comment/",
+                {"issue": self.issue.name, "description": "commentaire"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class KeysetPaginationTest(APITestCase):
+    """the cursors follow the (created_time, id) key : the pages do not shift
+    when rows are inserted before them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.projects = [cls.create_project(index) for index in range(5)]
+
+    @classmethod
+    def create_project(cls, index):
+        project = Project.objects.create(
+            author=cls.user, name=f"projet-{index}", category="Back-end"
+        )
+        Contributor.objects.create(project=project, contributor=cls.user)
+
+        return project
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, status=200):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status, response.content)
+
+        return response.data
+
+    def get_ids(self, page):
+        return [project["id"] for project in page["results"]]
+
+    def test_next_and_previous_links(self):
+        page = self.get("/api/project/?pagination=keyset&limit=2")
+        self.assertIsNone(page["previous"])
+        ids = self.get_ids(page)
+        pages = [ids]
+        while page["next"]:
+            page = self.get(page["next"])
+            pages.append(self.get_ids(page))
+            ids += self.get_ids(page)
+        self.assertEqual(ids, [project.pk for project in self.projects])
+        self.assertEqual(len(pages), 3)
+
+        # the previous link of the last page gives the second one
+        self.assertEqual(self.get_ids(self.get(page["previous"])), pages[1])
+
+    def test_insert_before_the_cursor(self):
+        page = self.get("/api/project/?pagination=keyset&limit=2")
+        with self.captureOnCommitCallbacks(execute=True):
+            project = self.create_project(5)
+        Project.objects.filter(pk=project.pk).update(
+            created_time=self.projects[0].created_time
+        )
+        page = self.get(page["next"])
+        self.assertEqual(
+            self.get_ids(page), [project.pk for project in self.projects[2:4]]
+        )
+
+    def test_invalid_cursor(self):
+        data = self.get("/api/project/?cursor=invalide", 400)
+        self.assertIn("cursor", data)
+
+    def test_ordering(self):
+        """the order of the rows is the key of the cursors"""
+
+        data = self.get("/api/project/?pagination=keyset&ordering=-name", 400)
+        self.assertIn("ordering", data)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class BulkCreateUpdateTest(APITestCase):
+    """the lists of items are created or partially updated in one transaction,
+    the errors are returned per item"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.member = create_user("membre")
+        cls.newcomer = create_user("nouveau")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        for user in (cls.user, cls.member):
+            Contributor.objects.create(project=cls.project, contributor=user)
+        cls.issues = [
+            Issue.objects.create(
+                author=cls.user,
+                project=cls.project,
+                name=f"issue-{index}",
+                priority="Low",
+                category="Bug",
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def get_issue_item(self, name, **fields):
+        return {
+            "project": "projet",
+            "name": name,
+            "priority": "High",
+            "category": "Task",
+            "assigned_to": "membre",
+            **fields,
+        }
+
+    def test_create(self):
+        items = [self.get_issue_item("bulk-1"), self.get_issue_item("bulk-2")]
+        response = self.client.post("/api/issue/", items, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([item["name"] for item in response.data], ["bulk-1", "bulk-2"])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.issue_count, 5)
+
+    def test_create_item_errors(self):
+        items = [
+            self.get_issue_item("bulk-1"),
+            self.get_issue_item("bulk-2", priority="Urgente"),
+        ]
+        response = self.client.post("/api/issue/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("priority", response.data[1])
+        self.assertFalse(Issue.objects.filter(name__startswith="bulk").exists())
+
+    def test_partial_update(self):
+        items = [{"id": issue.pk, "status": "Finished"} for issue in self.issues]
+        response = self.client.patch("/api/issue/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            Issue.objects.filter(status="Finished").count(), len(self.issues)
+        )
+
+    def test_partial_update_queries(self):
+        """the rows are loaded without the plan of the list view, in a number of
+        queries independent of the number of items"""
+
+        for issues in (self.issues[:1], self.issues):
+            for cache in caches.all():
+                cache.clear()
+            items = [{"id": issue.pk, "priority": "Medium"} for issue in issues]
+            # membership, rows with their related rows, sync versions, update,
+            # project touch, reload of the response in a savepoint
+            with self.assertNumQueries(9):
+                response = self.client.patch("/api/issue/bulk/", items, format="json")
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_duplicate_ids(self):
+        items = [{"id": self.issues[0].pk, "status": "Finished"}] * 2
+        response = self.client.patch("/api/issue/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_ids(self):
+        items = [{"id": 0, "status": "Finished"}]
+        response = self.client.patch("/api/issue/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_duplicate_contributors(self):
+        """in the database or twice in the batch"""
+
+        items = [
+            {"project": "projet", "contributor": "membre"},
+            {"project": "projet", "contributor": "nouveau"},
+            {"project": "projet", "contributor": "nouveau"},
+        ]
+        response = self.client.post("/api/contributor/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        for errors in response.data:
+            self.assertIn("non_field_errors", errors)
+        self.assertFalse(Contributor.objects.filter(contributor=self.newcomer).exists())
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class ConditionalGetTest(APITestCase):
+    """the detail views answer 304 to a matching If-None-Match, the 200 reuses
+    the instance read for the validators"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        Contributor.objects.create(project=project, contributor=cls.user)
+        issue = Issue.objects.create(
+            author=cls.user,
+            project=project,
+            name="issue",
+            priority="Low",
+            category="Bug",
+        )
+        cls.comment = Comment.objects.create(
+            issue=issue, author=cls.user, description="commentaire"
+        )
+        cls.url = f"/api/comment/{cls.comment.pk}/"
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_empty_stamp_relation(self):
+        """the issue has no assigned user"""
+
+        response = self.client.get(f"/api/issue/{self.comment.issue_id}/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn("ETag", response)
+
+    def test_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.comment.description = "modifié"
+        self.comment.save()
+        # the comment and its change stamps are read once (the membership is
+        # cached by the first request)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["description"], "modifié")
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class DenyThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        return False
+
+    def wait(self):
+        return 30
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class AsyncViewsTest(APITestCase):
+    """the async views answer as the viewsets they mirror : same data, conditional
+    GET, authentication and throttles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        for index in range(2):
+            project = Project.objects.create(
+                author=cls.user, name=f"projet-{index}", category="Back-end"
+            )
+            Contributor.objects.create(project=project, contributor=cls.user)
+            issue = Issue.objects.create(
+                author=cls.user,
+                project=project,
+                name=f"issue-{index}",
+                priority="Low",
+                category="Bug",
+            )
+            Comment.objects.create(
+                issue=issue, author=cls.user, description="commentaire"
+            )
+        cls.issue = issue
+        token = ClaimsTokenObtainPairSerializer.get_token(cls.user).access_token
+        cls.authorization = f"Bearer {token}"
+
+    def setUp(self):
+        self.clear_caches()
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def get(self, url, status=200, **headers):
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION=self.authorization, **headers
+        )
+        self.assertEqual(response.status_code, status, response.content)
+
+        return response
+
+    def assertSameData(self, url):
+        expected = self.get(f"/api/{url}").json()
+        self.clear_caches()
+        self.assertEqual(self.get(f"/api/async/{url}").json(), expected)
+
+    def test_project_list(self):
+        self.assertSameData("project/")
+
+    def test_issue_detail(self):
+        self.assertSameData(f"issue/{self.issue.pk}/")
+
+    def test_comment_list_filter(self):
+        self.assertSameData(f"comment/?issue_id={self.issue.pk}")
+
+    def test_not_modified(self):
+        for url in ("/api/async/project/", f"/api/async/issue/{self.issue.pk}/"):
+            etag = self.get(url)["ETag"]
+            response = self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_not_authenticated(self):
+        response = self.client.get("/api/async/project/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_found(self):
+        self.get("/api/async/issue/0/", 404)
+
+    def test_throttled(self):
+        with mock.patch.object(ProjectViewset, "throttle_classes", [DenyThrottle]):
+            response = self.get("/api/async/project/", 429)
+        self.assertEqual(response["Retry-After"], "30")
+
+
+class InProcessBrokerTest(SimpleTestCase):
+    """the broker delivers an event once to each subscription of its topics,
+    from any thread, and drops the subscriptions of the slow consumers"""
+
+    event = {"model": "issue", "action": "saved", "id": 1, "project_id": 1}
+
+    def setUp(self):
+        self.broker = InProcessBroker()
+
+    async def get(self, subscription):
+        return await asyncio.wait_for(subscription.get(), 1)
+
+    async def test_publish(self):
+        subscription = self.broker.subscribe(["project:1", "user:1"], 10)
+        self.broker.publish(["project:2"], {"id": 2})
+        self.broker.publish(["project:1", "user:1"], self.event)
+
+        self.assertEqual(await self.get(subscription), self.event)
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(
+            self.broker.get_metrics(),
+            {"published": 2, "delivered": 1, "overflows": 0, "subscriptions": 1},
+        )
+
+    async def test_publish_from_thread(self):
+        subscription = self.broker.subscribe(["project:1"], 10)
+        await asyncio.to_thread(self.broker.publish, ["project:1"], self.event)
+
+        self.assertEqual(await self.get(subscription), self.event)
+
+    async def test_overflow(self):
+        subscription = self.broker.subscribe(["project:1"], 2)
+        for _ in range(3):
+            self.broker.publish(["project:1"], self.event)
+
+        self.assertIs(await self.get(subscription), OVERFLOW)
+        self.assertTrue(subscription.queue.empty())
+        metrics = self.broker.get_metrics()
+        self.assertEqual(metrics["overflows"], 1)
+        self.assertEqual(metrics["subscriptions"], 0)
+        # the dropped subscription gets no more events
+        self.broker.publish(["project:1"], self.event)
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.queue.empty())
+
+    async def test_unsubscribe(self):
+        subscription = self.broker.subscribe(["project:1"], 10)
+        self.broker.unsubscribe(subscription)
+        self.broker.publish(["project:1"], self.event)
+        await asyncio.sleep(0)
+
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(self.broker.get_metrics()["subscriptions"], 0)
+
+    async def test_set_topics(self):
+        subscription = self.broker.subscribe(["project:1"], 10)
+        self.broker.set_topics(subscription, ["project:2"])
+        self.broker.publish(["project:1"], {"id": 1})
+        self.broker.publish(["project:2"], self.event)
+
+        self.assertEqual(await self.get(subscription), self.event)
+        self.assertTrue(subscription.queue.empty())
+
+
+@override_settings(EVENTS_HEARTBEAT=1)
+class EventStreamTest(TestCase):
+    """the stream sends the events of the contributed projects as Server-Sent
+    Events"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("auteur")
+        cls.project = Project.objects.create(
+            author=cls.user, name="projet", category="Back-end"
+        )
+        Contributor.objects.create(project=cls.project, contributor=cls.user)
+        token = ClaimsTokenObtainPairSerializer.get_token(cls.user).access_token
+        cls.headers = {"authorization": f"Bearer {token}"}
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    async def test_stream(self):
+        response = await self.async_client.get("/api/events/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        frames = aiter(response.streaming_content)
+
+        try:
+            self.assertEqual(await anext(frames), b"retry: 3000\n\n")
+            self.assertEqual(get_broker().get_metrics()["subscriptions"], 1)
+            event = {
+                "model": "issue",
+                "action": "saved",
+                "id": 1,
+                "project_id": self.project.pk,
+                "sync_version": 7,
+            }
+            # the event of a project the user does not contribute to is not sent
+            get_broker().publish(
+                [f"project:{self.project.pk}"], {**event, "project_id": 0}
+            )
+            get_broker().publish([f"project:{self.project.pk}"], event)
+            frame = await asyncio.wait_for(anext(frames), 2)
+            self.assertEqual(
+                frame.decode(),
+                f"id: 7\nevent: issue\ndata: {dumps(event).decode()}\n\n",
+            )
+            self.assertEqual(await asyncio.wait_for(anext(frames), 2), b": ping\n\n")
+        finally:
+            await response.streaming_content.aclose()
+
+    async def test_not_contributor(self):
+        response = await self.async_client.get(
+            "/api/events/?project=0", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTest(APITransactionTestCase):
+    """the safe requests read from the replica, except for the users who have
+    just written : they read their own writes from the primary"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # a second connection to the test database stands for the replica
+        connections.settings["replica"] = {**connections["default"].settings_dict}
+        cls.addClassCleanup(cls.remove_replica)
+
+    @classmethod
+    def remove_replica(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = create_user("auteur")
+        project = Project.objects.create(
+            author=self.user, name="existant", category="Back-end"
+        )
+        Contributor.objects.create(project=project, contributor=self.user)
+        self.client.force_authenticate(self.user)
+
+    def get_projects(self, alias):
+        """return the project names of the list, read from the alias"""
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get("/api/project/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bool(replica_queries.captured_queries), alias == "replica")
+
+        return [project["name"] for project in response.data["results"]]
+
+    def test_read_replica(self):
+        self.assertEqual(self.get_projects("replica"), ["existant"])
+
+    def test_read_your_writes(self):
+        response = self.client.post(
+            "/api/project/",
+            {"name": "projet", "description": "description", "category": "Back-end"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        # pinned to the primary during REPLICA_PIN_SECONDS
+        self.assertIn("projet", self.get_projects("default"))
+        caches["default"].delete(PIN_KEY.format(self.user.pk))
+        self.assertIn("projet", self.get_projects("replica"))
+
+    def test_other_user_not_pinned(self):
+        other = create_user("autre")
+        pin(other.pk)
+
+        self.get_projects("replica")
+
+
+class MetricsViewTest(APITestCase):
+    """the metrics are served to the staff users, authenticated like the API,
+    and to the METRICS_TOKEN"""
+
+    def get(self, authorization):
+        return self.client.get("/api/metrics/", HTTP_AUTHORIZATION=authorization)
+
+    def get_with_jwt(self, user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+        return self.get(f"Bearer {token}")
+
+    def test_staff_jwt(self):
+        response = self.get_with_jwt(create_user("admin", is_staff=True))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"response_bytes_total", response.content)
+
+    def test_staff_session(self):
+        self.client.force_login(create_user("admin", is_staff=True))
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+    def test_forbidden(self):
+        self.assertEqual(self.get_with_jwt(create_user("user")).status_code, 403)
+        self.assertEqual(self.get("Bearer invalide").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(self.get("Bearer secret").status_code, 200)
+
+
+@skipIf(renderers.orjson is None, "orjson is not installed")
+class FastJSONRendererTest(SimpleTestCase):
+    """orjson renders the same JSON as JSONRenderer, except for the out of range
+    floats"""
+
+    def test_same_output(self):
+        data = {
+            "name": "écran\u2028",
+            "time": datetime(2024, 1, 2, 3, 4, 5, 600000, tzinfo=timezone.utc),
+            "day": date(2024, 1, 2),
+            "amount": Decimal("1.50"),
+            "rank": -1.5,
+            "items": [1, None, True],
+        }
+
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_out_of_range_floats(self):
+        data = {"rank": float("nan"), "max": float("inf")}
+
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data), b'{"rank":null,"max":null}'
+        )
@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from project.async_views import AsyncProjectView, AsyncIssueView, AsyncCommentView
+from project.events import EventStreamView
+from project.sync import SyncView
 from project.views import (
     ProjectViewset,
     ContributorViewset,
@@ -12,7 +15,6 @@ from project.views import (
     CommentViewset,
 )
 
-
 router = routers.SimpleRouter()
 router.register("project", ProjectViewset, basename="project")
 router.register("contributor", ContributorViewset, basename="contributor")
@@ -30,4 +32,27 @@ router.register("admin/comment", AdminCommentViewset, basename="admin-comment")
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    # changes since a version, for the offline clients
+    path("api/sync/", SyncView.as_view(), name="sync"),
+    # Server-Sent Events of the changes, served by an ASGI server
+    path("api/events/", EventStreamView.as_view(), name="events"),
+    # read-only async views, served without blocking by an ASGI server
+    path("api/async/project/", AsyncProjectView.as_view(), name="async-project-list"),
+    path(
+        "api/async/project/<int:pk>/",
+        AsyncProjectView.as_view(),
+        name="async-project-detail",
+    ),
+    path("api/async/issue/", AsyncIssueView.as_view(), name="async-issue-list"),
+    path(
+        "api/async/issue/<int:pk>/",
+        AsyncIssueView.as_view(),
+        name="async-issue-detail",
+    ),
+    path("api/async/comment/", AsyncCommentView.as_view(), name="async-comment-list"),
+    path(
+        "api/async/comment/<int:pk>/",
+        AsyncCommentView.as_view(),
+        name="async-comment-detail",
+    ),
 ]
@@ -1,89 +1,263 @@
+from django.db import transaction
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+
+from SoftDesk.conditional import ConditionalGetMixin
+from SoftDesk.db_routers import ReplicaReadsMixin
+from SoftDesk.fieldsets import SparseFieldsetMixin
+from SoftDesk.filters import DATE_FILTER_FIELDS
+from SoftDesk.response_cache import ResponseCacheMixin
 from project.serializers import (
     ProjectSerializer,
+    ProjectSummarySerializer,
     ContributorSerializer,
     AdminProjectSerializer,
     AdminContributorSerializer,
     AdminIssueSerializer,
     IssueSerializer,
+    IssueSummarySerializer,
     AdminCommentSerializer,
     CommentSerializer,
 )
 from project.models import Project, Contributor, Issue, Comment
 from project.permissions import IsOwnerOrReadOnly
+from project.pagination import KeysetPaginationMixin
+from project.search import SearchMixin
+from project.export import (
+    ExportMixin,
+    PROJECT_EXPORT_FIELDS,
+    ISSUE_EXPORT_FIELDS,
+    COMMENT_EXPORT_FIELDS,
+)
+from project.membership import get_contributed_project_ids
+
+
+class SummarySerializerMixin:
+    """use the summary_serializer to display the list view with counts instead of
+    the nested fields
+    http://127.0.0.1:8000/api/project/?view=summary"""
+
+    summary_serializer_class = None
+
+    def get_serializer_class(self):
+        check_list = [
+            self.action == "list",
+            self.request.GET.get("view") == "summary",
+            self.summary_serializer_class is not None,
+        ]
+        if all(check_list):
+            return self.summary_serializer_class
+        return super().get_serializer_class()
+
+
+class ContributedProjectsCacheMixin(ResponseCacheMixin):
+    """cache the list of the contributed projects data, shared by the users
+    contributing to the same projects"""
+
+    def get_response_cache_scopes(self, request):
+        contributed_projects = get_contributed_project_ids(request.user, request)
 
+        return ["users", *[f"project:{pk}" for pk in sorted(contributed_projects)]]
 
-class AdminProjectViewset(ModelViewSet):
+
+class BulkCreateUpdateMixin:
+    """create (POST) a list of instances or partially update (PATCH) a list of
+    instances with their "id", in one transaction with bulk queries. The errors
+    are returned per item.
+    http://127.0.0.1:8000/api/issue/bulk/"""
+
+    bulk_max_size = 1000
+
+    def get_serializer(self, *args, **kwargs):
+        data = kwargs.get("data")
+        if isinstance(data, list):
+            if len(data) > self.bulk_max_size:
+                raise ValidationError(
+                    f"Vous ne pouvez pas envoyer plus de {self.bulk_max_size} éléments."
+                )
+            kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        # the unique constraints of a batch are checked in the transaction
+        # of its insert
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
+    def get_bulk_queryset(self):
+        """the rows in the scope of get_queryset() without the eager loading plan
+        of the list view, with the related rows read by the permissions and the
+        validation of the serializer (its bulk_select_related)"""
+
+        queryset = (
+            self.get_queryset().select_related(None).prefetch_related(None).defer(None)
+        )
+        related_fields = self.get_serializer_class().bulk_select_related
+
+        return queryset.select_related(*related_fields) if related_fields else queryset
+
+    @action(detail=False, methods=["patch"], url_path="bulk")
+    def bulk_partial_update(self, request):
+        data = request.data
+        if not isinstance(data, list):
+            raise ValidationError("Une liste d'éléments est attendue.")
+
+        try:
+            ids = [int(item["id"]) for item in data]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError('Chaque élément doit contenir un "id".')
+        if len(set(ids)) != len(ids):
+            raise ValidationError("Un même élément est présent plusieurs fois.")
+
+        # the unique constraints are checked in the transaction of the update
+        with transaction.atomic():
+            instances = {
+                instance.pk: instance
+                for instance in self.get_bulk_queryset().filter(id__in=ids)
+            }
+            missing_ids = [pk for pk in ids if pk not in instances]
+            if missing_ids:
+                raise NotFound(f"Éléments introuvables : {missing_ids}")
+            for instance in instances.values():
+                self.check_object_permissions(request, instance)
+
+            serializer = self.get_serializer(
+                [instances[pk] for pk in ids], data=data, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        return Response(serializer.data)
+
+
+class AdminProjectViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    ExportMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     serializer_class = AdminProjectSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    change_stamp_fields = ("updated_time", "author__updated_time")
+    export_fields = PROJECT_EXPORT_FIELDS
+    # url filters, e.g. http://127.0.0.1:8000/api/admin/project/?category=xxx
+    filter_fields = {
+        "category": "category__in",
+        "project_name": "name",
+        "author": "author__username",
+        "is_active": "is_active",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = ("id", "name", "category", "created_time", "updated_time")
+    # SQL queries of the requests (authentication included), more queries
+    # fail the tests, see SoftDesk.instrumentation
+    query_budget = {"list": 8, "retrieve": 7}
 
     def get_queryset(self):
         queryset = Project.objects.all()
 
-        # url filter on Project.category
-        # http://127.0.0.1:8000/api/admin/project/?category=xxx
-        category = self.request.GET.get("category")
-        if category:
-            queryset = queryset.filter(category=category)
-
-        # url filter on Project.name
-        # http://127.0.0.1:8000/api/admin/project/?project_name=xxx
-        project_name = self.request.GET.get("project_name")
-        if project_name:
-            queryset = queryset.filter(name=project_name)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class ProjectViewset(ModelViewSet):
+class ProjectViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    ContributedProjectsCacheMixin,
+    ExportMixin,
+    SummarySerializerMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     """The project contributors can read the project but only the author can edit it"""
 
     serializer_class = ProjectSerializer
+    summary_serializer_class = ProjectSummarySerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    change_stamp_fields = ("updated_time", "author__updated_time")
+    export_fields = PROJECT_EXPORT_FIELDS
+    # url filters, e.g. http://127.0.0.1:8000/api/project/?category=xxx
+    filter_fields = {
+        "category": "category__in",
+        "project_name": "name",
+        "author": "author__username",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = ("id", "name", "category", "created_time", "updated_time")
+    query_budget = {"list": 9, "retrieve": 8}
 
     def get_queryset(self):
         # select only projects where the connected user is a contributor
-        queryset = Project.objects.filter(
-            contributor__contributor=self.request.user, is_active=True
+        contributed_projects = get_contributed_project_ids(
+            self.request.user, self.request
         )
+        queryset = Project.objects.filter(id__in=contributed_projects)
 
-        # url filter on Project.category
-        # http://127.0.0.1:8000/api/project/?category=xxx
-        category = self.request.GET.get("category")
-        if category:
-            queryset = queryset.filter(category=category)
-
-        # url filter on Project.name
-        # http://127.0.0.1:8000/api/project/?project_name=xxx
-        project_name = self.request.GET.get("project_name")
-        if project_name:
-            queryset = queryset.filter(name=project_name)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class AdminContributorViewset(ModelViewSet):
+class AdminContributorViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    BulkCreateUpdateMixin,
+    ModelViewSet,
+):
     serializer_class = AdminContributorSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    change_stamp_fields = (
+        "updated_time",
+        "project__updated_time",
+        "contributor__updated_time",
+    )
+    # url filters, e.g. http://127.0.0.1:8000/api/admin/contributor/?project_id=1
+    filter_fields = {
+        "project_id": "project",
+        "contributor": "contributor__username",
+    }
+    ordering_fields = ("id", "updated_time")
+    query_budget = {"list": 5, "retrieve": 4}
 
     def get_queryset(self):
         queryset = Contributor.objects.all()
 
-        # url filter on Contributor.id
-        project_id = self.request.GET.get("project_id")
-        if project_id:
-            queryset = queryset.filter(project=project_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class ContributorViewset(ModelViewSet):
+class ContributorViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    BulkCreateUpdateMixin,
+    ModelViewSet,
+):
     """Only a project author can create a contribution"""
 
     serializer_class = ContributorSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    change_stamp_fields = (
+        "updated_time",
+        "project__updated_time",
+        "contributor__updated_time",
+    )
+    # url filters, e.g. http://127.0.0.1:8000/api/contributor/?project_id=1
+    filter_fields = {
+        "project_id": "project",
+        "contributor": "contributor__username",
+    }
+    ordering_fields = ("id", "updated_time")
+    query_budget = {"list": 5, "retrieve": 6}
 
     def get_queryset(self):
         # select only contributors to the project where the connected user is the author
@@ -92,88 +266,202 @@ class ContributorViewset(ModelViewSet):
         )
         # queryset = Contributor.objects.all()
 
-        # url filter on Contributor.id
-        project_id = self.request.GET.get("project_id")
-        if project_id:
-            queryset = queryset.filter(project=project_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class AdminIssueViewset(ModelViewSet):
+class AdminIssueViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    BulkCreateUpdateMixin,
+    ExportMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     """only a project contributor can be assigned and act as the issue author"""
 
     serializer_class = AdminIssueSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    change_stamp_fields = (
+        "updated_time",
+        "author__updated_time",
+        "project__updated_time",
+        "assigned_to__updated_time",
+    )
+    export_fields = ISSUE_EXPORT_FIELDS
+    search_fields = ("name", "description")
+    # url filters, e.g. http://127.0.0.1:8000/api/issue/?status=To Do,In Progress
+    filter_fields = {
+        "issue_id": "id",
+        "project_id": "project",
+        "project_name": "project__name",
+        "status": "status__in",
+        "priority": "priority__in",
+        "category": "category__in",
+        "author": "author__username",
+        "assigned_to": "assigned_to__username",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = (
+        "id",
+        "name",
+        "status",
+        "priority",
+        "category",
+        "created_time",
+        "updated_time",
+    )
+    query_budget = {"list": 6, "retrieve": 5}
 
     def get_queryset(self):
         queryset = Issue.objects.all()
 
-        # url filter on Issue.id
-        issue_id = self.request.GET.get("issue_id")
-        if issue_id:
-            queryset = queryset.filter(id=issue_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class IssueViewset(ModelViewSet):
+class IssueViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    ContributedProjectsCacheMixin,
+    BulkCreateUpdateMixin,
+    ExportMixin,
+    SearchMixin,
+    SummarySerializerMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     """only a project contributor can be assigned and act as the issue author"""
 
     serializer_class = IssueSerializer
+    summary_serializer_class = IssueSummarySerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    change_stamp_fields = (
+        "updated_time",
+        "author__updated_time",
+        "project__updated_time",
+        "assigned_to__updated_time",
+    )
+    export_fields = ISSUE_EXPORT_FIELDS
+    search_fields = ("name", "description")
+    # url filters, e.g. http://127.0.0.1:8000/api/issue/?status=To Do,In Progress
+    filter_fields = {
+        "issue_id": "id",
+        "project_id": "project",
+        "project_name": "project__name",
+        "status": "status__in",
+        "priority": "priority__in",
+        "category": "category__in",
+        "author": "author__username",
+        "assigned_to": "assigned_to__username",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = (
+        "id",
+        "name",
+        "status",
+        "priority",
+        "category",
+        "created_time",
+        "updated_time",
+    )
+    query_budget = {"list": 7, "retrieve": 6}
 
     def get_queryset(self):
         # select only issues where the connected user is a project contributor
-        contributed_projects = Project.objects.filter(
-            contributor__contributor=self.request.user, is_active=True
+        contributed_projects = get_contributed_project_ids(
+            self.request.user, self.request
         )
         queryset = Issue.objects.filter(project__in=contributed_projects)
 
-        # url filter on Issue.id
-        issue_id = self.request.GET.get("issue_id")
-        if issue_id:
-            queryset = queryset.filter(id=issue_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class AdminCommentViewset(ModelViewSet):
+class AdminCommentViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    BulkCreateUpdateMixin,
+    ExportMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     """only a project contributor can create a comment on an issue"""
 
     serializer_class = AdminCommentSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    change_stamp_fields = (
+        "updated_time",
+        "author__updated_time",
+        "issue__updated_time",
+    )
+    export_fields = COMMENT_EXPORT_FIELDS
+    search_fields = ("description",)
+    # url filters, e.g. http://127.0.0.1:8000/api/comment/?issue_id=1
+    filter_fields = {
+        "comment_id": "id",
+        "issue_id": "issue",
+        "author": "author__username",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = ("id", "created_time", "updated_time")
+    query_budget = {"list": 5, "retrieve": 4}
 
     def get_queryset(self):
         queryset = Comment.objects.all()
 
-        # url filter on Comment.id
-        comment_id = self.request.GET.get("comment_id")
-        if comment_id:
-            queryset = queryset.filter(id=comment_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )
 
 
-class CommentViewset(ModelViewSet):
+class CommentViewset(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    ContributedProjectsCacheMixin,
+    BulkCreateUpdateMixin,
+    ExportMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
     """only a project contributor can create a comment on an issue"""
 
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    change_stamp_fields = (
+        "updated_time",
+        "author__updated_time",
+        "issue__updated_time",
+    )
+    export_fields = COMMENT_EXPORT_FIELDS
+    search_fields = ("description",)
+    # url filters, e.g. http://127.0.0.1:8000/api/comment/?issue_id=1
+    filter_fields = {
+        "comment_id": "id",
+        "issue_id": "issue",
+        "author": "author__username",
+        **DATE_FILTER_FIELDS,
+    }
+    ordering_fields = ("id", "created_time", "updated_time")
+    query_budget = {"list": 6, "retrieve": 5}
 
     def get_queryset(self):
         # get the comments of contributed projects
-        contributed_projects = Project.objects.filter(
-            contributor__contributor=self.request.user, is_active=True
-        )
-        contributed_projects_issues = Issue.objects.filter(
-            project__in=contributed_projects
+        contributed_projects = get_contributed_project_ids(
+            self.request.user, self.request
         )
-        queryset = Comment.objects.filter(issue__in=contributed_projects_issues)
+        queryset = Comment.objects.filter(issue__project__in=contributed_projects)
 
-        # url filter on Comment.id
-        comment_id = self.request.GET.get("comment_id")
-        if comment_id:
-            queryset = queryset.filter(id=comment_id)
-
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(
+            queryset, self.get_sparse_fields()
+        )